@@ -17,12 +17,29 @@ In addition, you should have the following subfolders
 
 Moving any of these folders or files will prevent the game from working properly
 
+The command line arguments are read (see consts.py) before the rest of the
+game is imported. Importing app.py only imports game2d (Kivy) and what the
+title screen needs: the renderer and the assets are imported by
+Invaders.start, and the wave by the asset loader. The time from here to
+the start and to the first frame is kept by the profiler.
+
 Author: Walker M. White (wmw2)
 Date:   November 20, 2019
 """
-from consts import *
-from app import *
+import time
+LAUNCHED = time.perf_counter()
+
+import sys
+import consts
 
 # Application code
 if __name__ == '__main__':
-    Invaders(width=GAME_WIDTH,height=GAME_HEIGHT).run()
+    consts.readArguments(sys.argv)
+    from app import Invaders
+    game = Invaders(width=consts.GAME_WIDTH,height=consts.GAME_HEIGHT)
+    game.setLaunchTime(LAUNCHED)
+    try:
+        game.run()
+    finally:
+        # Closing the window also ends the game
+        game.saveProfile()
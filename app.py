@@ -12,7 +12,9 @@ question on Piazza.
 """
 from consts import *
 from game2d import *
-from wave import *
+from hud import Hud, Overlay
+from profiler import FrameProfiler
+import time
 
 # PRIMARY RULE: Invaders can only access attributes in wave.py via getters/setters
 # Invaders is NOT allowed to access anything in models.py
@@ -55,15 +57,15 @@ class Invaders(GameApp):
     # HIDDEN ATTRIBUTES:
     # Attribute _state: the current state of the game represented as an int
     # Invariant: _state is one of STATE_INACTIVE, STATE_NEWWAVE, STATE_ACTIVE, 
-    # STATE_PAUSED, STATE_CONTINUE, or STATE_COMPLETE
+    # STATE_PAUSED, STATE_CONTINUE, STATE_COMPLETE, or STATE_CLEARED
     #
     # Attribute _wave: the subcontroller for a single wave, managing aliens
     # Invariant: _wave is a Wave object, or None if there is no wave currently 
     # active. It is only None if _state is STATE_INACTIVE.
     #
-    # Attribute _text: the currently active message
-    # Invariant: _text is a list of GLabel objects, or None if there is
-    # no message to  display. It is only None if _state is STATE_ACTIVE.
+    # Attribute _hud: the messages on screen
+    # Invariant: _hud is a Hud object. It shows nothing while the state is
+    # STATE_ACTIVE.
     #
     # You may have new attributes if you wish (you might want an attribute to
     # store any score across multiple waves). But you must document them.
@@ -73,17 +75,54 @@ class Invaders(GameApp):
     # conditional statements
     # Invariant: _list is a list of the bool "True"
     #
-    # Attribute _pewSound: initializes sound for a bolt fired from a player
-    # Invariant: _pewSound is a Sound object
+    # Attribute _sounds: every sound effect of the game, loaded only once
+    # and shared with every wave
+    # Invariant: _sounds is a SoundBank object
     #
-    # Attribute _pewSound2: initializes sound for a bolt fired from an alien
-    # Invariant: _pewSound2 is a Sound object
+    # Attribute _textures: every decoded image of the game, shared with the
+    # atlas and every wave (so an image is only decoded once)
+    # Invariant: _textures is a TextureCache object
     #
-    # Attribute _blastSound: initializes sound for a bolt collided with a ship
-    # Invariant: _blastSound is a Sound object
+    # Attribute _atlas: every sprite of the game in one texture, made only
+    # once and shared with every wave (so each wave draws as one batch)
+    # Invariant: _atlas is a TextureAtlas object, or None until _loader made
+    # it
     #
-    # Attribute _popSound: initializes sound for a bolt collided with an alien
-    # Invariant: _popSound is a Sound object
+    # Attribute _loader: the assets left to load (the wave module, the
+    # sounds, the images and the atlas), loaded while the title screen is up
+    # Invariant: _loader is an AssetLoader object, made only once
+    #
+    # Attribute _launched: when the game was launched (see setLaunchTime)
+    # Invariant: _launched is a perf_counter time, or None if not known
+    #
+    # Attribute _level: the number of the wave being played (the first wave
+    # is 1)
+    # Invariant: _level is an int in 0..WAVE_COUNT, 0 before the first wave
+    #
+    # Attribute _next: the next wave, made ahead of time (see prepareWave) so
+    # that starting it only has to swap it in
+    # Invariant: _next is a Wave object not played yet, or None
+    #
+    # Attribute _nextLevel: the number of the wave _next was made for
+    # Invariant: _nextLevel is an int in 1..WAVE_COUNT
+    #
+    # Attribute _layer: the background, the messages and the defensive line,
+    # drawn once and put on screen as one texture every frame
+    # Invariant: _layer is a StaticLayer object, made only once
+    #
+    # Attribute _drawn: what _layer was last drawn with
+    # Invariant: _drawn is a list of two elements: the version of _hud, and
+    # the defensive line (GPath) of _wave, or None if none was drawn
+    #
+    # Attribute _profiler: the times of the phases of the last frames, shared
+    # with every wave
+    # Invariant: _profiler is a FrameProfiler object, made only once
+    #
+    # Attribute _overlay: the profile on screen (shown with PROFILE_KEY)
+    # Invariant: _overlay is an Overlay object, made only once
+    #
+    # Attribute _toggled: whether PROFILE_KEY was down in the last frame
+    # Invariant: _toggled is a bool
     # DO NOT MAKE A NEW INITIALIZER!
     #
     # Attribute _KEYS_PRESSED: amount of times a certain key is pressed
@@ -103,29 +142,63 @@ class Invaders(GameApp):
         
         This method should make sure that all of the attributes satisfy the 
         given invariants. When done, it sets the _state to STATE_INACTIVE and 
-        create a message (in attribute _text) saying that the user should press
+        create a message (in attribute _hud) saying that the user should press
         to play a game.
         """
         self._state = STATE_INACTIVE
+        try:
+            # Give the images of the last game back to the cache
+            self._wave.dispose()
+        except AttributeError:
+            pass # No game was played yet
         self._wave = None
-        self._pewSound = Sound('pew1.wav')
-        self._pewSound2 = Sound('pew2.wav')
-        self._blastSound = Sound('blast1.wav')
-        self._popSound = Sound('pop2.wav')
+        self._level = 0
+        try:
+            # A first wave made ahead of time is still good for a new game
+            if self._next is not None and self._nextLevel != 1:
+                self._next.dispose()
+                self._next = None
+        except AttributeError:
+            self._next = None
+            self._nextLevel = 1
+        try:
+            self._sounds
+        except AttributeError:
+            # Only load the sounds and images the first time (not on a
+            # restart), and not yet: the title screen is shown first. Their
+            # modules are imported here too, not when app.py is imported.
+            from assets import SoundBank, TextureCache
+            from render import StaticLayer
+            self._profiler = FrameProfiler()
+            self.markStartup('start')
+            self._sounds = SoundBank(lazy=True)
+            self._textures = TextureCache()
+            self._atlas = None
+            self._loader = self.makeLoader()
+            self._layer = StaticLayer()
+            self._overlay = Overlay()
+            self._toggled = False
+        self._layer.invalidate()
+        self._drawn = [-1, None]
         self._list = []
-        self._text = []
+        try:
+            self._hud.clear()
+        except AttributeError:
+            # Keep the labels made by an earlier game (on a restart)
+            self._hud = Hud()
         self._background = GRectangle(x=GAME_WIDTH/2,y=GAME_HEIGHT/2,
                                       fillcolor="black",
                                       width=GAME_WIDTH,height=GAME_HEIGHT)
-        self.makeLabel("SPACE INVADERS", 60, top=GAME_HEIGHT - 50,
+        self.makeLabel("title", "SPACE INVADERS", 60, top=GAME_HEIGHT - 50,
                        left=GAME_WIDTH /12)
-        self.makeLabel("Welcome to \n\n\n\n\n\n\n"
+        self.makeLabel("controls", "Welcome to \n\n\n\n\n\n\n"
                         "Press 'S' to Play \n Controls: \n"
                         + "Right Arrow Key - Move right \n" +
                         " Left Arrow Key - Move left \n" +
                         " Spacebar - Shoot \n" +
                         " P - Sound off \n" + "O - Sound on \n" +
-                        " Q - Pause Game", 24, GAME_WIDTH / 5,
+                        " Q - Pause Game \n" + " F - Frame Profile", 24,
+                        GAME_WIDTH / 5,
                         GAME_HEIGHT - 25)
 
     def update(self,dt):
@@ -153,9 +226,11 @@ class Invaders(GameApp):
         
         STATE_NEWWAVE: This is the state creates a new wave and shows it on 
         the screen. The application switches to this state if the state was 
-        STATE_INACTIVE in the previous frame, and the player pressed a key. 
-        This state only lasts one animation frame before switching to 
-        STATE_ACTIVE.
+        STATE_INACTIVE or STATE_CLEARED in the previous frame, and the player
+        pressed a key. This state only lasts one animation frame before
+        switching to STATE_ACTIVE. The wave is usually made ahead of time
+        (on a menu, or near the end of the wave before), so this frame only
+        swaps it in.
         
         STATE_ACTIVE: This is a session of normal gameplay.  The player can 
         move the ship and fire laser bolts.  All of this should be handled 
@@ -171,7 +246,11 @@ class Invaders(GameApp):
         in the previous frame, and the player pressed a key. This state only 
         lasts one animation frame before switching to STATE_ACTIVE.
         
-        STATE_COMPLETE: The wave is over, and is either won or lost.
+        STATE_COMPLETE: The game is over, and is either won (every one of
+        the WAVE_COUNT waves was cleared) or lost.
+
+        STATE_CLEARED: A wave was cleared, and the next one (faster than it)
+        starts when the player presses a key. The lives left carry over.
         
         You are allowed to add more states if you wish. Should you do so,
         you should describe them here.
@@ -179,8 +258,11 @@ class Invaders(GameApp):
         Parameter dt: The time in seconds since last update
         Precondition: dt is a number (int or float)
         """
-        assert isinstance(dt, int) or isinstance(dt, float), "dt is of type "+\
-            str(type(dt)) + " not int or float"
+        if VALIDATION >= VALIDATE_BOUNDARY:
+            assert isinstance(dt, int) or isinstance(dt, float), \
+                "dt is of type " + str(type(dt)) + " not int or float"
+        self._profiler.beginFrame()
+        self.toggleOverlay()
         if self._state == STATE_INACTIVE:
             self.inactive()
         if self._state == STATE_NEWWAVE:
@@ -191,6 +273,9 @@ class Invaders(GameApp):
             self.paused()
         if self._state == STATE_COMPLETE:
             self.complete()
+        if self._state == STATE_CLEARED:
+            self.cleared()
+        self._sounds.flush()
 
     def draw(self):
         """
@@ -205,32 +290,71 @@ class Invaders(GameApp):
         getters for these attributes or you need to add a draw method to 
         class Wave.  We suggest the latter.  See the example subcontroller.py 
         from class.
+
+        The time it takes (with update) is kept by the profiler, which is
+        shown on top of the game while the overlay is visible. So is the time
+        from launch to the first frame.
         """
-        if self._background != None:
-            self._background.draw(self.view)
-        if self._text != None:
-            for text in self._text:
-                text.draw(self.view)
+        self._profiler.begin('draw')
+        self.drawStatic()
+        self._layer.composite(self.view)
         if self._wave != None:
             if self._wave.getGameState() != 3:
-                self._wave.draw(self.view)
+                self._wave.draw(self.view, False)
+        self._profiler.end('draw')
+        self._profiler.endFrame()
+        if self._profiler.getFrames() == 1:
+            self.markStartup('firstFrame')
+        if self._overlay.isVisible():
+            if self._profiler.getFrames() % PROFILE_REFRESH == 0:
+                self._overlay.show(self._profiler.toText())
+            self._overlay.draw(self.view)
+
+    def drawStatic(self):
+        """
+        Returns: Nothing
+
+        This method draws the background, the messages and the defensive line
+        into the static layer (attribute self._layer), but only if something
+        changed since it was last drawn. Most frames it does nothing, and
+        method draw just puts the layer on screen.
+        """
+        line = None
+        if self._wave != None and self._wave.getGameState() != 3:
+            line = self._wave.getDline()
+        layer = self._layer
+        if (layer.isDirty() or self._hud.getVersion() != self._drawn[0] or
+                line is not self._drawn[1]):
+            layer.begin()
+            if self._background != None:
+                self._background.draw(layer)
+            self._hud.draw(layer)
+            if line is not None:
+                self._wave.drawStatic(layer)
+            layer.end()
+            self._drawn[0] = self._hud.getVersion()
+            self._drawn[1] = line
 
     # HELPER METHODS FOR THE STATES GO HERE
-    def makeLabel(self, text, size=48, left=GAME_WIDTH / 6,
+    def makeLabel(self, key, text, size=48, left=GAME_WIDTH / 6,
                   top= GAME_HEIGHT / 2, halign= "center",valign="middle"):
         """
         Returns: Nothing
 
-        This method alters the attribute self._text by adding what the text
-        list attribute in GLabel contains.
+        This method shows a message in the HUD (attribute self._hud). The
+        label for a key is only made once, so this method can be called every
+        frame; the text is only laid out again when it changes.
          It keeps these attributes of GLabel constant:
                 - font_size = 48 (by default)
                 - halign = "center" (by default)
                 - valign = "middle" (by default)
                 - font_name = "RetroGame.ttf"
-                - left = GAME_WIDTH / 3 (by default)
+                - left = GAME_WIDTH / 6 (by default)
                 - top = GAME_HEIGHT / 2 (by default)
 
+        Parameter key: the name of the message (one label per name)
+        Precondition: key is a string
+
         Parameter text: the text to edit
         Precondition: text is a string
 
@@ -251,24 +375,122 @@ class Invaders(GameApp):
         Parameter valign: the vertical alignment of the text
         Precondition:  must be ‘top’, ‘bottom’, or ‘middle’
         """
-        assert isinstance(text, str), "text is not a string"
-        assert isinstance(size, int), "size needs to be an int"
-        assert (isinstance(left, int) or isinstance(left, float),
-                "left needs to be number")
-        assert 0 <= left <= GAME_WIDTH, "left needs to be in range"
-        assert (isinstance(top, int) or isinstance(top, float),
-                "top needs to be number")
-        assert 0 <= top <= GAME_HEIGHT, "top is not in range"
-        assert (halign == "left" or halign == "right" or halign == "center",
-            "invalid horizontal alignment input")
-        assert (valign == "top" or valign == "bottom" or valign == "middle",
-            "invalid vertical alignment input")
-        self._text.append(GLabel(text=text,
-                            font_size=size,
-                            linecolor="green",
-                            halign=halign, valign=valign,
-                            font_name="RetroGame.ttf",
-                            left=left, top=top))
+        # preconditions are checked by Hud when the label is made
+        self._hud.show(key, text, size, left, top, halign, valign)
+
+    def toggleOverlay(self):
+        """
+        Returns: Nothing
+
+        This method shows the profile overlay when PROFILE_KEY is pressed,
+        and hides it when it is pressed again
+        """
+        down = self.input.is_key_down(PROFILE_KEY)
+        if down and not self._toggled:
+            self._overlay.setVisible(not self._overlay.isVisible())
+            if self._overlay.isVisible():
+                self._overlay.show(self._profiler.toText())
+        self._toggled = down
+
+    def saveProfile(self):
+        """
+        Returns: Nothing
+
+        This method writes the profile of the last frames to PROFILE_FILE as
+        JSON (if it is not None). It is called once, when the game exits
+        (however it exits, see __main__.py).
+        """
+        try:
+            profiler = self._profiler
+        except AttributeError:
+            return # The game never started
+        if PROFILE_FILE is not None:
+            profiler.save(PROFILE_FILE)
+
+    # METHODS TO START THE GAME QUICKLY
+    def setLaunchTime(self, launched):
+        """
+        Returns: Nothing
+
+        This method sets when the game was launched, so that the profiler can
+        report how long it took to start (see markStartup). It is called
+        before the game is run.
+
+        Parameter launched: when the game was launched
+        Precondition: launched is a time.perf_counter() time
+        """
+        self._launched = launched
+
+    def markStartup(self, name):
+        """
+        Returns: Nothing
+
+        This method records in the profiler that a milestone of the startup
+        was reached now. It does nothing if the launch time is not known.
+
+        Parameter name: the name of the milestone
+        Precondition: name is a string
+        """
+        try:
+            launched = self._launched
+        except AttributeError:
+            return # Not launched by __main__.py
+        if launched is not None:
+            self._profiler.setStartup(name, time.perf_counter() - launched)
+
+    def makeLoader(self):
+        """
+        Returns: a loader with every asset of the game, in the order they
+        are needed
+
+        The title screen only needs the Hud, so everything a wave needs is
+        left to the loader: the wave module (and the models and sprites it
+        imports), the sound effects, the images and the atlas.
+        """
+        from assets import AssetLoader
+        loader = AssetLoader()
+        loader.add('wave', self.importWave)
+        for name in self._sounds.getEffects():
+            loader.add(name, self._sounds.load, name)
+        for name in ALIEN_IMAGES + ('ship.png',):
+            loader.add(name, self._textures.preload, name)
+        loader.add('atlas', self.makeAtlas)
+        return loader
+
+    def importWave(self):
+        """
+        Returns: Nothing
+
+        This method imports the wave module, so that the first wave does not
+        wait for it
+        """
+        import wave
+
+    def makeAtlas(self):
+        """
+        Returns: Nothing
+
+        This method packs the sprites of the game into the atlas (attribute
+        self._atlas), from the images already in the texture cache
+        """
+        from render import TextureAtlas
+        self._atlas = TextureAtlas(textures=self._textures)
+
+    def loadAssets(self, seconds=ASSET_FRAME_BUDGET):
+        """
+        Returns: Nothing
+
+        This method loads the assets left for at most about the given
+        seconds. Nothing is loaded until the first frame is on screen. When
+        the last asset is loaded, the profiler records the time.
+
+        Parameter seconds: the time loading may take
+        Precondition: seconds is a number >= 0
+        """
+        if self._loader.isDone() or self._profiler.getFrames() == 0:
+            return
+        if self._loader.step(seconds):
+            self.markStartup('assets')
 
     def soundControl(self):
         """
@@ -287,26 +509,112 @@ class Invaders(GameApp):
         """
         Returns: Nothing
 
-        This method is a helper method for STATE_INACTIVE. When the 's' key
-        is pressed, the text is erased and self._state = STATE_NEWWAVE
+        This method is a helper method for STATE_INACTIVE. While the title
+        screen is up, the assets are loaded a little every frame, and then
+        the first wave is made. When the 's' key is pressed, the text is
+        erased and self._state = STATE_NEWWAVE
         """
+        if self._loader.isDone():
+            self.prepareAhead()
+        else:
+            self.loadAssets()
         self._KEYS_PRESSED = self.input.key_count
         if (self.input.is_key_down('s') and self._KEYS_PRESSED > 0):
             self._state = STATE_NEWWAVE
-            self._text.clear()
+            self._hud.clear()
             self._KEYS_PRESSED = 0
 
     def newWave(self):
         """
         Returns: Nothing
 
-        This method is a helper method for STATE_NEWWAVE. After making a grid
-        of aliens, self._state = STATE_ACTIVE
+        This method is a helper method for STATE_NEWWAVE. It starts the next
+        wave, with the lives left from the wave before it (if any), and then
+        self._state = STATE_ACTIVE.
+
+        The wave was usually made ahead of time (see prepareAhead), so it is
+        only swapped in: the old wave is replaced by the new one all at once,
+        and only given back after that. Its recording only starts now, so a
+        wave that is never played leaves no replay. If it was not made yet
+        (or the title screen was left before every asset was loaded), that is
+        done now.
         """
-        self._wave = Wave(ALIEN_ROWS, ALIENS_IN_ROW,
-                          GAME_WIDTH / 2, DEFENSE_LINE, SHIP_LIVES)
+        if not self._loader.isDone():
+            self._loader.finish()
+            self.markStartup('assets')
+        self._level += 1
+        lives = SHIP_LIVES if self._wave is None else self._wave.getLives()
+        self.prepareWave(self._level, lives)
+        old = self._wave
+        self._wave = self._next
+        self._next = None
+        self._wave.setSound(self._list.count(True) % 2 == 0)
+        self._wave.startRecording()
+        if old is not None:
+            old.dispose()
         self._state = STATE_ACTIVE
 
+    def prepareWave(self, level, lives):
+        """
+        Returns: Nothing
+
+        This method makes the wave of a level (attribute self._next), unless
+        it was made already. A wave made for another level (or number of
+        lives) is given back. The wave does not record anything until it is
+        played (see newWave).
+
+        Parameter level: the number of the wave
+        Precondition: level is an int in 1..WAVE_COUNT, and every asset is
+        loaded
+
+        Parameter lives: the lives the player starts the wave with
+        Precondition: lives is an int in 1..SHIP_LIVES
+        """
+        if self._next is not None:
+            if self._nextLevel == level and self._next.getLives() == lives:
+                return
+            self._next.dispose()
+        from wave import Wave
+        self._next = Wave(ALIEN_ROWS, ALIENS_IN_ROW,
+                          GAME_WIDTH / 2, DEFENSE_LINE, lives,
+                          sound=self._list.count(True) % 2 == 0,
+                          sounds=self._sounds, atlas=self._atlas,
+                          textures=self._textures, profiler=self._profiler,
+                          speed=self.getWaveSpeed(level), record=False)
+        self._nextLevel = level
+
+    def prepareAhead(self):
+        """
+        Returns: Nothing
+
+        This method makes the wave after the one being played (the first
+        wave, before the game starts), if there is one, so that STATE_NEWWAVE
+        does not have to make it. It is only called on the title screen and
+        on the screen between two waves: nothing moves there, so the frame
+        it takes is not seen, and the lives the next wave starts with can no
+        longer change.
+        """
+        level = self._level + 1
+        if level <= WAVE_COUNT:
+            lives = SHIP_LIVES if self._wave is None else \
+                self._wave.getLives()
+            self.prepareWave(level, lives)
+
+    def getWaveSpeed(self, level):
+        """
+        Returns: the number of seconds between alien steps in a wave
+
+        The first wave steps every ALIEN_SPEED seconds, and every wave after
+        it steps WAVE_SPEEDUP times as often as the one before it, but never
+        more often than every WAVE_MIN_SPEED seconds (unless ALIEN_SPEED is
+        already shorter).
+
+        Parameter level: the number of the wave
+        Precondition: level is an int >= 1
+        """
+        return max(min(WAVE_MIN_SPEED, ALIEN_SPEED),
+                   ALIEN_SPEED * WAVE_SPEEDUP ** (level - 1))
+
     def active(self, dt):
         """
         Returns: Nothing
@@ -317,6 +625,9 @@ class Invaders(GameApp):
         If self._lives == 0 or the aliens have reached the dLine,
         self._state = STATE_COMPLETE.
         If a life is lost, self._state = STATE_PAUSED
+        If every alien is destroyed, self._state = STATE_CLEARED (or
+        STATE_COMPLETE, after the last wave). When the game is complete, the
+        aliens left are taken off the screen (once).
 
         Parameter dt: The time in seconds since last update
         Precondition: dt is a number (int or float)
@@ -325,31 +636,40 @@ class Invaders(GameApp):
             self._wave.setLives(self._wave.getLives() - 1)
             self._state = STATE_PAUSED
             self._wave.clearBolts()
+        elif self._wave.getGameState() == 1 and self._level < WAVE_COUNT:
+            self._state = STATE_CLEARED
+            self.saveReplay()
         elif self._wave.getGameState() == 1 or self._wave.getGameState() == 2:
             self._state = STATE_COMPLETE
+            self.saveReplay()
+            for row in range(ALIEN_ROWS):
+                for col in range(ALIENS_IN_ROW):
+                    self._wave.setAlien(row, col, None)
         if self._wave.getGameState() == 0:
+            # The input is given first, as it is used by every tick of the
+            # update
+            self._profiler.begin('input')
+            if self.input.is_key_down('right'):
+                self._wave.updateShip("right")
+            elif self.input.is_key_down('left'):
+                self._wave.updateShip("left")
+            if self.input.is_key_down('spacebar'):
+                self._wave.fireBolt()
+            self.soundControl()
+            self._profiler.end('input')
             self._wave.updateAliens(dt)
-            try:
-                if self.input.is_key_down('q'):
-                    self._wave.setGameState(3)
-                    self._state = STATE_PAUSED
-                if self.input.is_key_down('right'):
-                    self._wave.updateShip("right")
-                elif self.input.is_key_down('left'):
-                    self._wave.updateShip("left")
-                self.soundControl()
-                if self.input.is_key_down('spacebar'):
-                    newB = False
-                    for x in self._wave.getBolts():
-                        if x.isPlayerBolt():
-                            newB = True
-                    if not newB:
-                        if self._list.count(True) % 2 == 0:
-                            self._pewSound.play()
-                        self._wave.addBolt(self._wave.getShip().getX(),
-                                           SHIP_BOTTOM+SHIP_HEIGHT * 0.5, True)
-            except AttributeError:
-                pass
+            if self.input.is_key_down('q'):
+                self._wave.setGameState(3)
+                self._state = STATE_PAUSED
+
+    def saveReplay(self):
+        """
+        Returns: Nothing
+
+        This method ends the recording of the wave (see replay.py). If it is
+        being written to REPLAY_FOLDER, the rest of the file is written.
+        """
+        self._wave.getRecording().close()
 
     def paused(self):
         """
@@ -360,13 +680,13 @@ class Invaders(GameApp):
         continue, at which point the self._state = STATE_ACTIVE again
         """
         self._KEYS_PRESSED = self.input.key_count
-        self.makeLabel("Press 'c' to Continue\n(Lives: " +
+        self.makeLabel("paused", "Press 'c' to Continue\n(Lives: " +
                        str(self._wave.getLives()) + ")", size=32,
                        left=3*GAME_WIDTH / 16)
         if (self.input.is_key_down('c') and self._KEYS_PRESSED > 0):
             self._state = STATE_ACTIVE
             self._wave.setGameState(0)
-            self._text.clear()
+            self._hud.clear()
 
     def complete(self):
         """
@@ -374,25 +694,40 @@ class Invaders(GameApp):
 
         This method is a helper method for STATE_COMPLETE. When the player has
         lost all their lives, or other game ending-conditions occur (like
-        shooting all the aliens), a message will appear saying whether the
-        player has won or lost.
+        shooting all the aliens of the last wave), a message will appear
+        saying whether the player has won or lost.
         """
-        for row in range(ALIEN_ROWS):
-            for col in range(ALIENS_IN_ROW):
-                self._wave.setAlien(row, col, None)
         self._KEYS_PRESSED = self.input.key_count
         if self._wave.getGameState() == 2:
-            self.makeLabel("You Lost!\n Press 'esc' to quit "
+            self.makeLabel("complete", "You Lost!\n Press 'esc' to quit "
                            "\nor 's' to play again",
                            size=32, left=3*GAME_WIDTH / 14,
                            top=4*GAME_HEIGHT/7)
         else:
-            self.makeLabel("You Won!\n Press 'esc' to quit "
+            self.makeLabel("complete", "You Won!\n Press 'esc' to quit "
                            "\nor 's' to play again",size=32,
                            left=3*GAME_WIDTH / 14, top=4*GAME_HEIGHT/7)
         if (self.input.is_key_down('escape') and self._KEYS_PRESSED > 0):
-            exit()
+            exit() # __main__.py saves the profile on the way out
         if self.input.is_key_down('s'):
             self.start()
-            self._text.clear()
+            self._hud.clear()
 
+    def cleared(self):
+        """
+        Returns: Nothing
+
+        This method is a helper method for STATE_CLEARED. When every alien of
+        a wave (but the last) is destroyed, a message says which wave comes
+        next, and the next wave is made ahead of time (if it was not made
+        already). When the player presses 's', self._state = STATE_NEWWAVE
+        """
+        self.prepareAhead()
+        self._KEYS_PRESSED = self.input.key_count
+        self.makeLabel("cleared", "Wave " + str(self._level) + " Cleared!\n"
+                       "Press 's' for Wave " + str(self._level + 1) +
+                       "\n(Lives: " + str(self._wave.getLives()) + ")",
+                       size=32, left=3*GAME_WIDTH / 14, top=4*GAME_HEIGHT/7)
+        if (self.input.is_key_down('s') and self._KEYS_PRESSED > 0):
+            self._state = STATE_NEWWAVE
+            self._hud.clear()
@@ -0,0 +1,388 @@
+"""
+Assets module for Alien Invaders
+
+This module contains the classes that load the sounds and images of the
+game once, so that nothing has to be read from disk while a wave is being
+played. Invaders makes the assets when the application starts and passes
+them to every Wave it creates.
+
+Loading them all at once would keep the title screen from showing. So
+Invaders gives the work to an AssetLoader, which does it a little at a time,
+on the frames while the title screen is up.
+"""
+from consts import *
+from game2d import *
+from kivy.core.image import Image as CoreImage
+import os
+import time
+
+# PRIMARY RULE: Assets may only access consts.py and game2d. They know nothing
+# about waves or the game state; Wave and Invaders tell them what to play.
+
+# The folder with the image files of the game
+IMAGE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'Images')
+
+
+class SoundBank(object):
+    """
+    A class to play the sound effects of the game.
+
+    Every effect in SOUND_EFFECTS is loaded as a fixed number of Sound
+    objects (its voices), either when the bank is made or later, one effect
+    at a time (see load). An effect that is not loaded yet is not played.
+    Playing an effect starts its next voice, cycling through them, so an
+    effect never has more voices playing than it has Sound objects. If all
+    are busy, the oldest one is restarted.
+
+    Effects are not played right away. Method play only asks for an effect,
+    and method flush (called once per frame) plays everything asked for since
+    the last flush. An effect asked for many times in the same frame (say, a
+    burst of aliens destroyed at once) is only played once.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _names: the file name of every effect
+    # Invariant: _names is a tuple of strings
+    #
+    # Attribute _index: the position of every effect in _names
+    # Invariant: _index is a dict mapping the strings in _names to ints
+    #
+    # Attribute _voices: the Sound objects of every effect
+    # Invariant: _voices is a list of lists of Sound objects, one list for
+    # every name in _names (empty until that effect is loaded)
+    #
+    # Attribute _counts: the number of voices of every effect
+    # Invariant: _counts is a tuple of ints > 0, one for every name in _names
+    #
+    # Attribute _next: the next voice to use for every effect
+    # Invariant: _next is a list of ints, _next[i] < len(_voices[i])
+    #
+    # Attribute _asked: the effects asked for since the last flush
+    # Invariant: _asked is a bytearray with an entry (0 or 1) for every name
+
+    def getEffects(self):
+        """
+        Returns: the file names of the effects in this bank
+        """
+        return self._names
+
+    def isLoaded(self, name=None):
+        """
+        Returns: True if an effect is loaded (or every effect, if name is
+        None), False otherwise
+
+        Parameter name: the file name of the effect
+        Precondition: name is one of the effects of this bank, or None
+        """
+        if name is None:
+            return all(self._voices)
+        return len(self._voices[self._index[name]]) > 0
+
+    def __init__(self, effects=SOUND_EFFECTS, lazy=False):
+        """
+        Initializes a bank of effects.
+
+        Parameter effects: the effects to load, with their number of voices
+        Precondition: effects is a tuple of (file name, int > 0) pairs, and
+        every file is in the Sounds folder
+
+        Parameter lazy: whether to wait for load to load the effects (instead
+        of loading them all now)
+        Precondition: lazy is a bool
+        """
+        self._names = tuple(name for name, voices in effects)
+        self._counts = tuple(voices for name, voices in effects)
+        self._index = {}
+        self._voices = []
+        for name, voices in effects:
+            if VALIDATION >= VALIDATE_BOUNDARY:
+                assert isinstance(voices, int) and voices > 0, \
+                    "an effect needs at least one voice"
+            self._index[name] = len(self._voices)
+            self._voices.append([])
+        self._next = [0] * len(self._names)
+        self._asked = bytearray(len(self._names))
+        if not lazy:
+            for name in self._names:
+                self.load(name)
+
+    def load(self, name):
+        """
+        Returns: Nothing
+
+        This method loads the voices of an effect (if they are not loaded)
+
+        Parameter name: the file name of the effect
+        Precondition: name is one of the effects of this bank
+        """
+        i = self._index[name]
+        if not self._voices[i]:
+            self._voices[i] = [Sound(name) for _ in range(self._counts[i])]
+
+    def play(self, name):
+        """
+        Returns: Nothing
+
+        This method asks for an effect to be played at the next flush
+
+        Parameter name: the file name of the effect
+        Precondition: name is one of the effects of this bank
+        """
+        self._asked[self._index[name]] = 1
+
+    def flush(self):
+        """
+        Returns: Nothing
+
+        This method plays (once) every effect asked for since the last flush
+        """
+        for i in range(len(self._asked)):
+            if self._asked[i]:
+                self._asked[i] = 0
+                voices = self._voices[i]
+                if not voices:
+                    continue
+                # The voice may still be playing, so restart it
+                voice = voices[self._next[i]]
+                voice.stop()
+                voice.play()
+                self._next[i] = (self._next[i] + 1) % len(voices)
+
+    def cancel(self):
+        """
+        Returns: Nothing
+
+        This method forgets every effect asked for since the last flush
+        """
+        for i in range(len(self._asked)):
+            self._asked[i] = 0
+
+
+class TextureCache(object):
+    """
+    A class to share the decoded images of the game.
+
+    An image is decoded (read from its file) the first time it is acquired.
+    After that, every acquire of the same file returns the same texture, so
+    a wave of 60 aliens decodes each of its images only once, and so does
+    every wave after it.
+
+    Every acquire has to be matched by a release. An image that nobody holds
+    anymore is not thrown away right away: the cache keeps the last capacity
+    of them (a restart acquires them again soon after), and only forgets the
+    one unused for the longest when there are more.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _capacity: the most unused textures to keep
+    # Invariant: _capacity is an int >= 0
+    #
+    # Attribute _textures: the decoded images, by file name
+    # Invariant: _textures is a dict mapping strings to Kivy Textures
+    #
+    # Attribute _refs: the number of holders of every texture
+    # Invariant: _refs is a dict with the same keys as _textures, mapping
+    # them to ints >= 0
+    #
+    # Attribute _unused: the textures with no holders, oldest first
+    # Invariant: _unused is a list of the keys of _refs that map to 0, with
+    # at most _capacity elements
+    #
+    # Attribute _loads: the number of images decoded so far
+    # Invariant: _loads is an int >= 0
+
+    def getCapacity(self):
+        """
+        Returns: the most unused textures this cache keeps
+        """
+        return self._capacity
+
+    def getLoads(self):
+        """
+        Returns: the number of images decoded by this cache so far
+        """
+        return self._loads
+
+    def getReferences(self, name):
+        """
+        Returns: the number of holders of an image (0 if it is not cached)
+
+        Parameter name: the file name of the image
+        Precondition: name is a string
+        """
+        return self._refs.get(name, 0)
+
+    def isCached(self, name):
+        """
+        Returns: True if the image is decoded and kept, False otherwise
+
+        Parameter name: the file name of the image
+        Precondition: name is a string
+        """
+        return name in self._textures
+
+    def __init__(self, capacity=TEXTURE_CACHE_SIZE):
+        """
+        Initializes an empty cache.
+
+        Parameter capacity: the most unused textures to keep
+        Precondition: capacity is an int >= 0
+        """
+        if VALIDATION >= VALIDATE_BOUNDARY:
+            assert isinstance(capacity, int) and capacity >= 0, \
+                "capacity is not an int >= 0"
+        self._capacity = capacity
+        self._textures = {}
+        self._refs = {}
+        self._unused = []
+        self._loads = 0
+
+    def acquire(self, name):
+        """
+        Returns: the texture of an image, decoding it if it is not cached
+
+        Parameter name: the file name of the image
+        Precondition: name is a file in the Images folder
+        """
+        texture = self._textures.get(name)
+        if texture is None:
+            texture = CoreImage(os.path.join(IMAGE_FOLDER, name)).texture
+            self._textures[name] = texture
+            self._refs[name] = 0
+            self._loads += 1
+        elif self._refs[name] == 0:
+            self._unused.remove(name)
+        self._refs[name] += 1
+        return texture
+
+    def preload(self, name):
+        """
+        Returns: Nothing
+
+        This method decodes an image ahead of time, so that the first acquire
+        of it costs nothing. Nobody holds the image after this, so it is kept
+        like any unused image (up to the capacity of the cache).
+
+        Parameter name: the file name of the image
+        Precondition: name is a file in the Images folder
+        """
+        self.acquire(name)
+        self.release(name)
+
+    def release(self, name):
+        """
+        Returns: Nothing
+
+        This method gives back a texture acquired before. When nobody holds
+        it anymore it becomes unused, and the oldest unused textures past the
+        capacity are forgotten.
+
+        Parameter name: the file name of the image
+        Precondition: name was acquired more times than it was released
+        """
+        if VALIDATION >= VALIDATE_FULL:
+            assert self._refs.get(name, 0) > 0, name + " is not held"
+        self._refs[name] -= 1
+        if self._refs[name] == 0:
+            self._unused.append(name)
+            while len(self._unused) > self._capacity:
+                old = self._unused.pop(0)
+                del self._textures[old]
+                del self._refs[old]
+
+
+class AssetLoader(object):
+    """
+    A class to load the assets of the game a little at a time.
+
+    Every asset is a job: a function to call (with its arguments), added with
+    add. Method step runs the jobs in the order they were added, until it has
+    taken more than a number of seconds, so that it can be called every frame
+    without making the frame late. Method finish runs all the jobs left (when
+    an asset is needed right away).
+
+    A job that takes longer than the seconds given still runs whole: a single
+    asset cannot be split.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _jobs: the jobs added, in order
+    # Invariant: _jobs is a list of (name, function, arguments) tuples, where
+    # name is a string and arguments is a tuple
+    #
+    # Attribute _done: the number of jobs run
+    # Invariant: _done is an int in 0..len(_jobs)
+    #
+    # Attribute _seconds: the time (in seconds) spent running the jobs
+    # Invariant: _seconds is a float >= 0
+
+    def isDone(self):
+        """
+        Returns: True if every job was run, False otherwise
+        """
+        return self._done == len(self._jobs)
+
+    def getProgress(self):
+        """
+        Returns: the fraction (0..1) of the jobs that were run (1 if there
+        are no jobs)
+        """
+        return self._done / len(self._jobs) if self._jobs else 1.0
+
+    def getSeconds(self):
+        """
+        Returns: the time (in seconds) spent running the jobs so far
+        """
+        return self._seconds
+
+    def __init__(self):
+        """
+        Initializes a loader with no jobs.
+        """
+        self._jobs = []
+        self._done = 0
+        self._seconds = 0.0
+
+    def add(self, name, function, *arguments):
+        """
+        Returns: Nothing
+
+        This method adds a job, to be run after every job added before it
+
+        Parameter name: the name of the job (for reports)
+        Precondition: name is a string
+
+        Parameter function: the function that loads the asset
+        Precondition: function is callable with the given arguments
+        """
+        if VALIDATION >= VALIDATE_BOUNDARY:
+            assert isinstance(name, str), "name is not a string"
+            assert callable(function), "function is not callable"
+        self._jobs.append((name, function, arguments))
+
+    def step(self, seconds=ASSET_FRAME_BUDGET):
+        """
+        Returns: True if every job was run, False otherwise
+
+        This method runs jobs until they have taken more than the given
+        seconds, or there are none left. It runs at least one job (if any
+        are left).
+
+        Parameter seconds: the time the jobs may take
+        Precondition: seconds is a number >= 0
+        """
+        start = time.perf_counter()
+        now = start
+        while self._done < len(self._jobs) and now - start <= seconds:
+            name, function, arguments = self._jobs[self._done]
+            function(*arguments)
+            self._done += 1
+            now = time.perf_counter()
+        self._seconds += now - start
+        return self.isDone()
+
+    def finish(self):
+        """
+        Returns: Nothing
+
+        This method runs every job left
+        """
+        self.step(float('inf'))
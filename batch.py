@@ -0,0 +1,336 @@
+"""
+Batch module for Alien Invaders
+
+This module plays many seeded, headless games of Alien Invaders at once, to
+tune the settings of a wave (like ALIEN_SPEED, BOLT_RATE and SHIP_LIVES)
+without playing by hand. Every game is a single wave played on a Simulation
+by a pilot (see PILOTS), with the lives handled like Invaders does: a
+destroyed ship costs a life, the bolts are cleared and play continues.
+
+The games are spread over a multiprocessing pool, one game per task. A game
+needs nothing but its settings and seed, and sends back a small dict, so
+the workers never wait on each other and the run scales with the number of
+cores. The results are combined into a single report:
+
+    python batch.py --games 2000 --speed 0.8 --rate 4 --lives 3
+
+Add --json FILE to also write the report as JSON. Every game is seeded
+(--seed is the seed of the first game), so a run can be repeated exactly.
+"""
+from consts import *
+from simulation import Simulation
+from perf import autopilot
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+
+def sweepPilot(sim, tick):
+    """
+    Returns: the input of a scripted pilot for one tick, as a pair (the
+    direction or None, whether to fire)
+
+    The ship sweeps from one side of the screen to the other (and back, see
+    perf.autopilot), and fires whenever it can.
+
+    Parameter sim: the simulation to control
+    Precondition: sim is a Simulation object
+
+    Parameter tick: the number of the tick being played
+    Precondition: tick is an int >= 0
+    """
+    return autopilot(tick), True
+
+
+def botPilot(sim, tick):
+    """
+    Returns: the input of a simple bot for one tick, as a pair (the
+    direction or None, whether to fire)
+
+    The bot moves out of the way of any alien bolt falling on the ship.
+    Otherwise it moves under the nearest column with a living alien, and
+    fires once it is under it.
+
+    Parameter sim: the simulation to control
+    Precondition: sim is a Simulation object
+
+    Parameter tick: the number of the tick being played
+    Precondition: tick is an int >= 0
+    """
+    ship = sim.getShip()
+    if ship is None:
+        return None, False
+    x = ship.getX()
+    pool = sim.getBolts()
+    for i in range(pool.getAlienCount()):
+        bolt = pool.getAlienBolt(i)
+        if (abs(bolt.getX() - x) < SHIP_WIDTH and
+                bolt.getY() - ship.getY() < 4 * SHIP_HEIGHT):
+            if bolt.getX() > x and x > SHIP_WIDTH:
+                return "left", False
+            if x < GAME_WIDTH - SHIP_WIDTH:
+                return "right", False
+            return "left", False
+    formation = sim.getFormation()
+    target = None
+    for i in range(formation.countLiveColumns()):
+        col = formation.getX(formation.getLiveColumn(i))
+        if target is None or abs(col - x) < abs(target - x):
+            target = col
+    if target is None:
+        return None, False
+    if target > x + SHIP_MOVEMENT:
+        return "right", False
+    if target < x - SHIP_MOVEMENT:
+        return "left", False
+    return None, True
+
+
+# The pilots a game can be played by, by name
+PILOTS = {'sweep': sweepPilot, 'bot': botPilot}
+
+
+def playGame(task):
+    """
+    Returns: the result of one game, as a dict
+
+    The dict has the seed, whether the game was won, lost or did not
+    finish (its outcome), the number of ticks it lasted, the shots fired,
+    the aliens destroyed, the lives left, and the total and largest time
+    (in seconds) of a tick.
+
+    Parameter task: the game to play, as a dict with the keys seed, rows,
+    cols, speed, rate, lives, pilot and ticks (the most ticks to play)
+    Precondition: task is a dict with those keys, pilot is a key of PILOTS
+    """
+    pilot = PILOTS[task['pilot']]
+    sim = Simulation(task['rows'], task['cols'], GAME_WIDTH / 2,
+                     DEFENSE_LINE, SHIP_LIVES, task['seed'], task['speed'],
+                     task['rate'])
+    lives = task['lives']
+    shots = 0
+    kills = 0
+    total = 0.0
+    worst = 0.0
+    tick = 0
+    while tick < task['ticks'] and sim.getGameState() in (0, 3):
+        if sim.getGameState() == 3:
+            # Like Invaders: the ship costs a life, and play continues
+            lives -= 1
+            if lives == 0:
+                break
+            sim.clearBolts()
+            sim.setGameState(0)
+        direction, fire = pilot(sim, tick)
+        start = time.perf_counter()
+        sim.step(direction, fire)
+        elapsed = time.perf_counter() - start
+        total += elapsed
+        if elapsed > worst:
+            worst = elapsed
+        for event in sim.getEvents():
+            if event == EVENT_PLAYER_BOLT:
+                shots += 1
+            elif event == EVENT_ALIEN_HIT:
+                kills += 1
+        sim.clearEvents()
+        tick += 1
+    if sim.getGameState() == 1:
+        outcome = 'won'
+    elif lives == 0 or sim.getGameState() == 2:
+        outcome = 'lost'
+    else:
+        outcome = 'unfinished'
+    return {'seed': task['seed'], 'outcome': outcome, 'ticks': tick,
+            'shots': shots, 'kills': kills, 'lives': lives,
+            'seconds': total, 'worst': worst}
+
+
+def runBatch(games=BATCH_GAMES, seed=0, workers=None, rows=ALIEN_ROWS,
+             cols=ALIENS_IN_ROW, speed=ALIEN_SPEED, rate=BOLT_RATE,
+             lives=SHIP_LIVES, pilot='bot', ticks=BATCH_MAX_TICKS):
+    """
+    Returns: the results of every game (see playGame), in the order of
+    their seeds
+
+    Game i is played with seed seed+i. The games are played by a pool of
+    worker processes, one game per task (or in this process, if workers
+    is 1).
+
+    Parameter games: the number of games
+    Precondition: games is an int > 0
+
+    Parameter seed: the seed of the first game
+    Precondition: seed is an int >= 0, and seed+games-1 < 2**64
+
+    Parameter workers: the number of worker processes
+    Precondition: workers is an int > 0, or None (one per core)
+
+    Parameter rows: how many rows of aliens
+    Precondition: rows is an int > 0
+
+    Parameter cols: how many aliens in a row
+    Precondition: cols is an int > 0
+
+    Parameter speed: the number of seconds between alien steps
+    Precondition: speed is a number > 0
+
+    Parameter rate: the most alien steps between two alien bolts
+    Precondition: rate is an int > 0
+
+    Parameter lives: the number of lives of the player
+    Precondition: lives is an int > 0
+
+    Parameter pilot: who plays the games
+    Precondition: pilot is a key of PILOTS
+
+    Parameter ticks: the most ticks a game may last
+    Precondition: ticks is an int > 0
+    """
+    assert pilot in PILOTS, "pilot is not one of " + ', '.join(PILOTS)
+    tasks = [{'seed': seed + i, 'rows': rows, 'cols': cols,
+              'speed': float(speed), 'rate': rate, 'lives': lives,
+              'pilot': pilot, 'ticks': ticks} for i in range(games)]
+    if workers == 1:
+        return [playGame(task) for task in tasks]
+    with multiprocessing.Pool(workers) as pool:
+        results = list(pool.imap_unordered(playGame, tasks, chunksize=1))
+    results.sort(key=lambda result: result['seed'])
+    return results
+
+
+def percentile(values, percent):
+    """
+    Returns: the value that percent of the values are at most (the nearest
+    rank), or 0 if there are none
+
+    Parameter values: the values
+    Precondition: values is a list of numbers
+
+    Parameter percent: the percentile
+    Precondition: percent is a number in 0..100
+    """
+    if not values:
+        return 0
+    ordered = sorted(values)
+    rank = max(0, -(-percent * len(ordered) // 100) - 1)
+    return ordered[int(rank)]
+
+
+def summarize(results):
+    """
+    Returns: the report of a batch of games, as a dict (that can be
+    written as JSON)
+
+    The report has the number of games and the rate of every outcome, the
+    length of the games (in seconds of play) that were won or lost, the
+    shots fired and how many of them hit, and the cost of a tick (in
+    microseconds): the mean over all ticks, the p50, p95 and p99 over the
+    mean of every game, and the worst tick of all.
+
+    Parameter results: the results of the games
+    Precondition: results is a non-empty list of dicts made by playGame
+    """
+    games = len(results)
+    outcomes = {}
+    for outcome in ('won', 'lost', 'unfinished'):
+        outcomes[outcome] = sum(1 for result in results
+                                if result['outcome'] == outcome) / games
+    finished = [result['ticks'] / TICK_RATE for result in results
+                if result['outcome'] != 'unfinished']
+    shots = sum(result['shots'] for result in results)
+    kills = sum(result['kills'] for result in results)
+    ticks = sum(result['ticks'] for result in results)
+    means = [result['seconds'] / result['ticks'] * 1e6 for result in results
+             if result['ticks'] > 0]
+    return {
+        'games': games,
+        'outcomes': outcomes,
+        'duration': {'mean': sum(finished) / max(len(finished), 1),
+                     'p50': percentile(finished, 50),
+                     'p95': percentile(finished, 95)},
+        'shots': {'mean': shots / games,
+                  'accuracy': kills / shots if shots else 0.0},
+        'tick': {'mean': sum(result['seconds'] for result in results) /
+                 max(ticks, 1) * 1e6,
+                 'p50': percentile(means, 50), 'p95': percentile(means, 95),
+                 'p99': percentile(means, 99),
+                 'worst': max(result['worst'] for result in results) * 1e6}}
+
+
+def printReport(report, out=sys.stdout):
+    """
+    Returns: Nothing
+
+    This function prints a report (see summarize) as text
+
+    Parameter report: the report
+    Precondition: report is a dict made by summarize
+
+    Parameter out: where to print it
+    Precondition: out is a file open for writing
+    """
+    outcomes = report['outcomes']
+    print('games      %d' % report['games'], file=out)
+    print('won        %.1f%%  lost %.1f%%  unfinished %.1f%%' %
+          (outcomes['won'] * 100, outcomes['lost'] * 100,
+           outcomes['unfinished'] * 100), file=out)
+    duration = report['duration']
+    print('duration   mean %.1f s  p50 %.1f s  p95 %.1f s' %
+          (duration['mean'], duration['p50'], duration['p95']), file=out)
+    print('shots      mean %.1f  accuracy %.1f%%' %
+          (report['shots']['mean'], report['shots']['accuracy'] * 100),
+          file=out)
+    tick = report['tick']
+    print('tick       mean %.2f us  p50 %.2f  p95 %.2f  p99 %.2f  worst '
+          '%.2f us' % (tick['mean'], tick['p50'], tick['p95'], tick['p99'],
+                       tick['worst']), file=out)
+
+
+# Script code
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Play many headless games '
+                                     'at once and report how they went.')
+    parser.add_argument('--games', type=int, default=BATCH_GAMES,
+                        help='the number of games (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='the seed of the first game')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='the number of processes (default: one per '
+                        'core)')
+    parser.add_argument('--rows', type=int, default=ALIEN_ROWS)
+    parser.add_argument('--cols', type=int, default=ALIENS_IN_ROW)
+    parser.add_argument('--speed', type=float, default=ALIEN_SPEED,
+                        help='seconds between alien steps (ALIEN_SPEED)')
+    parser.add_argument('--rate', type=int, default=BOLT_RATE,
+                        help='most steps between alien bolts (BOLT_RATE)')
+    parser.add_argument('--lives', type=int, default=SHIP_LIVES,
+                        help='lives of the player (SHIP_LIVES)')
+    parser.add_argument('--pilot', choices=sorted(PILOTS), default='bot')
+    parser.add_argument('--ticks', type=int, default=BATCH_MAX_TICKS,
+                        help='most ticks in a game (default: %(default)s)')
+    parser.add_argument('--json', default=None,
+                        help='also write the report to this file')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = runBatch(args.games, args.seed, args.workers, args.rows,
+                       args.cols, args.speed, args.rate, args.lives,
+                       args.pilot, args.ticks)
+    elapsed = time.perf_counter() - start
+    report = summarize(results)
+    report['settings'] = {'rows': args.rows, 'cols': args.cols,
+                          'speed': args.speed, 'rate': args.rate,
+                          'lives': args.lives, 'pilot': args.pilot}
+    report['run'] = {'seconds': elapsed, 'games per second':
+                     args.games / elapsed,
+                     'workers': args.workers or os.cpu_count()}
+    printReport(report)
+    print('run        %.1f s, %.1f games/s on %d processes' %
+          (elapsed, args.games / elapsed, report['run']['workers']))
+    if args.json is not None:
+        with open(args.json, 'w') as file:
+            json.dump(report, file, indent=1, sort_keys=True)
@@ -0,0 +1,700 @@
+"""
+Benchmark module for Alien Invaders
+
+This module times the hot paths of a wave: a whole tick (what
+Wave.updateAliens runs every tick), moving the bolts, checking a bolt against
+the aliens, firing an alien bolt and making the aliens, and with Kivy a frame
+of Wave.updateAliens and of Wave.draw. Every path is timed for formations
+from the default 5x12 up to far past the limits of consts.py, and (where it
+matters) for different numbers of bolts on screen, so that it is easy to see
+which path gets slow first as the waves get bigger.
+
+The simulation paths are timed on a headless Simulation that is put back in
+the same state (see Simulation.restore) before every batch of calls, so that
+every batch does the same work. A path is timed in batches until they took
+BENCH_WINDOW seconds in all, however fast it is, and its time in a pass is
+the median time per call of those batches. Its time in a run is the best of
+several passes, and how much the passes differ is its spread. As the passes
+are spread out in time, a machine that is busy for a moment only slows down
+one of them.
+
+To time everything and save the times as the baseline (BENCH_BASELINE):
+
+    python bench.py --save
+
+After that, running it without --save compares the times to the baseline,
+and exits with an error if a path got slower than it may: BENCH_THRESHOLD,
+or BENCH_SPREAD times its spread (in the baseline or in this run) if that is
+more. The baseline only means something on the machine it was saved on.
+
+Wave.updateAliens and Wave.draw need Kivy. Without it the run is incomplete:
+it says so and exits with the status EXIT_INCOMPLETE, unless --headless
+asks for the simulation paths alone.
+
+With --stress, it only checks that a frame of the largest wave of stress
+mode (STRESS_MAX_ROWS x STRESS_MAX_COLS aliens), drawing included, fits in a
+frame at STRESS_TARGET_FPS. Without Kivy that cannot be checked, so it exits
+with the status EXIT_INCOMPLETE.
+"""
+from consts import *
+from simulation import Simulation, BoltBody
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+# The formation sizes to time, as (rows, columns)
+SIZES = ((5, 12), (10, 15), (25, 40), (50, 100), (100, 200))
+
+# The formation sizes to time with --quick
+QUICK_SIZES = ((5, 12), (10, 15), (25, 40))
+
+# The numbers of alien bolts on screen to time (at most ALIEN_BOLT_CAPACITY)
+BOLTS = (0, 8, ALIEN_BOLT_CAPACITY)
+
+# The number of calls in a batch (the state is put back between batches)
+BATCH = 20
+
+# The fewest batches of every path in a pass, however slow it is
+MIN_BATCHES = 5
+
+# The number of passes over all of the paths (the best time of all passes
+# counts)
+PASSES = 4
+
+# The exit status of a run that could not time every path (without Kivy)
+EXIT_INCOMPLETE = 3
+
+
+def makeWave(rows, cols, bolts):
+    """
+    Returns: a new Simulation with bolts on screen
+
+    The alien bolts are spread over the screen, high enough that none of
+    them leaves it during a batch. There is a player bolt for every alien
+    bolt (up to PLAYER_BOLT_CAPACITY), below the aliens.
+
+    Parameter rows: the number of rows of aliens
+    Precondition: rows is an int > 0
+
+    Parameter cols: the number of aliens in a row
+    Precondition: cols is an int > 0
+
+    Parameter bolts: the number of alien bolts
+    Precondition: bolts is an int in 0..ALIEN_BOLT_CAPACITY
+    """
+    sim = Simulation(rows, cols, GAME_WIDTH / 2, DEFENSE_LINE, SHIP_LIVES, 0)
+    for i in range(bolts):
+        x = (i + 0.5) * GAME_WIDTH / bolts
+        sim.addBolt(x, GAME_HEIGHT / 2 + i % 8 * 20, False)
+    for i in range(min(bolts, PLAYER_BOLT_CAPACITY)):
+        x = (i + 0.5) * GAME_WIDTH / PLAYER_BOLT_CAPACITY
+        sim.addBolt(x, SHIP_BOTTOM + SHIP_HEIGHT, True)
+    return sim
+
+
+def timeBatches(call, batch=BATCH, window=BENCH_WINDOW, prepare=None):
+    """
+    Returns: the median time (in seconds) of a call, over batches of calls
+
+    Batches are timed until they took window seconds in all (and there are
+    at least MIN_BATCHES of them), so a path that takes well under a
+    microsecond is timed as long as a slow one. The median is not moved by
+    the few batches a busy machine slows down.
+
+    Parameter call: the call to time
+    Precondition: call is a function with no parameters
+
+    Parameter batch: the number of calls in a batch
+    Precondition: batch is an int > 0
+
+    Parameter window: the least time to time the batches for, in seconds
+    Precondition: window is a number >= 0
+
+    Parameter prepare: what to do (untimed) before every batch
+    Precondition: prepare is a function with no parameters, or None
+    """
+    times = []
+    total = 0.0
+    while total < window or len(times) < MIN_BATCHES:
+        if prepare is not None:
+            prepare()
+        start = time.perf_counter()
+        for _ in range(batch):
+            call()
+        elapsed = time.perf_counter() - start
+        total += elapsed
+        times.append(elapsed / batch)
+    times.sort()
+    return times[len(times) // 2]
+
+
+def timeCalls(sim, call, batch=BATCH):
+    """
+    Returns: the median time (in seconds) of a call (see timeBatches)
+
+    The simulation is put back in the state it is in now before every batch.
+
+    Parameter sim: the simulation the calls work on
+    Precondition: sim is a Simulation object
+
+    Parameter call: the call to time
+    Precondition: call is a function with no parameters
+
+    Parameter batch: the number of calls in a batch
+    Precondition: batch is an int > 0
+    """
+    snapshot = sim.snapshot()
+    seconds = timeBatches(call, batch,
+                          prepare=lambda: sim.restore(snapshot))
+    sim.restore(snapshot)
+    return seconds
+
+
+def calibrate():
+    """
+    Returns: the median time (in seconds) of a fixed piece of plain Python
+    work (see timeBatches)
+
+    The times of the benchmarks are compared to the baseline relative to
+    this time, so that a machine that is slower (or busier) as a whole is not
+    taken for a regression.
+    """
+    def work():
+        total = 0
+        values = [0.5] * 8
+        for i in range(1000):
+            values[i % 8] = values[(i + 3) % 8] * 0.5 + i
+            total += values[i % 8]
+    return timeBatches(work, batch=1)
+
+
+def benchTick(sim):
+    """
+    Returns: the time of a tick of the simulation (Wave.updateAliens)
+
+    Parameter sim: the simulation to time
+    Precondition: sim is a Simulation object
+    """
+    return timeCalls(sim, sim.tick)
+
+
+def benchMoveBolt(sim):
+    """
+    Returns: the time of moving every bolt (and checking its collisions)
+
+    Parameter sim: the simulation to time
+    Precondition: sim is a Simulation object
+    """
+    return timeCalls(sim, sim.moveBolt)
+
+
+def benchCollideAliens(sim):
+    """
+    Returns: the time of checking a bolt against the aliens
+
+    The bolts checked are at the centers of aliens spread over the whole
+    formation, so most of the checks are hits.
+
+    Parameter sim: the simulation to time
+    Precondition: sim is a Simulation object
+    """
+    formation = sim.getFormation()
+    rows = formation.getRows()
+    cols = formation.getCols()
+    targets = []
+    for i in range(BATCH):
+        row = i * 7 % rows
+        col = i * 13 % cols
+        targets.append(BoltBody(formation.getX(col), formation.getY(row),
+                                True))
+    position = [0]
+
+    def call():
+        sim.collideAliens(targets[position[0] % BATCH])
+        position[0] += 1
+    return timeCalls(sim, call)
+
+
+def benchAlienBolt(sim):
+    """
+    Returns: the time of picking an alien and firing a bolt from it
+
+    Parameter sim: the simulation to time
+    Precondition: sim is a Simulation object
+    """
+    def call():
+        sim.fireAlienBolt()
+        sim.clearEvents()
+    return timeCalls(sim, call)
+
+
+def benchMakeAliens(sim):
+    """
+    Returns: the time of making the formation of the simulation again
+
+    Parameter sim: the simulation to time
+    Precondition: sim is a Simulation object
+    """
+    formation = sim.getFormation()
+    rows = formation.getRows()
+    cols = formation.getCols()
+    return timeCalls(sim, lambda: sim.makeAliens(rows, cols), batch=2)
+
+
+# The paths to time: their names, functions, and whether the number of bolts
+# on screen matters to them
+BENCHMARKS = (('tick', benchTick, True),
+              ('moveBolt', benchMoveBolt, True),
+              ('collideAliens', benchCollideAliens, False),
+              ('alienBolt', benchAlienBolt, False),
+              ('makeAliens', benchMakeAliens, False))
+
+
+class NullView(object):
+    """
+    A view that does not draw anything.
+    """
+    def draw(self, cmd):
+        """
+        Returns: Nothing
+
+        Parameter cmd: the instructions to (not) draw
+        Precondition: cmd is a Kivy graphics instruction
+        """
+        pass
+
+
+def canView():
+    """
+    Returns: True if a Wave can be made here (Kivy is installed), False
+    otherwise
+    """
+    try:
+        import wave
+        import render
+    except ImportError:
+        return False
+    return True
+
+
+def makeView(rows, cols, bolts):
+    """
+    Returns: a new Wave (drawn as a batch, with a TextureAtlas) with alien
+    bolts on screen
+
+    Parameter rows: the number of rows of aliens
+    Precondition: rows is an int > 0
+
+    Parameter cols: the number of aliens in a row
+    Precondition: cols is an int > 0
+
+    Parameter bolts: the number of alien bolts
+    Precondition: bolts is an int in 0..ALIEN_BOLT_CAPACITY, and canView()
+    """
+    from wave import Wave
+    from render import TextureAtlas
+    wave = Wave(rows, cols, GAME_WIDTH / 2, DEFENSE_LINE, SHIP_LIVES,
+                sound=False, atlas=TextureAtlas(), seed=0)
+    for i in range(bolts):
+        wave.addBolt((i + 0.5) * GAME_WIDTH / bolts, GAME_HEIGHT / 2, False)
+    return wave
+
+
+def benchUpdate(rows, cols):
+    """
+    Returns: the time of a frame of one tick of a wave (Wave.updateAliens),
+    or None if it cannot be timed here (without Kivy)
+
+    The wave is played with no input. Unlike the paths of the simulation,
+    it is not put back between batches: a ship that is destroyed comes back
+    right away, and a wave that is over is made again (outside the timing).
+
+    Parameter rows: the number of rows of aliens
+    Precondition: rows is an int > 0
+
+    Parameter cols: the number of aliens in a row
+    Precondition: cols is an int > 0
+    """
+    if not canView():
+        return None
+    waves = [makeView(rows, cols, 0)]
+
+    def prepare():
+        state = waves[0].getGameState()
+        if state == 1 or state == 2:
+            waves[0].dispose()
+            waves[0] = makeView(rows, cols, 0)
+        elif state == 3:
+            waves[0].clearBolts()
+            waves[0].setGameState(0)
+
+    def call():
+        waves[0].updateAliens(1 / TICK_RATE)
+    seconds = timeBatches(call, prepare=prepare)
+    waves[0].dispose()
+    return seconds
+
+
+def benchDraw(rows, cols, bolts):
+    """
+    Returns: the time of drawing a wave (Wave.draw), or None if it cannot be
+    timed here (without Kivy)
+
+    The wave is drawn as a batch (with a TextureAtlas) to a view that
+    throws the drawing away, so this is the time it takes to prepare a
+    frame. Only a missing Kivy makes it None: any other error (like one of
+    the drawing code) is not caught.
+
+    Parameter rows: the number of rows of aliens
+    Precondition: rows is an int > 0
+
+    Parameter cols: the number of aliens in a row
+    Precondition: cols is an int > 0
+
+    Parameter bolts: the number of alien bolts
+    Precondition: bolts is an int in 0..ALIEN_BOLT_CAPACITY
+    """
+    if not canView():
+        return None
+    wave = makeView(rows, cols, bolts)
+    view = NullView()
+    seconds = timeBatches(lambda: wave.draw(view))
+    wave.dispose()
+    return seconds
+
+
+def checkStress(rows=STRESS_MAX_ROWS, cols=STRESS_MAX_COLS):
+    """
+    Returns: the time of a frame of the largest stress mode wave, the time
+    a frame may take to hold STRESS_TARGET_FPS (both in seconds), and
+    whether drawing was timed, as a triple
+
+    A frame is as many ticks as run between two frames at that rate (with
+    every alien bolt on screen) plus drawing the wave, if that can be timed
+    here (see benchDraw). If it cannot, the time is of the ticks alone, and
+    the check says nothing about holding the frame rate.
+
+    Parameter rows: the number of rows of aliens
+    Precondition: rows is an int > 0
+
+    Parameter cols: the number of aliens in a row
+    Precondition: cols is an int > 0
+    """
+    sim = makeWave(rows, cols, ALIEN_BOLT_CAPACITY)
+    ticks = max(1, round(TICK_RATE / STRESS_TARGET_FPS))
+    seconds = benchTick(sim) * ticks
+    draw = benchDraw(rows, cols, ALIEN_BOLT_CAPACITY)
+    if draw is not None:
+        seconds += draw
+    return seconds, 1 / STRESS_TARGET_FPS, draw is not None
+
+
+def runPass(sizes=SIZES, bolts=BOLTS, headless=False):
+    """
+    Returns: the time of every benchmark in one pass, as a dict
+
+    The keys of the dict are "path/ROWSxCOLS/BOLTS" strings, and the values
+    are seconds per call. Paths that could not be timed are left out. The
+    key "calibrate" holds the time of calibrate().
+
+    Parameter sizes: the formation sizes to time
+    Precondition: sizes is a tuple of (rows, columns) pairs of ints > 0
+
+    Parameter bolts: the numbers of alien bolts to time
+    Precondition: bolts is a tuple of ints in 0..ALIEN_BOLT_CAPACITY
+
+    Parameter headless: whether to leave out the paths of Wave
+    Precondition: headless is a bool
+    """
+    results = {'calibrate': calibrate()}
+    for rows, cols in sizes:
+        size = '/' + str(rows) + 'x' + str(cols) + '/'
+        for count in bolts:
+            sim = makeWave(rows, cols, count)
+            for name, bench, byBolts in BENCHMARKS:
+                if byBolts or count == bolts[0]:
+                    results[name + size + str(count if byBolts else 0)] = \
+                        bench(sim)
+            if not headless:
+                seconds = benchDraw(rows, cols, count)
+                if seconds is not None:
+                    results['draw' + size + str(count)] = seconds
+        if not headless:
+            seconds = benchUpdate(rows, cols)
+            if seconds is not None:
+                results['updateAliens' + size + '0'] = seconds
+    return results
+
+
+def runAll(sizes=SIZES, bolts=BOLTS, passes=PASSES, headless=False,
+           out=None):
+    """
+    Returns: the best time of every benchmark over all of the passes, and
+    its spread, as a pair of dicts
+
+    Both dicts are keyed like the one made by runPass. The spread of a
+    benchmark is how much its slowest pass was slower than its fastest one,
+    as a fraction of the fastest.
+
+    Parameter sizes: the formation sizes to time
+    Precondition: sizes is a tuple of (rows, columns) pairs of ints > 0
+
+    Parameter bolts: the numbers of alien bolts to time
+    Precondition: bolts is a tuple of ints in 0..ALIEN_BOLT_CAPACITY
+
+    Parameter passes: the number of passes
+    Precondition: passes is an int > 0
+
+    Parameter headless: whether to leave out the paths of Wave
+    Precondition: headless is a bool
+
+    Parameter out: where to print every time once all passes are done
+    Precondition: out is a file open for writing, or None (print nothing)
+    """
+    results = {}
+    worst = {}
+    for _ in range(passes):
+        for key, seconds in runPass(sizes, bolts, headless).items():
+            if key not in results or seconds < results[key]:
+                results[key] = seconds
+            if key not in worst or seconds > worst[key]:
+                worst[key] = seconds
+    spreads = {}
+    for key in results:
+        spreads[key] = worst[key] / results[key] - 1 if results[key] else 0.0
+    if out is not None:
+        for key in results:
+            print('%-28s %12.2f us  spread %3.0f%%' %
+                  (key, results[key] * 1e6, spreads[key] * 100), file=out)
+    return results, spreads
+
+
+def timeKey(key):
+    """
+    Returns: the time of one benchmark, or None if it cannot be timed here
+
+    Parameter key: the benchmark to time
+    Precondition: key is a key of a dict made by runPass
+    """
+    if key == 'calibrate':
+        return calibrate()
+    name, size, count = key.split('/')
+    rows, cols = [int(part) for part in size.split('x')]
+    if name == 'draw':
+        return benchDraw(rows, cols, int(count))
+    if name == 'updateAliens':
+        return benchUpdate(rows, cols)
+    for other, bench, byBolts in BENCHMARKS:
+        if other == name:
+            return bench(makeWave(rows, cols, int(count)))
+    return None
+
+
+def confirm(results, baseline, threshold=BENCH_THRESHOLD, spreads=None,
+            retries=BENCH_RETRIES):
+    """
+    Returns: the benchmarks that are still slower than the baseline allows
+    after timing them again, in the form returned by compare
+
+    A busy machine can make any path look slower for a moment. Every path
+    that compare finds slower is timed again up to retries times, keeping
+    the best times, and only counts as slower if it never catches up. As the
+    machine may have slowed down since the run was calibrated, it is
+    calibrated again right before every path is timed again, and the new
+    time is scaled to the calibration of the run. This changes results.
+
+    Parameter results: the times just measured
+    Precondition: results is a dict made by runAll
+
+    Parameter baseline: the times to compare to
+    Precondition: baseline is a dict made by runAll
+
+    Parameter threshold: how much slower (as a fraction) a benchmark may
+    always be
+    Precondition: threshold is a number >= 0
+
+    Parameter spreads: the spread of every benchmark (see compare)
+    Precondition: spreads is a dict of numbers >= 0 keyed like results, or
+    None
+
+    Parameter retries: the number of times to time a slower path again
+    Precondition: retries is an int >= 0
+    """
+    slower = compare(results, baseline, threshold, spreads)
+    for _ in range(retries):
+        if not slower:
+            break
+        for key, seconds, expected, allowed in slower:
+            scale = results['calibrate'] / calibrate()
+            seconds = timeKey(key)
+            if seconds is not None and seconds * scale < results[key]:
+                results[key] = seconds * scale
+        slower = compare(results, baseline, threshold, spreads)
+    return slower
+
+
+def compare(results, baseline, threshold=BENCH_THRESHOLD, spreads=None):
+    """
+    Returns: the benchmarks that got slower than the baseline allows, as a
+    list of (key, seconds, scaled baseline seconds, slowdown allowed) tuples
+
+    A benchmark may be threshold slower than its baseline, or BENCH_SPREAD
+    times its spread if that is more: a path whose passes differ by 20% on
+    this machine is not slower until it is well past that.
+
+    Benchmarks that are not in both results and baseline are ignored. If
+    both have a "calibrate" time, the baseline times are scaled by how much
+    slower or faster this run's calibration was.
+
+    Parameter results: the times just measured
+    Precondition: results is a dict made by runAll
+
+    Parameter baseline: the times to compare to
+    Precondition: baseline is a dict made by runAll
+
+    Parameter threshold: how much slower (as a fraction) a benchmark may
+    always be
+    Precondition: threshold is a number >= 0
+
+    Parameter spreads: the spread of every benchmark (the larger of its
+    spread in the baseline and in results)
+    Precondition: spreads is a dict of numbers >= 0 keyed like results, or
+    None (only use threshold)
+    """
+    scale = 1.0
+    if 'calibrate' in results and 'calibrate' in baseline:
+        scale = results['calibrate'] / baseline['calibrate']
+    slower = []
+    for key in sorted(results):
+        if key == 'calibrate' or key not in baseline:
+            continue
+        allowed = threshold
+        if spreads is not None and key in spreads:
+            allowed = max(threshold, BENCH_SPREAD * spreads[key])
+        expected = baseline[key] * scale
+        if results[key] > expected * (1 + allowed):
+            slower.append((key, results[key], expected, allowed))
+    return slower
+
+
+def mergeSpreads(first, second):
+    """
+    Returns: the larger spread of every benchmark in either dict, as a dict
+
+    Parameter first: spreads of benchmarks
+    Precondition: first is a dict of numbers >= 0 (made by runAll)
+
+    Parameter second: spreads of benchmarks
+    Precondition: second is a dict of numbers >= 0 (made by runAll)
+    """
+    result = dict(first)
+    for key, spread in second.items():
+        result[key] = max(spread, result.get(key, 0.0))
+    return result
+
+
+def saveBaseline(results, spreads, path=BENCH_BASELINE):
+    """
+    Returns: Nothing
+
+    This function writes benchmark times and their spreads to a baseline
+    file (as JSON)
+
+    Parameter results: the times to save
+    Precondition: results is a dict made by runAll
+
+    Parameter spreads: the spreads of the times
+    Precondition: spreads is a dict made by runAll
+
+    Parameter path: the file to write
+    Precondition: path is a string, a file that can be written
+    """
+    data = {'python': platform.python_version(),
+            'machine': platform.machine(), 'results': results,
+            'spreads': spreads}
+    with open(path, 'w') as file:
+        json.dump(data, file, indent=1, sort_keys=True)
+
+
+def loadBaseline(path=BENCH_BASELINE):
+    """
+    Returns: the benchmark times and their spreads in a baseline file, as a
+    pair of dicts, or None if there is no file
+
+    A baseline saved without spreads has an empty dict of them.
+
+    Parameter path: the file to read
+    Precondition: path is a string
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path) as file:
+        data = json.load(file)
+    return data['results'], data.get('spreads', {})
+
+
+# Script code
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Time the hot paths of a '
+                                     'wave, and compare them to a baseline.')
+    parser.add_argument('--save', action='store_true',
+                        help='save the times as the new baseline')
+    parser.add_argument('--quick', action='store_true',
+                        help='only time the smaller formations')
+    parser.add_argument('--baseline', default=BENCH_BASELINE,
+                        help='the baseline file (default: %(default)s)')
+    parser.add_argument('--stress', action='store_true',
+                        help='only check that the largest stress mode wave '
+                        'holds STRESS_TARGET_FPS')
+    parser.add_argument('--headless', action='store_true',
+                        help='only time the paths of the simulation (a run '
+                        'without Kivy is then complete)')
+    parser.add_argument('--threshold', type=float, default=BENCH_THRESHOLD,
+                        help='the slowdown always allowed (default: '
+                        '%(default)s)')
+    args = parser.parse_args()
+    incomplete = ('INCOMPLETE: Wave.updateAliens and Wave.draw were not '
+                  'timed (Kivy is not installed)')
+
+    if args.stress:
+        seconds, budget, drawn = checkStress()
+        print('%dx%d aliens: %.2f ms a frame, %.2f ms allowed at %d fps' %
+              (STRESS_MAX_ROWS, STRESS_MAX_COLS, seconds * 1e3, budget * 1e3,
+               STRESS_TARGET_FPS))
+        if not drawn:
+            print('INCOMPLETE: Wave.draw was not timed (Kivy is not '
+                  'installed), so the frame rate was not checked')
+            sys.exit(EXIT_INCOMPLETE)
+        sys.exit(0 if seconds <= budget else 1)
+
+    complete = args.headless or canView()
+    results, spreads = runAll(QUICK_SIZES if args.quick else SIZES,
+                              headless=args.headless, out=sys.stdout)
+    if args.save:
+        saveBaseline(results, spreads, args.baseline)
+        print('Saved', len(results), 'times to', args.baseline)
+        if not complete:
+            print(incomplete)
+            sys.exit(EXIT_INCOMPLETE)
+        sys.exit(0)
+    baseline = loadBaseline(args.baseline)
+    if baseline is None:
+        print('No baseline to compare to (run with --save to make one)')
+        sys.exit(0 if complete else EXIT_INCOMPLETE)
+    before, saved = baseline
+    slower = confirm(results, before, args.threshold,
+                     mergeSpreads(spreads, saved))
+    for key, seconds, expected, allowed in slower:
+        print('SLOWER: %s took %.2f us, baseline %.2f us (%+.0f%%, %.0f%% '
+              'allowed)' % (key, seconds * 1e6, expected * 1e6,
+                            (seconds / expected - 1) * 100, allowed * 100))
+    if slower:
+        sys.exit(1)
+    if not complete:
+        print(incomplete)
+        sys.exit(EXIT_INCOMPLETE)
+    print('OK: no benchmark is slower than', args.baseline, 'allows (at '
+          'least', str(round(args.threshold * 100)) + '%)')
@@ -9,8 +9,7 @@ allows all modules to access them.
 # Samuel Rodriguez (sar325) and Renan Laurore (rl497)
 # DATE COMPLETED HERE
 """
-import introcs
-import sys
+import os
 
 ### WINDOW CONSTANTS (all coordinates are in pixels) ###
 
@@ -28,13 +27,15 @@ SHIP_WIDTH    = 44
 SHIP_HEIGHT   = 44
 # the distance of the (bottom of the) ship from the bottom of the screen
 SHIP_BOTTOM   = 32
-# The number of pixels to move the ship per update
+# The number of pixels to move the ship per tick
 SHIP_MOVEMENT = 5
 # The number of lives a ship has
 SHIP_LIVES    = 3
 
 # The y-coordinate of the defensive line the ship is protecting
 DEFENSE_LINE = 100
+# The width (in pixels) of the defensive line
+DEFENSE_LINE_WIDTH = 2
 
 
 ### ALIEN CONSTANTS ###
@@ -53,10 +54,18 @@ ALIEN_H_WALK  = ALIEN_WIDTH // 4
 ALIEN_V_WALK  = ALIEN_HEIGHT // 2
 # The distance of the top alien from the top of the window
 ALIEN_CEILING = 100
-# the number of rows of aliens, in range 1..10
+# the number of rows of aliens, in range 1..ALIEN_MAX_ROWS
 ALIEN_ROWS     = 5
-# the number of aliens per row
+# the number of aliens per row, in range 1..ALIEN_MAX_COLS
 ALIENS_IN_ROW  = 12
+# the most rows (and aliens per row) that fit on screen at full size; bigger
+# formations are drawn with smaller aliens (see Formation)
+ALIEN_MAX_ROWS = 10
+ALIEN_MAX_COLS = 15
+# the smallest an alien is drawn (as a fraction of its full size) to fit more
+# rows on screen; past this the formation reaches above the top of the screen
+# (a formation with too many columns to fit is still drawn smaller than this)
+ALIEN_MIN_SCALE = 0.25
 # the image files for the aliens (bottom to top)
 ALIEN_IMAGES   = ('alien1.png','alien2.png','alien3.png')
 # the number of seconds (0 < float <= 1) between alien steps
@@ -69,10 +78,44 @@ ALIEN_SPEED = 1.0
 BOLT_WIDTH  = 4
 # the height of a laser bolt
 BOLT_HEIGHT = 16
-# the number of pixels to move the bolt per update
+# the number of pixels to move the bolt per tick
 BOLT_SPEED  = 10
 # the number of ALIEN STEPS (not frames) between bolts
 BOLT_RATE   = 5
+# the most player bolts that can be on screen at once
+PLAYER_BOLT_CAPACITY = 8
+# the most alien bolts that can be on screen at once
+ALIEN_BOLT_CAPACITY  = 64
+
+
+### STRESS CONSTANTS (for load testing the game with huge formations) ###
+
+# whether the limits on the size of the formation are lifted (the word
+# "stress" after the command line arguments below turns this on)
+STRESS_MODE = False
+# the most rows of aliens (and aliens per row) in stress mode
+STRESS_MAX_ROWS = 100
+STRESS_MAX_COLS = 200
+# the frame rate the game must hold in stress mode, even with
+# STRESS_MAX_ROWS x STRESS_MAX_COLS aliens (checked by bench.py)
+STRESS_TARGET_FPS = 60
+
+
+### SOUND CONSTANTS ###
+
+# the sound effects (in the Sounds folder) and how many of each can play at
+# once
+SOUND_EFFECTS = (('pew1.wav', 2), ('pew2.wav', 3), ('blast1.wav', 1),
+                 ('pop2.wav', 4))
+
+
+### IMAGE CONSTANTS ###
+
+# the most decoded images kept in memory while nothing is using them
+TEXTURE_CACHE_SIZE = 8
+# the most seconds of a frame spent loading assets while the title screen is
+# shown (see AssetLoader); the rest are loaded on the next frames
+ASSET_FRAME_BUDGET = 0.008
 
 
 ### GAME CONSTANTS ###
@@ -89,6 +132,137 @@ STATE_PAUSED   = 3
 STATE_CONTINUE = 4
 #: state when the game is complete (won or lost)
 STATE_COMPLETE = 5
+# state when a wave was cleared, and the next one is waiting to start
+STATE_CLEARED  = 6
+
+
+### WAVE CONSTANTS (the waves played one after the other in a game) ###
+
+# the number of waves to clear to win the game
+WAVE_COUNT = 5
+# the time between alien steps in every wave, as a fraction of that in the
+# wave before it
+WAVE_SPEEDUP = 0.8
+# the shortest time (in seconds) between alien steps in any wave
+WAVE_MIN_SPEED = 0.2
+
+
+### INPUT CONSTANTS (the keys held during a tick, as bits of an int) ###
+
+# the ship moves left
+INPUT_LEFT  = 1
+# the ship moves right
+INPUT_RIGHT = 2
+# the ship fires a bolt
+INPUT_FIRE  = 4
+
+# the folder to save a replay of every wave in (None to not save them)
+REPLAY_FOLDER = None
+# the number of ticks between two keyframes (full snapshots) of a replay
+REPLAY_KEYFRAME_TICKS = 1800
+# the number of bytes of a replay to collect before writing them to disk
+REPLAY_BUFFER = 4096
+
+
+### TIMING CONSTANTS ###
+
+# the number of simulation ticks per second (the game runs at this rate no
+# matter how fast it is drawn)
+TICK_RATE = 60
+# the most ticks to run in one frame (after a long hitch the game slows down
+# instead of running many ticks at once)
+MAX_TICKS_PER_FRAME = 5
+
+
+### PERFORMANCE CONSTANTS ###
+
+# the most bytes a simulation tick of active play may allocate (checked by
+# perf.py; the drawing of a frame is not part of it)
+ALLOCATION_BUDGET = 1024
+# the file with the benchmark times to compare against (see bench.py)
+BENCH_BASELINE = 'bench.json'
+# how much slower (as a fraction) than its baseline a benchmark may always
+# run; a benchmark that varies more from pass to pass may run slower still
+# (see BENCH_SPREAD)
+BENCH_THRESHOLD = 0.15
+# how many times its spread (how much its passes differ, as a fraction) a
+# benchmark may run slower than its baseline, if that is more than
+# BENCH_THRESHOLD
+BENCH_SPREAD = 3
+# the least time (in seconds) every benchmark is timed for in every pass
+BENCH_WINDOW = 0.05
+# how many times bench.py times a path again before calling it slower
+BENCH_RETRIES = 3
+# the number of games batch.py plays by default
+BATCH_GAMES = 1000
+# the most ticks a game of batch.py may last before it counts as unfinished
+BATCH_MAX_TICKS = 10 * 60 * TICK_RATE
+
+
+### VALIDATION CONSTANTS (how many preconditions are checked by assert) ###
+
+# every precondition is checked, even in the methods called every frame or
+# tick, or for every alien and bolt (for development)
+VALIDATE_FULL     = 2
+# only the preconditions of values coming into the game are checked (when a
+# wave, ship or bolt is made, or Invaders changes the wave), not the ones of
+# the methods called every frame or tick
+VALIDATE_BOUNDARY = 1
+# no preconditions of the game objects are checked (for production)
+VALIDATE_NONE     = 0
+# the name of every level, to choose one with the environment variable
+# VALIDATION_VARIABLE or the command line argument validate=<name> (see
+# readArguments)
+VALIDATION_LEVELS = {'full': VALIDATE_FULL, 'boundary': VALIDATE_BOUNDARY,
+                     'none': VALIDATE_NONE}
+# the environment variable with the name of the level of every script of the
+# game (like INVADERS_VALIDATION=none python batch.py)
+VALIDATION_VARIABLE = 'INVADERS_VALIDATION'
+# how many preconditions are checked: one of the VALIDATE constants above
+# (this does not depend on running Python with -O)
+VALIDATION = VALIDATION_LEVELS.get(os.environ.get(VALIDATION_VARIABLE, ''),
+                                   VALIDATE_FULL)
+
+
+### ENVIRONMENT CONSTANTS (see env.py) ###
+
+# the reward for destroying an alien
+REWARD_ALIEN = 1.0
+# the reward for losing a life
+REWARD_SHIP  = -10.0
+# the reward for winning the wave
+REWARD_WIN   = 50.0
+# the most ticks an episode may last before it is cut off
+ENV_MAX_TICKS = 10 * 60 * TICK_RATE
+
+
+### PROFILER CONSTANTS (see profiler.py) ###
+
+# the phases of a frame that are timed; moveBolt and collisions are parts of
+# updateAliens (and collisions is a part of moveBolt)
+PROFILE_PHASES = ('frame', 'input', 'updateAliens', 'moveBolt', 'collisions',
+                  'draw')
+# the number of most recent frames the percentiles are taken over
+PROFILE_FRAMES = 600
+# the number of frames between two updates of the overlay
+PROFILE_REFRESH = 30
+# the key that shows (and hides) the overlay
+PROFILE_KEY = 'f'
+# the file to write the profile to when the game exits (None to not write it;
+# the command line argument profile=<file> sets it, see readArguments)
+PROFILE_FILE = None
+
+
+### SIMULATION EVENTS (recorded by Simulation, turned into sounds by Wave) ###
+
+# an alien fired a bolt
+EVENT_ALIEN_BOLT = 0
+# an alien bolt destroyed the ship
+EVENT_SHIP_HIT   = 1
+# a player bolt destroyed an alien
+EVENT_ALIEN_HIT  = 2
+# the player fired a bolt
+EVENT_PLAYER_BOLT = 3
 
 
 ### USE COMMAND LINE ARGUMENTS TO CHANGE NUMBER OF ALIENS IN A ROW
@@ -98,29 +272,71 @@ arguments are everything after the word python. So if you start the game typing
 
     python invaders 3 4 0.5
 
-Python puts ['breakout.py', '3', '4', '0.5'] into sys.argv. Below, we take
-advantage of this fact to change the constants ALIEN_ROWS, ALIENS_IN_ROW, and
-ALIEN_SPEED.
+Python puts ['breakout.py', '3', '4', '0.5'] into sys.argv. The function
+readArguments below takes advantage of this fact to change the constants
+ALIEN_ROWS, ALIENS_IN_ROW, and ALIEN_SPEED. Adding the word stress (python
+invaders 60 150 0.5 stress) turns on STRESS_MODE, which allows up to
+STRESS_MAX_ROWS x STRESS_MAX_COLS aliens. Adding validate=<level> (one of
+the names in VALIDATION_LEVELS, like python invaders 5 12 1 validate=none)
+changes VALIDATION, and profile=<file> writes the profile of the game to
+that file when it exits (PROFILE_FILE). These words may come anywhere
+(python invaders stress 60 150 works too): the numbers are the arguments
+that are not words, in order, so any of them can be left out from the end.
+
+The arguments are not read when this module is imported, as the other scripts
+(like bench.py or batch.py) have command line arguments of their own. Only
+__main__.py reads them, before it imports anything else of the game: every
+module copies the constants when it is imported (from consts import *), so
+the constants must be changed first.
 """
-try:
-    rows = int(sys.argv[1])
-    if rows >= 1 and rows <= 10:
-        ALIEN_ROWS = rows
-except:
-    pass # Use original value
-
-try:
-    perrow = int(sys.argv[2])
-    if perrow >= 1 and perrow <= 15:
-        ALIENS_IN_ROW = perrow
-except:
-    pass # Use original value
-
-try:
-    speed = float(sys.argv[3])
-    if speed > 0 and speed <= 3:
-        ALIEN_SPEED = speed
-except:
-    pass # Use original value
+def readArguments(argv):
+    """
+    Returns: Nothing
+
+    This function changes ALIEN_ROWS, ALIENS_IN_ROW, ALIEN_SPEED,
+    STRESS_MODE, VALIDATION and PROFILE_FILE to the values given on the
+    command line (an argument that is missing or out of range keeps its
+    original value)
+
+    Parameter argv: the command line arguments
+    Precondition: argv is a list of strings, like sys.argv
+    """
+    global ALIEN_ROWS, ALIENS_IN_ROW, ALIEN_SPEED, STRESS_MODE, VALIDATION
+    global PROFILE_FILE
+    # The words come first, as stress changes the limits of the numbers
+    numbers = []
+    for arg in argv[1:]:
+        if arg == 'stress':
+            STRESS_MODE = True
+        elif arg.startswith('validate='):
+            VALIDATION = VALIDATION_LEVELS.get(arg[len('validate='):],
+                                               VALIDATION)
+        elif arg.startswith('profile='):
+            PROFILE_FILE = arg[len('profile='):] or None
+        else:
+            numbers.append(arg)
+
+    try:
+        rows = int(numbers[0])
+        if rows >= 1 and rows <= (STRESS_MAX_ROWS if STRESS_MODE else
+                                  ALIEN_MAX_ROWS):
+            ALIEN_ROWS = rows
+    except:
+        pass # Use original value
+
+    try:
+        perrow = int(numbers[1])
+        if perrow >= 1 and perrow <= (STRESS_MAX_COLS if STRESS_MODE else
+                                      ALIEN_MAX_COLS):
+            ALIENS_IN_ROW = perrow
+    except:
+        pass # Use original value
+
+    try:
+        speed = float(numbers[2])
+        if speed > 0 and speed <= 3:
+            ALIEN_SPEED = speed
+    except:
+        pass # Use original value
 
 ### ADD MORE CONSTANTS (PROPERLY COMMENTED) AS NECESSARY ###
@@ -0,0 +1,374 @@
+"""
+Environment module for Alien Invaders
+
+This module wraps a wave of Alien Invaders as an environment for training
+agents, with the usual reset/step interface. Like Wave, an Env plays the
+game on a headless Simulation (Wave itself needs a window), so an agent
+plays by exactly the rules of the game, only without drawing it.
+
+An action is the keys held during a tick, as an int of INPUT bits (the same
+encoding a replay uses, see replay.py): 0 does nothing, INPUT_LEFT and
+INPUT_RIGHT move the ship like the arrow keys in Invaders.active, and
+INPUT_FIRE fires like the spacebar. They can be combined, like
+INPUT_LEFT | INPUT_FIRE.
+
+An observation is two flat buffers, filled in place every step (so that a
+step makes no new objects for them):
+
+    alive:  a bytearray with a byte per alien (1 if it is alive), in
+            row-major order from the bottom row (see Formation)
+    state:  an array('f') of STATE_SIZE floats: the x-coordinate of the ship
+            (-1 while it is destroyed), the offset of the formation (x and
+            y), the lives left, the number of player and alien bolts, and
+            then the x and y of every player bolt (PLAYER_BOLT_CAPACITY
+            pairs) and every alien bolt (ALIEN_BOLT_CAPACITY pairs), with
+            the unused pairs at 0
+
+Both support the buffer protocol, so numpy.frombuffer (or memoryview) can
+read them without a copy. There is no dependency on NumPy.
+
+An EnvGroup steps a group of independent waves with one call, with the
+observations of all of them in one pair of buffers (one slice per wave). It
+does not batch the work: every wave is its own Simulation, stepped one after
+the other, so a group of n waves costs about as much as n Env objects. What
+it saves the caller is the loop and the buffers. A wave that ends is reset
+right away (with the next seed), so every call steps them all.
+"""
+from consts import *
+from simulation import Simulation
+from replay import direction
+from array import array
+import operator
+
+# PRIMARY RULE: Env may only access consts.py, simulation.py and replay.py.
+# It must never import game2d, or it cannot run headless.
+
+# The direction of the ship for every action
+DIRECTIONS = tuple(direction(action) for action in range(8))
+
+# The number of floats in the state of an observation
+STATE_SIZE = 6 + 2 * (PLAYER_BOLT_CAPACITY + ALIEN_BOLT_CAPACITY)
+
+
+class Env(object):
+    """
+    A class to play one wave at a time as an environment.
+
+    Call reset to start a wave, then step with an action every tick until
+    it says the episode is done. An episode ends when the wave is won or
+    lost, or after ENV_MAX_TICKS ticks. A destroyed ship costs a life and
+    play goes on right away (there is no pause, unlike Invaders).
+
+    The reward of a step is REWARD_ALIEN for every alien destroyed,
+    REWARD_SHIP for a lost life, and REWARD_WIN for winning the wave.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _rows: the number of rows of aliens of every wave
+    # Invariant: _rows is an int > 0
+    #
+    # Attribute _cols: the number of aliens in a row of every wave
+    # Invariant: _cols is an int > 0
+    #
+    # Attribute _speed: the number of seconds between alien steps
+    # Invariant: _speed is a float > 0
+    #
+    # Attribute _sim: the wave being played
+    # Invariant: _sim is a Simulation object, or None before reset
+    #
+    # Attribute _ticks: the number of ticks of the episode so far
+    # Invariant: _ticks is an int >= 0
+    #
+    # Attribute _alive: the alive part of the observation
+    # Invariant: _alive is a bytearray (or memoryview) of _rows*_cols bytes
+    #
+    # Attribute _state: the state part of the observation
+    # Invariant: _state is an array('f') (or memoryview) of STATE_SIZE floats
+    #
+    # Attribute _bolts: the number of player and alien bolts in _state
+    # Invariant: _bolts is a list of two ints
+
+    def getAlive(self):
+        """
+        Returns: the alive part of the observation (updated in place)
+        """
+        return self._alive
+
+    def getState(self):
+        """
+        Returns: the state part of the observation (updated in place)
+        """
+        return self._state
+
+    def getSimulation(self):
+        """
+        Returns: the wave being played, or None before reset
+        """
+        return self._sim
+
+    def getTicks(self):
+        """
+        Returns: the number of ticks played in this episode
+        """
+        return self._ticks
+
+    def __init__(self, rows=ALIEN_ROWS, cols=ALIENS_IN_ROW,
+                 speed=ALIEN_SPEED, alive=None, state=None):
+        """
+        Initializes an environment with no wave (call reset to start one).
+
+        Parameter rows: how many rows of aliens
+        Precondition: rows is an int > 0
+
+        Parameter cols: how many aliens in a row
+        Precondition: cols is an int > 0
+
+        Parameter speed: the number of seconds between alien steps
+        Precondition: speed is a number > 0
+
+        Parameter alive: where to keep the alive part of the observation
+        Precondition: alive is a writable buffer of rows*cols bytes (like a
+        slice of a memoryview), or None to make one
+
+        Parameter state: where to keep the state part of the observation
+        Precondition: state is a writable buffer of STATE_SIZE floats, or
+        None to make one
+        """
+        if VALIDATION >= VALIDATE_BOUNDARY:
+            assert isinstance(rows, int) and rows > 0, "rows is not an int > 0"
+            assert isinstance(cols, int) and cols > 0, "cols is not an int > 0"
+        self._rows = rows
+        self._cols = cols
+        self._speed = float(speed)
+        self._sim = None
+        self._ticks = 0
+        self._alive = bytearray(rows * cols) if alive is None else alive
+        self._state = array('f', [0.0]) * STATE_SIZE if state is None \
+            else state
+        self._bolts = [0, 0]
+
+    def reset(self, seed=None):
+        """
+        Returns: the first observation of a new wave, as a pair (alive, state)
+
+        Parameter seed: the seed of the random numbers of the wave
+        Precondition: seed is an int >= 0, or None (pick one at random)
+        """
+        self._sim = Simulation(self._rows, self._cols, GAME_WIDTH / 2,
+                               DEFENSE_LINE, SHIP_LIVES, seed, self._speed)
+        self._ticks = 0
+        for i in range(STATE_SIZE):
+            self._state[i] = 0.0
+        self._bolts[0] = 0
+        self._bolts[1] = 0
+        self.observe()
+        return self._alive, self._state
+
+    def step(self, action):
+        """
+        Returns: the result of one tick, as a tuple (alive, state, reward,
+        done)
+
+        The observation (alive and state) is the same pair of buffers every
+        step, updated in place. Once done is True, call reset before
+        stepping again.
+
+        Parameter action: the keys held during the tick
+        Precondition: action is an int in 0..7 (of INPUT bits), or an
+        integer-like value (like a numpy.int64) in 0..7, and reset was called
+        since the last step that was done
+        """
+        action = operator.index(action)
+        if VALIDATION >= VALIDATE_FULL:
+            assert 0 <= action <= 7, "action is not in 0..7"
+        sim = self._sim
+        sim.step(DIRECTIONS[action], action & INPUT_FIRE != 0)
+        self._ticks += 1
+        reward = 0.0
+        events = sim.getEvents()
+        if events:
+            for event in events:
+                if event == EVENT_ALIEN_HIT:
+                    reward += REWARD_ALIEN
+            sim.clearEvents()
+        state = sim.getGameState()
+        if state == 3:
+            # The ship is destroyed: lose a life and play on (like pressing
+            # 'c' in Invaders). The next tick sees if that was the last one.
+            reward += REWARD_SHIP
+            sim.setLives(sim.getLives() - 1)
+            sim.clearBolts()
+            sim.setGameState(0)
+            done = sim.getLives() == 0
+        elif state == 1:
+            reward += REWARD_WIN
+            done = True
+        else:
+            done = state == 2 or self._ticks >= ENV_MAX_TICKS
+        self.observe()
+        return self._alive, self._state, reward, done
+
+    def observe(self):
+        """
+        Returns: Nothing
+
+        This method writes the wave as it is now into the observation
+        buffers. Only the bolt pairs that were in use are cleared, so the
+        cost does not depend on the capacity of the bolts.
+        """
+        sim = self._sim
+        formation = sim.getFormation()
+        formation.copyAlive(self._alive)
+        state = self._state
+        ship = sim.getShip()
+        state[0] = -1.0 if ship is None else ship.x
+        state[1] = formation.getOffsetX()
+        state[2] = formation.getOffsetY()
+        state[3] = sim.getLives()
+        pool = sim.getBolts()
+        players = pool.getPlayerCount()
+        aliens = pool.getAlienCount()
+        state[4] = players
+        state[5] = aliens
+        pos = 6
+        for i in range(players):
+            bolt = pool.getPlayerBolt(i)
+            state[pos] = bolt.x
+            state[pos + 1] = bolt.y
+            pos += 2
+        for i in range(2 * (self._bolts[0] - players)):
+            state[pos + i] = 0.0
+        pos = 6 + 2 * PLAYER_BOLT_CAPACITY
+        for i in range(aliens):
+            bolt = pool.getAlienBolt(i)
+            state[pos] = bolt.x
+            state[pos + 1] = bolt.y
+            pos += 2
+        for i in range(2 * (self._bolts[1] - aliens)):
+            state[pos + i] = 0.0
+        self._bolts[0] = players
+        self._bolts[1] = aliens
+
+
+class EnvGroup(object):
+    """
+    A class to step a group of independent waves with one call.
+
+    The waves are stepped one after the other, each by its own Env (there
+    is no batching of the work), so a step costs about as much as stepping
+    every Env on its own.
+
+    The observations of all of the waves are in one pair of buffers: wave i
+    has the bytes i*rows*cols .. (i+1)*rows*cols-1 of alive, and the floats
+    i*STATE_SIZE .. (i+1)*STATE_SIZE-1 of state. The rewards and dones of
+    a step are in buffers too, one entry per wave.
+
+    Wave i starts with seed seed+i, and every wave reset after that takes
+    the next seed no wave has used yet, so a run can be repeated exactly.
+    When a wave is done, the observation of its slice is of the new wave
+    already (its reward and done are still those of the wave that ended).
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _envs: the waves
+    # Invariant: _envs is a non-empty list of Env objects, Env i keeping its
+    # observation in its slice of _alive and _state
+    #
+    # Attribute _alive: the alive parts of the observations of every wave
+    # Invariant: _alive is a bytearray of len(_envs)*rows*cols bytes
+    #
+    # Attribute _state: the state parts of the observations of every wave
+    # Invariant: _state is an array('f') of len(_envs)*STATE_SIZE floats
+    #
+    # Attribute _rewards: the reward of every wave in the last step
+    # Invariant: _rewards is an array('f') of len(_envs) floats
+    #
+    # Attribute _dones: whether every wave ended in the last step
+    # Invariant: _dones is a bytearray of len(_envs) bytes, each 0 or 1
+    #
+    # Attribute _seed: the seed of the next wave to be reset
+    # Invariant: _seed is an int >= 0
+
+    def getCount(self):
+        """
+        Returns: the number of waves
+        """
+        return len(self._envs)
+
+    def getEnv(self, i):
+        """
+        Returns: the i-th wave
+
+        Parameter i: the wave
+        Precondition: i is an int in 0..getCount()-1
+        """
+        return self._envs[i]
+
+    def __init__(self, count, rows=ALIEN_ROWS, cols=ALIENS_IN_ROW,
+                 speed=ALIEN_SPEED):
+        """
+        Initializes count environments with no waves (call reset).
+
+        Parameter count: the number of waves
+        Precondition: count is an int > 0
+
+        Parameter rows: how many rows of aliens
+        Precondition: rows is an int > 0
+
+        Parameter cols: how many aliens in a row
+        Precondition: cols is an int > 0
+
+        Parameter speed: the number of seconds between alien steps
+        Precondition: speed is a number > 0
+        """
+        if VALIDATION >= VALIDATE_BOUNDARY:
+            assert isinstance(count, int) and count > 0, \
+                "count is not an int > 0"
+        cells = rows * cols
+        self._alive = bytearray(count * cells)
+        self._state = array('f', [0.0]) * (count * STATE_SIZE)
+        self._rewards = array('f', [0.0]) * count
+        self._dones = bytearray(count)
+        alive = memoryview(self._alive)
+        state = memoryview(self._state)
+        self._envs = [Env(rows, cols, speed, alive[i * cells:(i + 1) * cells],
+                          state[i * STATE_SIZE:(i + 1) * STATE_SIZE])
+                      for i in range(count)]
+        self._seed = 0
+
+    def reset(self, seed=0):
+        """
+        Returns: the first observations of new waves, as a pair (alive, state)
+
+        Parameter seed: the seed of the first wave
+        Precondition: seed is an int >= 0
+        """
+        for env in self._envs:
+            env.reset(seed)
+            seed += 1
+        self._seed = seed
+        return self._alive, self._state
+
+    def step(self, actions):
+        """
+        Returns: the result of one tick of every wave, as a tuple (alive,
+        state, rewards, dones)
+
+        All four are the same buffers every step, updated in place.
+
+        Parameter actions: the action of every wave
+        Precondition: actions is a sequence of getCount() ints in 0..7 (like
+        a list, an array, a bytes object or a numpy array)
+        """
+        rewards = self._rewards
+        dones = self._dones
+        i = 0
+        for env in self._envs:
+            reward, done = env.step(actions[i])[2:]
+            rewards[i] = reward
+            if done:
+                dones[i] = 1
+                env.reset(self._seed)
+                self._seed += 1
+            else:
+                dones[i] = 0
+            i += 1
+        return self._alive, self._state, rewards, dones
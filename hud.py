@@ -0,0 +1,268 @@
+"""
+HUD module for Alien Invaders
+
+This module contains the class Hud, which keeps the text messages of the game
+on screen (the title screen, the pause and win/lose messages, and anything
+like a score that has to be shown while playing).
+
+A GLabel is expensive to make: its text has to be laid out with the font.
+So the Hud makes every label once and keeps it, even while it is hidden.
+Showing a label again with the same text costs nothing, and a label is only
+laid out again when its text actually changes.
+
+The class Overlay shows one block of text over the game while it is played,
+like the frame profile (see profiler.py).
+"""
+from consts import *
+from game2d import *
+
+# PRIMARY RULE: Hud may only access consts.py and game2d. Invaders tells it
+# what to show.
+
+
+class Hud(object):
+    """
+    A class to show text messages on screen.
+
+    Every message has a key (any string), chosen by the caller, that names
+    the place where it is shown, like "title" or "lives". Showing a message
+    with a key replaces the text of the label with that key (if there is
+    one) instead of making a new label.
+
+    The labels are drawn in the order they were put on screen.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _labels: every label ever made, by key
+    # Invariant: _labels is a dict mapping strings to GLabel objects
+    #
+    # Attribute _places: the left and top edges of every label, by key
+    # Invariant: _places is a dict mapping the keys of _labels to
+    # (left, top) pairs of numbers
+    #
+    # Attribute _shown: the labels currently on screen, in drawing order
+    # Invariant: _shown is a list of GLabel objects in _labels, no repeats
+    #
+    # Attribute _version: the number of times what is on screen changed
+    # Invariant: _version is an int >= 0
+
+    def isShown(self, key):
+        """
+        Returns: True if the label with this key is on screen, False otherwise
+
+        Parameter key: the name of the label
+        Precondition: key is a string
+        """
+        label = self._labels.get(key)
+        return label is not None and label in self._shown
+
+    def getText(self, key):
+        """
+        Returns: the text of the label with this key, or None if there is none
+
+        Parameter key: the name of the label
+        Precondition: key is a string
+        """
+        label = self._labels.get(key)
+        return None if label is None else label.text
+
+    def getVersion(self):
+        """
+        Returns: a number that changes every time what the Hud draws changes
+
+        A caller that drew the Hud before can compare this number to the one
+        it had then, to know if it has to draw the Hud again.
+        """
+        return self._version
+
+    def __init__(self):
+        """
+        Initializes a Hud with no labels.
+        """
+        self._labels = {}
+        self._places = {}
+        self._shown = []
+        self._version = 0
+
+    def show(self, key, text, size=48, left=GAME_WIDTH / 6,
+             top=GAME_HEIGHT / 2, halign="center", valign="middle"):
+        """
+        Returns: Nothing
+
+        This method puts a label on screen. The first time a key is shown,
+        a new GLabel is made with font "RetroGame.ttf" and color green. After
+        that the label is reused, and only laid out again if the text (or
+        its place) is different. The size and alignment of a label are
+        fixed when it is made.
+
+        Parameter key: the name of the label
+        Precondition: key is a string
+
+        Parameter text: the text to show
+        Precondition: text is a string
+
+        Parameter size: text size of the text
+        Precondition: size is an int
+
+        Parameter left: the left edge of the text
+        Precondition: left is a number in 0..GAME_WIDTH
+
+        Parameter top: the location of the top edge of the text
+        Precondition: top is a number in 0..GAME_HEIGHT
+
+        Parameter halign: the horizontal alignment of the text
+        Precondition: halign is 'left', 'right', or 'center'
+
+        Parameter valign: the vertical alignment of the text
+        Precondition: valign is 'top', 'bottom', or 'middle'
+        """
+        label = self._labels.get(key)
+        if label is None:
+            if VALIDATION >= VALIDATE_BOUNDARY:
+                assert isinstance(key, str), "key is not a string"
+                assert isinstance(text, str), "text is not a string"
+                assert isinstance(size, int), "size needs to be an int"
+                assert isinstance(left, int) or isinstance(left, float), \
+                    "left needs to be number"
+                assert 0 <= left <= GAME_WIDTH, "left needs to be in range"
+                assert isinstance(top, int) or isinstance(top, float), \
+                    "top needs to be number"
+                assert 0 <= top <= GAME_HEIGHT, "top is not in range"
+                assert halign in ("left", "right", "center"), \
+                    "invalid horizontal alignment input"
+                assert valign in ("top", "bottom", "middle"), \
+                    "invalid vertical alignment input"
+            label = GLabel(text=text, font_size=size, linecolor="green",
+                           halign=halign, valign=valign,
+                           font_name="RetroGame.ttf", left=left, top=top)
+            self._labels[key] = label
+            self._places[key] = (left, top)
+            self._version += 1
+        elif (label.text != text or self._places[key][0] != left or
+              self._places[key][1] != top):
+            if VALIDATION >= VALIDATE_FULL:
+                assert isinstance(text, str), "text is not a string"
+            label.text = text
+            # A new text can change the size, so put the edges back
+            label.left = left
+            label.top = top
+            self._places[key] = (left, top)
+            self._version += 1
+        if label not in self._shown:
+            self._shown.append(label)
+            self._version += 1
+
+    def hide(self, key):
+        """
+        Returns: Nothing
+
+        This method takes a label off the screen (but keeps it for later)
+
+        Parameter key: the name of the label
+        Precondition: key is a string
+        """
+        label = self._labels.get(key)
+        if label is not None and label in self._shown:
+            self._shown.remove(label)
+            self._version += 1
+
+    def clear(self):
+        """
+        Returns: Nothing
+
+        This method takes every label off the screen (but keeps them)
+        """
+        if self._shown:
+            self._shown.clear()
+            self._version += 1
+
+    def draw(self, view):
+        """
+        Returns: Nothing
+
+        This method draws the labels on screen
+
+        Parameter: the window (or StaticLayer) to draw objects in
+        Precondition: view is a valid window, or a StaticLayer
+        """
+        for label in self._shown:
+            label.draw(view)
+
+
+class Overlay(object):
+    """
+    A class to show a block of text over the game, like the profile of the
+    last frames (see FrameProfiler.toText).
+
+    Unlike the labels of a Hud, which are drawn into the static layer, the
+    overlay is drawn on top of everything every frame, so it can change while
+    the game is played. It is still only laid out again when its text
+    changes, so the caller should only change it every few frames.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _label: the text on screen
+    # Invariant: _label is a GLabel object, or None if nothing was shown yet
+    #
+    # Attribute _visible: whether the overlay is drawn
+    # Invariant: _visible is a bool
+
+    def isVisible(self):
+        """
+        Returns: True if the overlay is drawn, False otherwise
+        """
+        return self._visible
+
+    def setVisible(self, visible):
+        """
+        Returns: Nothing
+
+        This method shows or hides the overlay (it keeps its text)
+
+        Parameter visible: whether the overlay is drawn
+        Precondition: visible is a bool
+        """
+        if VALIDATION >= VALIDATE_BOUNDARY:
+            assert isinstance(visible, bool), "visible is not a bool"
+        self._visible = visible
+
+    def __init__(self):
+        """
+        Initializes a hidden overlay with no text.
+        """
+        self._label = None
+        self._visible = False
+
+    def show(self, text):
+        """
+        Returns: Nothing
+
+        This method changes the text of the overlay. The text is put in the
+        top left corner, in small green letters.
+
+        Parameter text: the text to show
+        Precondition: text is a string
+        """
+        if self._label is None:
+            if VALIDATION >= VALIDATE_BOUNDARY:
+                assert isinstance(text, str), "text is not a string"
+            self._label = GLabel(text=text, font_size=12, linecolor="green",
+                                 halign="left", valign="top",
+                                 font_name="RetroGame.ttf", left=8,
+                                 top=GAME_HEIGHT - 8)
+        elif self._label.text != text:
+            if VALIDATION >= VALIDATE_FULL:
+                assert isinstance(text, str), "text is not a string"
+            self._label.text = text
+            self._label.left = 8
+            self._label.top = GAME_HEIGHT - 8
+
+    def draw(self, view):
+        """
+        Returns: Nothing
+
+        This method draws the overlay, if it is visible and has a text
+
+        Parameter: the window to draw objects in
+        Precondition: view is a valid window
+        """
+        if self._visible and self._label is not None:
+            self._label.draw(view)
@@ -27,6 +27,7 @@ about whether to make a new class or not, please ask on Piazza.
 """
 from consts import *
 from game2d import *
+from kivy.graphics import Rectangle, PopMatrix
 
 # PRIMARY RULE: Models are not allowed to access anything in any module other 
 # than consts.py.  If you need extra information from Gameplay, then it should 
@@ -61,6 +62,10 @@ class Ship(GImage):
     # HIDDEN ATTRIBUTES:
     # Attribute _move: The number of pixels to move the ship per update
     # Invariant: _move is an int > 0
+    #
+    # Attribute _texture: the decoded image to draw
+    # Invariant: _texture is a Kivy Texture shared through a TextureCache,
+    # or None if the image is loaded from source
 
     # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
     def getX(self):
@@ -79,9 +84,10 @@ class Ship(GImage):
         Precondition: x is an int greater than 0
                       and less than the game's screen width
         """
-        assert isinstance(x, int) or isinstance(x, float),\
-            "x given is not an int or float"
-        assert 0 < x < GAME_WIDTH, "Ship is off the screen"
+        if VALIDATION >= VALIDATE_FULL:
+            assert isinstance(x, int) or isinstance(x, float),\
+                "x given is not an int or float"
+            assert 0 < x < GAME_WIDTH, "Ship is off the screen"
         self.x = x
 
     def getY(self):
@@ -119,13 +125,14 @@ class Ship(GImage):
         """
         # uses a try-except to check if file is there
         try:
+            self._texture = None
             self.source = source
         except FileNotFoundError:
             print("Did not find the image sorry")
 
     # INITIALIZER TO CREATE A NEW SHIP
     def __init__(self, x=int(GAME_WIDTH / 2), y=SHIP_BOTTOM, width=SHIP_WIDTH,
-                 height=SHIP_HEIGHT, source="ship.png"):
+                 height=SHIP_HEIGHT, source="ship.png", texture=None):
         """
         This method initializes a Ship object
         Parameter x: value of the ship's x-coordinate
@@ -144,19 +151,37 @@ class Ship(GImage):
 
         Parameter source: New source image
         Precondition: image is locatable
-        """
-        assert isinstance(height, int), "height given is not an int"
-        assert height > 0, "height cannot be negative"
-        assert isinstance(y, int), "y given is not an int"
-        assert 0 < y, "y cannot be negative"
-        assert isinstance(width, int), "width given is not an int"
-        assert width > 0, "width cannot be negative"
+
+        Parameter texture: the decoded source image (so it is not loaded again)
+        Precondition: texture is a Kivy Texture of source, or None
+        """
+        if VALIDATION >= VALIDATE_BOUNDARY:
+            assert isinstance(height, int), "height given is not an int"
+            assert height > 0, "height cannot be negative"
+            assert isinstance(y, int), "y given is not an int"
+            assert 0 < y, "y cannot be negative"
+            assert isinstance(width, int), "width given is not an int"
+            assert width > 0, "width cannot be negative"
+        self._texture = texture
         super().__init__(x=x, y=y, width=width, height=height, source=source)
         self.setX(x)
         self._y = y
         self._width = width
         self._height = height
-        self.setSource(source)
+
+    def _reset(self):
+        """
+        Redraws the ship. If it was given a texture, that texture is drawn
+        instead of loading its source file again.
+        """
+        if self._texture is None:
+            super()._reset()
+        else:
+            GObject._reset(self)
+            self._cache.add(Rectangle(pos=(-self.width / 2, -self.height / 2),
+                                      size=(self.width, self.height),
+                                      texture=self._texture))
+            self._cache.add(PopMatrix())
 
     # METHODS TO MOVE THE SHIP AND CHECK FOR COLLISIONS
     
@@ -182,6 +207,10 @@ class Alien(GImage):
     for extra gameplay features (like giving each alien a score value).
     """
     #  IF YOU ADD ATTRIBUTES, LIST THEM BELOW
+    # HIDDEN ATTRIBUTES:
+    # Attribute _texture: the decoded image to draw
+    # Invariant: _texture is a Kivy Texture shared through a TextureCache,
+    # or None if the image is loaded from source
     
     # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
     def getX(self):
@@ -200,9 +229,10 @@ class Alien(GImage):
         Precondition: x is an int or float greater than 0
                       and less than the game's screen width
         """
-        assert isinstance(x, int) or isinstance(x, float), \
-            "x given is not an int or float"
-        assert 0 < x < GAME_WIDTH, "Alien is off the screen"
+        if VALIDATION >= VALIDATE_FULL:
+            assert isinstance(x, int) or isinstance(x, float), \
+                "x given is not an int or float"
+            assert 0 < x < GAME_WIDTH, "Alien is off the screen"
         self.x = x
 
     def getY(self):
@@ -218,12 +248,14 @@ class Alien(GImage):
         This method assigns an alien to a new y-coordinate
 
         Parameter: New y-coordinate
-        Precondition: y is an int greater than or equal to 0
-                      and less than the game's screen height
-        """
-        assert isinstance(y, int) or isinstance(y, float), \
-            "y given is not an int or float"
-        assert 0 <= y < GAME_HEIGHT, "Alien is off the screen"
+        Precondition: y is an int or float greater than or equal to 0 (it
+                      is only above the game's screen height for the rows of
+                      a formation too big to fit on it, see STRESS_MODE)
+        """
+        if VALIDATION >= VALIDATE_FULL:
+            assert isinstance(y, int) or isinstance(y, float), \
+                "y given is not an int or float"
+            assert 0 <= y, "Alien is off the screen"
         self.y = y
 
     def getWidth(self):
@@ -239,11 +271,13 @@ class Alien(GImage):
         This method updates the width of an alien
 
         Parameter: the alien's new width
-        Precondition: width is an int and is greater than 0
+        Precondition: width is an int or float and is greater than 0
         """
-        assert isinstance(width, int), "width given is not an int"
-        assert width > 0, "width cannot be negative"
-        self._width = width
+        if VALIDATION >= VALIDATE_FULL:
+            assert isinstance(width, int) or isinstance(width, float), \
+                "width given is not an int or float"
+            assert width > 0, "width cannot be negative"
+        self.width = width
 
     def getHeight(self):
         """
@@ -258,10 +292,12 @@ class Alien(GImage):
         This method updates the height of an alien
 
         Parameter: the alien's new height
-        Precondition: height is an int and is greater than 0
+        Precondition: height is an int or float and is greater than 0
         """
-        assert isinstance(height, int), "height given is not an int"
-        assert height > 0, "height cannot be negative"
+        if VALIDATION >= VALIDATE_FULL:
+            assert isinstance(height, int) or isinstance(height, float), \
+                "height given is not an int or float"
+            assert height > 0, "height cannot be negative"
         self.height = height
 
     def getSource(self):
@@ -281,13 +317,14 @@ class Alien(GImage):
         """
         # uses a try-except to check if file is there
         try:
+            self._texture = None
             self.source = source
         except FileNotFoundError:
             print("Did not find the image sorry")
 
     # INITIALIZER TO CREATE AN ALIEN
     def __init__(self, x=0, y=0, width=ALIEN_WIDTH, height=ALIEN_HEIGHT,
-                 source ='alien1.png'):
+                 source ='alien1.png', texture=None):
         """
         This method initializes an alien object
 
@@ -300,21 +337,37 @@ class Alien(GImage):
                       and less than the game's screen height
 
         Parameter: the alien's new width
-        Precondition: width is an int and is greater than 0
+        Precondition: width is an int or float and is greater than 0
 
-        Parameter height: value of the ship's height
-        Precondition: height is an int and is greater than 0
+        Parameter height: value of the alien's height
+        Precondition: height is an int or float and is greater than 0
 
         Parameter: New source image
         Precondition: image is locatable
+
+        Parameter texture: the decoded source image (so it is not loaded again)
+        Precondition: texture is a Kivy Texture of source, or None
         """
-        super().__init__(x=x, y=y, width=ALIEN_WIDTH, height=ALIEN_HEIGHT,
-                         source=source)
+        self._texture = texture
+        super().__init__(x=x, y=y, width=width, height=height, source=source)
         self.setX(x)
         self.setY(y)
         self.setWidth(width)
         self.setHeight(height)
-        self.setSource(source)
+
+    def _reset(self):
+        """
+        Redraws the alien. If it was given a texture, that texture is drawn
+        instead of loading its source file again.
+        """
+        if self._texture is None:
+            super()._reset()
+        else:
+            GObject._reset(self)
+            self._cache.add(Rectangle(pos=(-self.width / 2, -self.height / 2),
+                                      size=(self.width, self.height),
+                                      texture=self._texture))
+            self._cache.add(PopMatrix())
 
 
 class Bolt(GRectangle):
@@ -365,9 +418,10 @@ class Bolt(GRectangle):
         Precondition: x is an int or float greater than 0
                      and less than the game's screen width
         """
-        assert isinstance(x, int) or isinstance(x, float), \
-            "x given is not an int or float"
-        assert 0 < x < GAME_WIDTH, "Alien is off the screen"
+        if VALIDATION >= VALIDATE_FULL:
+            assert isinstance(x, int) or isinstance(x, float), \
+                "x given is not an int or float"
+            assert 0 < x < GAME_WIDTH, "Alien is off the screen"
         self.x = x
 
     def getY(self):
@@ -386,9 +440,10 @@ class Bolt(GRectangle):
         Precondition: y is an int greater than 0
                      and less than the game's screen height
         """
-        assert isinstance(y, int) or isinstance(y, float), \
-            "y given is not an int or float"
-        assert 0 <= y < GAME_HEIGHT, "bolt is off the screen"
+        if VALIDATION >= VALIDATE_FULL:
+            assert isinstance(y, int) or isinstance(y, float), \
+                "y given is not an int or float"
+            assert 0 <= y < GAME_HEIGHT, "bolt is off the screen"
         self.y = y
 
     def getWidth(self):
@@ -406,8 +461,9 @@ class Bolt(GRectangle):
         Parameter: the bolt's new width
         Precondition: width is an int and is greater than 0
         """
-        assert isinstance(width, int), "width given is not an int"
-        assert width > 0, "width cannot be negative"
+        if VALIDATION >= VALIDATE_FULL:
+            assert isinstance(width, int), "width given is not an int"
+            assert width > 0, "width cannot be negative"
         self.width = width
 
     def getHeight(self):
@@ -425,8 +481,9 @@ class Bolt(GRectangle):
         Parameter: the bolt's new height
         Precondition: height is an int and is greater than 0
         """
-        assert isinstance(height, int), "height given is not an int"
-        assert height > 0, "height cannot be negative"
+        if VALIDATION >= VALIDATE_FULL:
+            assert isinstance(height, int), "height given is not an int"
+            assert height > 0, "height cannot be negative"
         self.height = height
 
     def getFillcolor(self):
@@ -483,9 +540,10 @@ class Bolt(GRectangle):
         Parameter player: determines if bolt is from the player or not
         Precondition: player is a bool
         """
-        assert isinstance(velocity, int) or isinstance(velocity, float), \
-            "y given is not an int or float"
-        assert isinstance(player, bool), " player given is not a bool"
+        if VALIDATION >= VALIDATE_FULL:
+            assert isinstance(velocity, int) or isinstance(velocity, float), \
+                "y given is not an int or float"
+            assert isinstance(player, bool), " player given is not a bool"
         super().__init__(x=x, y=y, width=width, height=height,
                          fillcolor=fillcolor, linecolor=linecolor)
         self.setX(x)
@@ -0,0 +1,218 @@
+"""
+Performance module for Alien Invaders
+
+This module contains tools to check how much work a tick of the game logic
+does. They drive a headless Simulation (so they run without a window) with a
+simple scripted pilot. Only the simulation tick is measured: what Wave and
+Invaders do on top of it every frame (the GObjects, the Hud, the sounds and
+the drawing) needs a window, and is not.
+
+Running this module checks that a simulation tick of active play stays
+within the allocation budget ALLOCATION_BUDGET, and that the modules of the
+game logic start without the graphics (see checkImports):
+
+    python perf.py
+
+It exits with an error if a tick goes over the budget, or if a module of
+the game logic imports the graphics.
+"""
+from consts import *
+from simulation import Simulation
+import os
+import subprocess
+import sys
+import tracemalloc
+
+# The modules that only need the game logic, so must run without a window
+HEADLESS_MODULES = ('simulation', 'replay', 'profiler', 'env', 'perf',
+                    'batch', 'bench')
+
+# The modules of the graphics, which a headless module must never import
+GRAPHICS_MODULES = ('game2d', 'kivy')
+
+# The script that imports a module in a fresh Python and reports on it
+IMPORT_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import %s
+seconds = time.perf_counter() - start
+print(seconds, ' '.join(name for name in sys.modules
+                       if name.split('.')[0] in %r))
+"""
+
+
+def autopilot(frame):
+    """
+    Returns: the input of a simple pilot for one tick, "left" or "right"
+
+    The ship sweeps from one side of the screen to the other (and back),
+    and the pilot fires whenever it can. The pilot does not look at the
+    wave, so it plays every wave the same way.
+
+    Parameter frame: the number of the tick being played
+    Precondition: frame is an int >= 0
+    """
+    if frame // 120 % 2 == 0:
+        return "left"
+    return "right"
+
+
+def playFrame(sim, frame):
+    """
+    Returns: True if the tick was a tick of active play, False otherwise
+
+    This function plays a single tick of the simulation with the autopilot. A
+    destroyed ship is replaced right away without losing a life (there is
+    nobody to press 'c' to continue), so that the wave keeps going.
+
+    Parameter sim: the simulation to play
+    Precondition: sim is a Simulation object
+
+    Parameter frame: the number of the tick being played
+    Precondition: frame is an int >= 0
+    """
+    if sim.getGameState() == 3:
+        sim.clearBolts()
+        sim.setGameState(0)
+        return False
+    active = sim.getGameState() == 0
+    sim.step(autopilot(frame), True)
+    sim.clearEvents()
+    return active
+
+
+def newSimulation(rows=ALIEN_ROWS, cols=ALIENS_IN_ROW, seed=None):
+    """
+    Returns: a new Simulation of a wave with the standard settings
+
+    Parameter rows: how many rows of aliens
+    Precondition: rows is an int >= 0
+
+    Parameter cols: how many columns of aliens
+    Precondition: cols is an int >= 0
+
+    Parameter seed: the seed of the random numbers of the wave
+    Precondition: seed is an int >= 0, or None (pick one at random)
+    """
+    return Simulation(rows, cols, GAME_WIDTH / 2, DEFENSE_LINE, SHIP_LIVES,
+                      seed)
+
+
+def measureAllocations(frames=1200, warmup=600, seed=0):
+    """
+    Returns: the list of bytes allocated by every measured tick
+
+    This function plays waves with the autopilot and measures (with
+    tracemalloc) the peak memory every simulation tick of active play
+    allocates on top of what was allocated before it (Wave and the drawing
+    are not part of it). The first ticks of every wave are not measured, as
+    that is when the wave makes its buffers. When a wave is over, a new one
+    is started (and warmed up) outside of the measurement.
+
+    Parameter frames: the number of ticks to measure
+    Precondition: frames is an int >= 0
+
+    Parameter warmup: the number of ticks to play before measuring a wave
+    Precondition: warmup is an int >= 0
+
+    Parameter seed: the seed of the first wave (every next wave uses the
+    next seed)
+    Precondition: seed is an int >= 0
+    """
+    result = []
+    started = tracemalloc.is_tracing()
+    if not started:
+        tracemalloc.start()
+    try:
+        frame = 0
+        while len(result) < frames:
+            sim = newSimulation(seed=seed)
+            seed += 1
+            for _ in range(warmup):
+                playFrame(sim, frame)
+                frame += 1
+            while len(result) < frames and sim.getGameState() in (0, 3):
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                active = playFrame(sim, frame)
+                peak = tracemalloc.get_traced_memory()[1]
+                if active:
+                    result.append(peak - before)
+                frame += 1
+    finally:
+        if not started:
+            tracemalloc.stop()
+    return result
+
+
+def checkAllocations(budget=ALLOCATION_BUDGET, frames=1200):
+    """
+    Returns: the largest number of bytes allocated by a measured tick
+
+    This function fails (with an AssertionError) if any simulation tick of
+    active play allocates more than budget bytes (see measureAllocations).
+
+    Parameter budget: the most bytes a tick may allocate
+    Precondition: budget is an int >= 0
+
+    Parameter frames: the number of ticks to measure
+    Precondition: frames is an int > 0
+    """
+    sizes = measureAllocations(frames)
+    worst = max(sizes)
+    assert worst <= budget, "a simulation tick allocated " + str(worst) + \
+        " bytes, over the budget of " + str(budget) + " bytes"
+    return worst
+
+
+def measureImport(module):
+    """
+    Returns: the time (in seconds) importing a module takes, and the graphics
+    modules it imported, as a pair (float, list of strings)
+
+    The module is imported by a new Python process (in the folder of the
+    game), so nothing is imported yet and the time is that of a cold start.
+
+    Parameter module: the name of the module
+    Precondition: module is the name of a module of the game
+    """
+    folder = os.path.dirname(os.path.abspath(__file__))
+    output = subprocess.run([sys.executable, '-c',
+                             IMPORT_SCRIPT % (module, GRAPHICS_MODULES)],
+                            cwd=folder, capture_output=True, text=True,
+                            check=True).stdout.split()
+    return float(output[0]), output[1:]
+
+
+def checkImports(modules=HEADLESS_MODULES):
+    """
+    Returns: the time (in seconds) of importing every module, as a dict
+
+    This function fails (with an AssertionError) if any of the modules
+    imports a graphics module (see GRAPHICS_MODULES), as then it could not
+    run headless, and would start as slowly as the game.
+
+    Parameter modules: the names of the modules to check
+    Precondition: modules is a tuple of names of modules of the game
+    """
+    result = {}
+    for module in modules:
+        seconds, graphics = measureImport(module)
+        assert not graphics, module + " imports " + ', '.join(graphics)
+        result[module] = seconds
+    return result
+
+
+# Script code
+if __name__ == '__main__':
+    try:
+        worst = checkAllocations()
+        imports = checkImports()
+    except AssertionError as e:
+        print('FAILED:', e)
+        sys.exit(1)
+    print('OK: no simulation tick allocated more than', worst, 'bytes (budget',
+          ALLOCATION_BUDGET, 'bytes)')
+    print('OK: no headless module imports the graphics (import ' +
+          ', '.join('%s %.1fms' % (module, seconds * 1e3)
+                    for module, seconds in imports.items()) + ')')
@@ -0,0 +1,321 @@
+"""
+Profiler module for Alien Invaders
+
+This module contains the class FrameProfiler, which times every phase of a
+frame of the game (see PROFILE_PHASES) and counts what the frame worked on,
+like the number of aliens on screen or the collision checks of the bolts.
+
+Only the last PROFILE_FRAMES frames are kept, so the percentiles (p50, p95
+and p99) always describe how the game is running now. A stutter shows up as
+a p99 far above the p50, and the phases say where the time went.
+
+It also keeps how long the game took to start: the time from launch to the
+first frame on screen, and to the end of loading the assets.
+
+A FrameProfiler does not touch game2d, so a headless Simulation can report
+to it as well. Invaders shows it on screen (see Overlay in hud.py) and
+writes it to PROFILE_FILE as JSON when the game exits, if that is set (with
+the command line argument profile=<file>).
+"""
+from consts import *
+from array import array
+import json
+import time
+
+# PRIMARY RULE: Profiler may only access consts.py. Invaders, Wave and
+# Simulation tell it what they did.
+
+
+class FrameProfiler(object):
+    """
+    A class to time the phases of every frame, and count what it did.
+
+    Every frame starts with beginFrame and ends with endFrame. In between, a
+    phase is timed with begin and end (or its time is given with add), and
+    a counter is raised with count (or set with setCounter). A phase timed
+    more than once in a frame (like collisions, once per bolt) adds up. The
+    phase "frame" is timed from beginFrame to endFrame.
+
+    The times are measured with time.perf_counter, a monotonic clock.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _size: the number of frames kept
+    # Invariant: _size is an int > 0
+    #
+    # Attribute _times: the time of every phase in the last frames, as a
+    # ring (frame n is at n % _size)
+    # Invariant: _times is a dict mapping every phase in PROFILE_PHASES to an
+    # array of _size floats (seconds)
+    #
+    # Attribute _current: the time of every phase in the current frame
+    # Invariant: _current is a dict mapping the phases of _times to floats
+    #
+    # Attribute _marks: when the phases being timed began
+    # Invariant: _marks is a dict mapping phases to perf_counter times
+    #
+    # Attribute _counters: the counters of the current frame
+    # Invariant: _counters is a dict mapping strings to ints
+    #
+    # Attribute _last: the counters of the last complete frame
+    # Invariant: _last is a dict mapping strings to ints
+    #
+    # Attribute _peaks: the largest value of every counter in a frame
+    # Invariant: _peaks is a dict mapping strings to ints
+    #
+    # Attribute _totals: the sum of every counter over all frames
+    # Invariant: _totals is a dict mapping strings to ints
+    #
+    # Attribute _frames: the number of complete frames
+    # Invariant: _frames is an int >= 0
+    #
+    # Attribute _startup: how long the game took to reach the milestones of
+    # its startup (like the first frame), by name
+    # Invariant: _startup is a dict mapping strings to floats (seconds)
+
+    def getFrames(self):
+        """
+        Returns: the number of frames profiled so far
+        """
+        return self._frames
+
+    def getCounter(self, name):
+        """
+        Returns: the value of a counter in the last complete frame (0 if it
+        was never counted)
+
+        Parameter name: the name of the counter
+        Precondition: name is a string
+        """
+        return self._last.get(name, 0)
+
+    def getStartup(self, name):
+        """
+        Returns: the time (in seconds since launch) a milestone of the startup
+        was reached, or None if it was not reached
+
+        Parameter name: the name of the milestone
+        Precondition: name is a string
+        """
+        return self._startup.get(name)
+
+    def setStartup(self, name, seconds):
+        """
+        Returns: Nothing
+
+        This method records when a milestone of the startup was reached (like
+        the first frame, or the end of loading the assets)
+
+        Parameter name: the name of the milestone
+        Precondition: name is a string
+
+        Parameter seconds: the time since launch
+        Precondition: seconds is a float >= 0
+        """
+        self._startup[name] = seconds
+
+    def __init__(self, size=PROFILE_FRAMES):
+        """
+        Initializes a profiler with no frames.
+
+        Parameter size: the number of frames to keep
+        Precondition: size is an int > 0
+        """
+        if VALIDATION >= VALIDATE_BOUNDARY:
+            assert isinstance(size, int) and size > 0, \
+                "size is not an int > 0"
+        self._size = size
+        self._times = {}
+        self._current = {}
+        for phase in PROFILE_PHASES:
+            self._times[phase] = array('d', [0.0]) * size
+            self._current[phase] = 0.0
+        self._marks = {}
+        self._counters = {}
+        self._last = {}
+        self._peaks = {}
+        self._totals = {}
+        self._frames = 0
+        self._startup = {}
+
+    # METHODS TO PROFILE A FRAME
+    def beginFrame(self):
+        """
+        Returns: Nothing
+
+        This method starts a new frame, with no time in any phase and every
+        counter at 0
+        """
+        for phase in self._current:
+            self._current[phase] = 0.0
+        self._counters.clear()
+        self._marks.clear()
+        self._marks['frame'] = time.perf_counter()
+
+    def endFrame(self):
+        """
+        Returns: Nothing
+
+        This method ends the frame, and keeps its times and counters. It does
+        nothing if no frame was begun.
+        """
+        if 'frame' not in self._marks:
+            return
+        self.end('frame')
+        slot = self._frames % self._size
+        for phase, seconds in self._current.items():
+            self._times[phase][slot] = seconds
+        self._last, self._counters = self._counters, self._last
+        for name, value in self._last.items():
+            self._totals[name] = self._totals.get(name, 0) + value
+            if value > self._peaks.get(name, 0):
+                self._peaks[name] = value
+        self._frames += 1
+
+    def begin(self, phase):
+        """
+        Returns: Nothing
+
+        This method starts timing a phase of the frame
+
+        Parameter phase: the phase
+        Precondition: phase is in PROFILE_PHASES
+        """
+        self._marks[phase] = time.perf_counter()
+
+    def end(self, phase):
+        """
+        Returns: Nothing
+
+        This method stops timing a phase of the frame, and adds the time
+        since begin to it
+
+        Parameter phase: the phase
+        Precondition: phase is in PROFILE_PHASES, and begin was called for it
+        """
+        self._current[phase] += time.perf_counter() - self._marks.pop(phase)
+
+    def add(self, phase, seconds):
+        """
+        Returns: Nothing
+
+        This method adds time to a phase of the frame
+
+        Parameter phase: the phase
+        Precondition: phase is in PROFILE_PHASES
+
+        Parameter seconds: the time to add
+        Precondition: seconds is a float >= 0
+        """
+        self._current[phase] += seconds
+
+    def count(self, name, amount=1):
+        """
+        Returns: Nothing
+
+        This method raises a counter of the frame
+
+        Parameter name: the name of the counter
+        Precondition: name is a string
+
+        Parameter amount: how much to raise it by
+        Precondition: amount is an int >= 0
+        """
+        self._counters[name] = self._counters.get(name, 0) + amount
+
+    def setCounter(self, name, value):
+        """
+        Returns: Nothing
+
+        This method sets a counter of the frame (like the number of aliens
+        on screen, which is not added up during the frame)
+
+        Parameter name: the name of the counter
+        Precondition: name is a string
+
+        Parameter value: the value of the counter
+        Precondition: value is an int >= 0
+        """
+        self._counters[name] = value
+
+    # METHODS TO REPORT THE PROFILE
+    def getPercentile(self, phase, percent):
+        """
+        Returns: the time (in seconds) that percent of the kept frames spent
+        at most in a phase, or 0.0 if there are no frames
+
+        Parameter phase: the phase
+        Precondition: phase is in PROFILE_PHASES
+
+        Parameter percent: the percentile
+        Precondition: percent is a number in 0..100
+        """
+        count = min(self._frames, self._size)
+        if count == 0:
+            return 0.0
+        times = sorted(self._times[phase][:count])
+        rank = max(0, -(-percent * count // 100) - 1)
+        return times[int(rank)]
+
+    def getSummary(self):
+        """
+        Returns: the profile as a dict (that can be written as JSON)
+
+        For every phase, it has the p50, p95, p99 and largest time (in
+        milliseconds) over the kept frames. For every counter, it has the
+        value of the last frame, the largest value in a frame, and the mean
+        over all frames. The milestones of the startup are in milliseconds
+        since launch.
+        """
+        count = min(self._frames, self._size)
+        phases = {}
+        for phase in PROFILE_PHASES:
+            phases[phase] = {
+                'p50': self.getPercentile(phase, 50) * 1e3,
+                'p95': self.getPercentile(phase, 95) * 1e3,
+                'p99': self.getPercentile(phase, 99) * 1e3,
+                'max': max(self._times[phase][:count], default=0.0) * 1e3}
+        counters = {}
+        for name in sorted(self._totals):
+            counters[name] = {'last': self._last.get(name, 0),
+                              'max': self._peaks.get(name, 0),
+                              'mean': self._totals[name] / self._frames}
+        startup = {}
+        for name, seconds in self._startup.items():
+            startup[name] = seconds * 1e3
+        return {'frames': self._frames, 'kept': count, 'phases': phases,
+                'counters': counters, 'startup': startup}
+
+    def toText(self):
+        """
+        Returns: the profile as a few lines of text, for the overlay
+
+        There is a line with the p50, p95 and p99 (in milliseconds) of every
+        phase, then a line with the counters of the last frame, and a line
+        with the milestones of the startup (once there are any).
+        """
+        lines = ['%-12s %6s %6s %6s' % ('ms', 'p50', 'p95', 'p99')]
+        for phase in PROFILE_PHASES:
+            lines.append('%-12s %6.2f %6.2f %6.2f' %
+                         (phase, self.getPercentile(phase, 50) * 1e3,
+                          self.getPercentile(phase, 95) * 1e3,
+                          self.getPercentile(phase, 99) * 1e3))
+        lines.append(' '.join(name + ' ' + str(self._last[name])
+                              for name in sorted(self._last)))
+        if self._startup:
+            lines.append('startup ' + ' '.join(
+                '%s %.0fms' % (name, seconds * 1e3)
+                for name, seconds in sorted(self._startup.items(),
+                                            key=lambda item: item[1])))
+        return '\n'.join(lines)
+
+    def save(self, path):
+        """
+        Returns: Nothing
+
+        This method writes the profile (see getSummary) to a file as JSON
+
+        Parameter path: the file to write
+        Precondition: path is a string, a file that can be written
+        """
+        with open(path, 'w') as file:
+            json.dump(self.getSummary(), file, indent=1, sort_keys=True)
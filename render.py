@@ -0,0 +1,451 @@
+"""
+Render module for Alien Invaders
+
+This module contains the classes that draw many sprites at once. game2d draws
+every GObject on its own: each GImage binds its own texture and is its own
+draw call. That is fine for a few objects, but a wave has one image per alien
+and per bolt.
+
+Instead, a TextureAtlas packs every sprite of the game (the aliens, the ship
+and the bolt) into a single texture, and a SpriteBatch collects all of the
+sprites of a frame into a single Kivy mesh on that texture. The number of
+draw calls then no longer depends on the number of aliens or bolts.
+
+Things that hardly ever change (the background, the messages and the
+defensive line) are drawn once into a StaticLayer, a texture that is put on
+screen as a single rectangle every frame. They are only drawn again when
+they change.
+
+These classes use Kivy (which game2d is built on) directly, so they only work
+inside a running game.
+"""
+from consts import *
+from assets import TextureCache
+from kivy.graphics import InstructionGroup, Color, Mesh, Rectangle, Fbo
+from kivy.graphics import PushMatrix, PopMatrix, Translate
+from kivy.graphics import ClearColor, ClearBuffers
+from kivy.graphics.texture import Texture
+
+# PRIMARY RULE: Render may only access consts.py, assets.py and Kivy. Wave
+# tells it what to draw and where.
+
+
+class TextureAtlas(object):
+    """
+    A class to hold every sprite of the game in a single texture.
+
+    The images are packed side by side (with a gap between them, so that
+    they do not bleed into each other). The bolt, which is a plain yellow
+    rectangle, is a small yellow square in the atlas. Every sprite is known
+    by its name: the file name of its image, or "bolt" for the bolt.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _texture: the texture with every sprite
+    # Invariant: _texture is a Kivy Texture
+    #
+    # Attribute _regions: the texture coordinates of every sprite
+    # Invariant: _regions is a dict mapping names to (u0, v0, u1, v1) tuples
+    # of floats in 0..1 (left, bottom, right, top)
+
+    # The space between two images in the atlas
+    GAP = 2
+
+    # The size of the bolt square in the atlas
+    BOLT = 4
+
+    def getTexture(self):
+        """
+        Returns: the texture with every sprite
+        """
+        return self._texture
+
+    def getRegion(self, name):
+        """
+        Returns: the texture coordinates (u0, v0, u1, v1) of a sprite
+
+        Parameter name: the name of the sprite
+        Precondition: name is a sprite of this atlas
+        """
+        return self._regions[name]
+
+    def __init__(self, images=ALIEN_IMAGES + ('ship.png',), textures=None):
+        """
+        Initializes an atlas by loading and packing the images.
+
+        The images are decoded through the texture cache, so a new atlas
+        (or a wave drawn without one) does not decode them again.
+
+        Parameter images: the file names of the images to pack
+        Precondition: images is a tuple of file names in the Images folder
+
+        Parameter textures: the cache to load the images from
+        Precondition: textures is a TextureCache object or None (use a
+        cache of its own)
+        """
+        if VALIDATION >= VALIDATE_BOUNDARY:
+            assert textures is None or isinstance(textures, TextureCache), \
+                "textures given is not a TextureCache"
+        if textures is None:
+            textures = TextureCache()
+        sources = []
+        for name in images:
+            texture = textures.acquire(name)
+            sources.append((name, texture.width, texture.height,
+                            texture.pixels))
+            textures.release(name)
+        bolt = bytes((255, 255, 0, 255)) * (self.BOLT * self.BOLT)
+        sources.append(('bolt', self.BOLT, self.BOLT, bolt))
+
+        width = sum(w for _, w, _, _ in sources) + self.GAP * len(sources)
+        height = max(h for _, _, h, _ in sources)
+        pixels = bytearray(width * height * 4)
+        self._regions = {}
+        left = 0
+        for name, w, h, data in sources:
+            line = w * 4
+            for row in range(h):
+                start = (row * width + left) * 4
+                pixels[start:start + line] = data[row * line:(row + 1) * line]
+            self._regions[name] = (left / width, 0, (left + w) / width,
+                                   h / height)
+            left += w + self.GAP
+
+        # Only sample the middle of the bolt, so its edges do not blur
+        u0, v0, u1, v1 = self._regions['bolt']
+        du = (u1 - u0) / 4
+        dv = (v1 - v0) / 4
+        self._regions['bolt'] = (u0 + du, v0 + dv, u1 - du, v1 - dv)
+
+        self._texture = Texture.create(size=(width, height), colorfmt='rgba')
+        self._texture.mag_filter = 'nearest'
+        self._texture.min_filter = 'nearest'
+        self._texture.blit_buffer(bytes(pixels), colorfmt='rgba',
+                                  bufferfmt='ubyte')
+
+
+class SpriteBatch(object):
+    """
+    A class to draw many sprites of a TextureAtlas as a single mesh.
+
+    A batch has a fixed capacity, and its vertex and index lists are made
+    once, at that size. Every frame, call begin, then add for every sprite,
+    then end, and finally draw. The quads past the last sprite added are
+    collapsed to a point, so they draw nothing.
+
+    A batch whose sprites hardly change (like the aliens, which only ever
+    move all together) does not have to be rebuilt every frame. Its sprites
+    can be added once, hidden one at a time as they go away (see hide), and
+    moved all together with setOrigin, which costs nothing per sprite.
+
+    The indices of a Kivy mesh are 16 bits, so a mesh can have at most
+    MESH_QUADS quads. A batch with more sprites than that (a formation of
+    thousands of aliens) is drawn as several meshes, still on one texture.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _atlas: the sprites to draw from
+    # Invariant: _atlas is a TextureAtlas
+    #
+    # Attribute _capacity: the most sprites the batch can draw at once
+    # Invariant: _capacity is an int >= 0
+    #
+    # Attribute _vertices: x, y, u, v of the four corners of every quad
+    # Invariant: _vertices is a list of 16*_capacity floats
+    #
+    # Attribute _count: the number of sprites added since begin
+    # Invariant: _count is an int in 0.._capacity
+    #
+    # Attribute _last: the number of sprites drawn in the previous frame
+    # Invariant: _last is an int in 0.._capacity
+    #
+    # Attribute _meshes: the meshes drawing the quads, MESH_QUADS at a time
+    # Invariant: _meshes is a non-empty list of Kivy Meshes on the texture of
+    # _atlas
+    #
+    # Attribute _translate: the offset of every sprite (see setOrigin)
+    # Invariant: _translate is a Kivy Translate
+    #
+    # Attribute _group: the Kivy instructions to add to the view
+    # Invariant: _group is an InstructionGroup with _translate, a Color and
+    # _meshes (between a PushMatrix and a PopMatrix)
+
+    # The most quads in one mesh (so that every index fits in 16 bits)
+    MESH_QUADS = 65536 // 4
+
+    def getCapacity(self):
+        """
+        Returns: the most sprites the batch can draw at once
+        """
+        return self._capacity
+
+    def getCount(self):
+        """
+        Returns: the number of sprites added since begin
+        """
+        return self._count
+
+    def __init__(self, atlas, capacity):
+        """
+        Initializes an empty batch.
+
+        Parameter atlas: the sprites to draw from
+        Precondition: atlas is a TextureAtlas
+
+        Parameter capacity: the most sprites the batch can draw at once
+        Precondition: capacity is an int >= 0
+        """
+        if VALIDATION >= VALIDATE_BOUNDARY:
+            assert isinstance(atlas, TextureAtlas), \
+                "atlas is not a TextureAtlas"
+            assert isinstance(capacity, int) and capacity >= 0, \
+                "capacity is not an int >= 0"
+        self._atlas = atlas
+        self._capacity = capacity
+        self._vertices = [0.0] * (16 * capacity)
+        indices = []
+        for quad in range(min(capacity, self.MESH_QUADS)):
+            i = 4 * quad
+            indices.extend((i, i + 1, i + 2, i + 2, i + 3, i))
+        self._count = 0
+        self._last = 0
+        self._meshes = []
+        for first in range(0, max(capacity, 1), self.MESH_QUADS):
+            last = min(capacity, first + self.MESH_QUADS)
+            mesh = Mesh(vertices=self._vertices[16 * first:16 * last],
+                        indices=indices[:6 * (last - first)],
+                        mode='triangles', texture=atlas.getTexture())
+            self._meshes.append(mesh)
+        self._translate = Translate(0, 0)
+        self._group = InstructionGroup()
+        self._group.add(PushMatrix())
+        self._group.add(self._translate)
+        self._group.add(Color(1, 1, 1, 1))
+        for mesh in self._meshes:
+            self._group.add(mesh)
+        self._group.add(PopMatrix())
+
+    def begin(self):
+        """
+        Returns: Nothing
+
+        This method starts a new frame, with no sprites
+        """
+        self._count = 0
+
+    def add(self, name, x, y, width, height):
+        """
+        Returns: Nothing
+
+        This method adds a sprite to the frame. Sprites past the capacity of
+        the batch are ignored.
+
+        Parameter name: the name of the sprite in the atlas
+        Precondition: name is a sprite of the atlas
+
+        Parameter x: the x-coordinate of the center of the sprite
+        Precondition: x is an int or float
+
+        Parameter y: the y-coordinate of the center of the sprite
+        Precondition: y is an int or float
+
+        Parameter width: the width of the sprite
+        Precondition: width is an int or float > 0
+
+        Parameter height: the height of the sprite
+        Precondition: height is an int or float > 0
+        """
+        if self._count == self._capacity:
+            return
+        u0, v0, u1, v1 = self._atlas.getRegion(name)
+        left = x - width / 2
+        right = x + width / 2
+        bottom = y - height / 2
+        top = y + height / 2
+        v = self._vertices
+        i = 16 * self._count
+        v[i] = left
+        v[i + 1] = bottom
+        v[i + 2] = u0
+        v[i + 3] = v0
+        v[i + 4] = right
+        v[i + 5] = bottom
+        v[i + 6] = u1
+        v[i + 7] = v0
+        v[i + 8] = right
+        v[i + 9] = top
+        v[i + 10] = u1
+        v[i + 11] = v1
+        v[i + 12] = left
+        v[i + 13] = top
+        v[i + 14] = u0
+        v[i + 15] = v1
+        self._count += 1
+
+    def hide(self, index):
+        """
+        Returns: Nothing
+
+        This method collapses a sprite added since begin to a point, so that
+        it draws nothing (after the next call to end). The other sprites keep
+        their places.
+
+        Parameter index: the sprite, in the order it was added
+        Precondition: index is an int in 0..getCount()-1
+        """
+        v = self._vertices
+        for i in range(16 * index, 16 * index + 16):
+            v[i] = 0.0
+
+    def setOrigin(self, x, y):
+        """
+        Returns: Nothing
+
+        This method moves every sprite of the batch by (x, y) from where it
+        was added. Nothing has to be sent to the meshes again.
+
+        Parameter x: the horizontal offset
+        Precondition: x is an int or float
+
+        Parameter y: the vertical offset
+        Precondition: y is an int or float
+        """
+        self._translate.xy = (x, y)
+
+    def end(self):
+        """
+        Returns: Nothing
+
+        This method sends the sprites of the frame to the meshes
+        """
+        if self._count < self._last:
+            v = self._vertices
+            for i in range(16 * self._count, 16 * self._last):
+                v[i] = 0.0
+        self._last = self._count
+        if len(self._meshes) == 1:
+            self._meshes[0].vertices = self._vertices
+            return
+        step = 16 * self.MESH_QUADS
+        for i in range(len(self._meshes)):
+            self._meshes[i].vertices = self._vertices[i * step:(i + 1) * step]
+
+    def draw(self, view):
+        """
+        Returns: Nothing
+
+        This method draws the sprites (as of the last call to end)
+
+        Parameter: the window to draw objects in
+        Precondition: view is a valid window
+        """
+        view.draw(self._group)
+
+
+class StaticLayer(object):
+    """
+    A class to draw the things that rarely change once, into a texture.
+
+    A layer can be used as the view of GObject.draw: anything drawn to it
+    between begin and end is rendered into the texture of the layer (an
+    offscreen frame buffer). Method composite then puts that texture on
+    screen, which costs a single rectangle however much was drawn into it.
+
+    The layer does not know when what it holds is out of date. Whoever draws
+    into it calls invalidate when something changes, and draws it again
+    (begin, draw, end) while it is dirty.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _fbo: the frame buffer the layer is drawn into
+    # Invariant: _fbo is a Kivy Fbo the size of the game
+    #
+    # Attribute _group: the Kivy instructions to add to the view
+    # Invariant: _group is an InstructionGroup with a Color and a Rectangle
+    # showing the texture of _fbo
+    #
+    # Attribute _dirty: whether the layer has to be drawn again
+    # Invariant: _dirty is a bool
+
+    def isDirty(self):
+        """
+        Returns: True if the layer has to be drawn again, False otherwise
+        """
+        return self._dirty
+
+    def getTexture(self):
+        """
+        Returns: the texture the layer is drawn into
+        """
+        return self._fbo.texture
+
+    def __init__(self, width=GAME_WIDTH, height=GAME_HEIGHT):
+        """
+        Initializes an empty (and dirty) layer.
+
+        Parameter width: the width of the layer
+        Precondition: width is an int > 0
+
+        Parameter height: the height of the layer
+        Precondition: height is an int > 0
+        """
+        if VALIDATION >= VALIDATE_BOUNDARY:
+            assert isinstance(width, int) and width > 0, \
+                "width is not an int > 0"
+            assert isinstance(height, int) and height > 0, \
+                "height is not an int > 0"
+        self._fbo = Fbo(size=(width, height))
+        self._group = InstructionGroup()
+        self._group.add(Color(1, 1, 1, 1))
+        self._group.add(Rectangle(texture=self._fbo.texture, pos=(0, 0),
+                                  size=(width, height)))
+        self._dirty = True
+
+    def invalidate(self):
+        """
+        Returns: Nothing
+
+        This method marks the layer as out of date
+        """
+        self._dirty = True
+
+    def begin(self):
+        """
+        Returns: Nothing
+
+        This method empties the layer, to draw it again
+        """
+        self._fbo.clear()
+        with self._fbo:
+            ClearColor(0, 0, 0, 0)
+            ClearBuffers()
+
+    def draw(self, cmd):
+        """
+        Returns: Nothing
+
+        This method adds Kivy instructions to the layer. It is what GObject
+        calls when the layer is passed to it as the view.
+
+        Parameter cmd: the instructions to draw
+        Precondition: cmd is a Kivy graphics instruction
+        """
+        self._fbo.add(cmd)
+
+    def end(self):
+        """
+        Returns: Nothing
+
+        This method renders everything drawn since begin into the texture,
+        and marks the layer as up to date
+        """
+        self._fbo.draw()
+        self._dirty = False
+
+    def composite(self, view):
+        """
+        Returns: Nothing
+
+        This method puts the layer (as of the last call to end) on screen
+
+        Parameter: the window to draw objects in
+        Precondition: view is a valid window
+        """
+        view.draw(self._group)
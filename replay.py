@@ -0,0 +1,772 @@
+"""
+Replay module for Alien Invaders
+
+This module contains the tools to play a wave again exactly as it was played.
+A Simulation with a given seed plays the same game for the same input every
+tick (see simulation.py), so a Recording only has to keep the settings of the
+wave, its seed and the keys held during every tick.
+
+The keys held are kept as runs: a run is an input and the number of ticks in
+a row it was held for. A player holds the same keys for many ticks at a time,
+so the input of a wave of a few minutes takes a kilobyte or two. Every so
+often (every REPLAY_KEYFRAME_TICKS ticks) the recording also keeps a
+keyframe, a snapshot of the whole simulation (about 3 kilobytes), so that a
+replay can start from any tick without playing every tick before it.
+
+A replay file is written as the wave is played. It starts with a header (see
+HEADER) followed by records, in the order they happened:
+
+    run:       the input (one byte, 0..7), then the number of ticks
+    keyframe:  the byte 0xFF, then the tick, the size and the snapshot
+    end:       the byte 0xFE
+
+Numbers in records are written as varints (7 bits a byte, lowest first, the
+high bit set on every byte but the last). Wave records every wave it plays
+(see Wave.getRecording), in REPLAY_FOLDER if it is not None. To play a saved
+recording again, without a window:
+
+    python replay.py file [tick]
+
+This prints how the wave ended (or what it was like at the given tick), and
+how long the replay took.
+"""
+from consts import *
+from simulation import Simulation
+from array import array
+from bisect import bisect_right
+import struct
+import sys
+import time
+
+# PRIMARY RULE: Replay may only access consts.py and simulation.py. It must
+# never import game2d, or it cannot run headless.
+
+# The header of a replay file: magic, version, seed, rows, columns, ship x,
+# alien speed, defensive line, lives and keyframe interval
+HEADER = struct.Struct('<4sBQHHddHBI')
+
+# The headers of the older versions of the file format, which can still be
+# read (version 1 kept the seed in 32 bits)
+OLD_HEADERS = {1: struct.Struct('<4sBIHHddHBI')}
+
+# The first bytes of every replay file
+MAGIC = b'AIRP'
+
+# The version of the file format
+VERSION = 2
+
+# The first byte of a keyframe record
+TAG_KEYFRAME = 0xFF
+
+# The byte that ends a replay file
+TAG_END = 0xFE
+
+
+def encode(input, fire):
+    """
+    Returns: the keys held during a tick, as an int of INPUT bits
+
+    Parameter input: the direction the ship moves in
+    Precondition: input is "right", "left" or None
+
+    Parameter fire: whether the player fires
+    Precondition: fire is a bool
+    """
+    mask = 0
+    if input == "left":
+        mask |= INPUT_LEFT
+    elif input == "right":
+        mask |= INPUT_RIGHT
+    if fire:
+        mask |= INPUT_FIRE
+    return mask
+
+
+def direction(mask):
+    """
+    Returns: the direction the ship moves in for the keys held, or None
+
+    Parameter mask: the keys held during a tick
+    Precondition: mask is an int of INPUT bits
+    """
+    if mask & INPUT_LEFT:
+        return "left"
+    if mask & INPUT_RIGHT:
+        return "right"
+    return None
+
+
+def putVarint(buffer, value):
+    """
+    Returns: Nothing
+
+    This function adds a number to the end of a buffer, as a varint
+
+    Parameter buffer: the bytes to add to
+    Precondition: buffer is a bytearray
+
+    Parameter value: the number to add
+    Precondition: value is an int >= 0
+    """
+    while value >= 0x80:
+        buffer.append(value & 0x7F | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def getVarint(data, pos):
+    """
+    Returns: the varint at a position of the data, and the position after it
+
+    Parameter data: the bytes to read from
+    Precondition: data is bytes or a bytearray
+
+    Parameter pos: the position of the varint
+    Precondition: pos is an int, the start of a varint in data
+    """
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+class Recording(object):
+    """
+    A class to represent the input of a single wave, tick by tick.
+
+    A recording is made with the settings of a Simulation. After that, record
+    is called once for every tick the simulation plays, with the input of
+    that tick (before the tick is played). If the recording is made with the
+    simulation itself, it adds a keyframe every REPLAY_KEYFRAME_TICKS ticks.
+
+    If the recording is made with a path, it is written to that file while
+    it is being made. The records are collected in memory and written
+    REPLAY_BUFFER bytes at a time (a run is only written once it is over), so
+    writing never holds up a frame for long. Call close when the wave is
+    over, to write the rest of the file. The keyframes of such a recording
+    are not kept in memory: they are written right away, and getKeyframe
+    reads them back from the file.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _seed: the seed of the simulation
+    # Invariant: _seed is an int >= 0
+    #
+    # Attribute _rows: the number of rows of aliens
+    # Invariant: _rows is an int >= 0
+    #
+    # Attribute _cols: the number of aliens in a row
+    # Invariant: _cols is an int >= 0
+    #
+    # Attribute _x: the x-coordinate the ship starts at
+    # Invariant: _x is an int or float in 0..GAME_WIDTH
+    #
+    # Attribute _dline: the y-coordinate of the defensive line
+    # Invariant: _dline is an int >= 0
+    #
+    # Attribute _lives: the number of lives the ship starts with
+    # Invariant: _lives is an int in 0..SHIP_LIVES
+    #
+    # Attribute _speed: the number of seconds between alien steps
+    # Invariant: _speed is a float > 0
+    #
+    # Attribute _interval: the number of ticks between two keyframes
+    # Invariant: _interval is an int >= 0 (0 for no keyframes)
+    #
+    # Attribute _sim: the simulation to take keyframes of
+    # Invariant: _sim is a Simulation object, or None (no keyframes)
+    #
+    # Attribute _masks: the input of every run
+    # Invariant: _masks is a bytearray of INPUT masks
+    #
+    # Attribute _counts: the number of ticks of every run
+    # Invariant: _counts is an array of ints > 0, as long as _masks
+    #
+    # Attribute _starts: the first tick of every run
+    # Invariant: _starts is an array of ints, as long as _masks, with
+    # _starts[i+1] == _starts[i] + _counts[i]
+    #
+    # Attribute _open: whether the last run can still get longer
+    # Invariant: _open is a bool (False if there are no runs)
+    #
+    # Attribute _ticks: the number of ticks recorded
+    # Invariant: _ticks is an int, the sum of _counts
+    #
+    # Attribute _keyTicks: the tick of every keyframe
+    # Invariant: _keyTicks is an array of ints, in increasing order
+    #
+    # Attribute _keyData: the snapshot of every keyframe
+    # Invariant: _keyData is a list of bytes, as long as _keyTicks (empty if
+    # _path is not None)
+    #
+    # Attribute _keyPos: where the snapshot of every keyframe is in the file
+    # Invariant: _keyPos is an array of ints, as long as _keyTicks (empty if
+    # _path is None)
+    #
+    # Attribute _keySize: the size of the snapshot of every keyframe
+    # Invariant: _keySize is an array of ints, as long as _keyPos
+    #
+    # Attribute _path: the file the recording is written to
+    # Invariant: _path is a string, or None (the recording is in memory)
+    #
+    # Attribute _file: the file the recording is written to, while it is open
+    # Invariant: _file is a file open for binary reading and writing, or None
+    #
+    # Attribute _buffer: the records not yet written to _file
+    # Invariant: _buffer is a bytearray (empty if _file is None)
+
+    def getSeed(self):
+        """
+        Returns: the seed of the simulation
+        """
+        return self._seed
+
+    def getRows(self):
+        """
+        Returns: the number of rows of aliens
+        """
+        return self._rows
+
+    def getCols(self):
+        """
+        Returns: the number of aliens in a row
+        """
+        return self._cols
+
+    def getSpeed(self):
+        """
+        Returns: the number of seconds between alien steps
+        """
+        return self._speed
+
+    def getTicks(self):
+        """
+        Returns: the number of ticks recorded
+        """
+        return self._ticks
+
+    def getRuns(self):
+        """
+        Returns: the number of runs (of ticks with the same input) recorded
+        """
+        return len(self._masks)
+
+    def getRun(self, run):
+        """
+        Returns: the first tick of a run
+
+        Parameter run: the number of the run
+        Precondition: run is an int in 0..getRuns()-1
+        """
+        return self._starts[run]
+
+    def getRunLength(self, run):
+        """
+        Returns: the number of ticks of a run
+
+        Parameter run: the number of the run
+        Precondition: run is an int in 0..getRuns()-1
+        """
+        return self._counts[run]
+
+    def getRunInput(self, run):
+        """
+        Returns: the keys held during a run, as an int of INPUT bits
+
+        Parameter run: the number of the run
+        Precondition: run is an int in 0..getRuns()-1
+        """
+        return self._masks[run]
+
+    def findRun(self, tick):
+        """
+        Returns: the number of the run a tick is in
+
+        Parameter tick: the number of the tick
+        Precondition: tick is an int in 0..getTicks()-1
+        """
+        return bisect_right(self._starts, tick) - 1
+
+    def getInput(self, tick):
+        """
+        Returns: the keys held during a tick, as an int of INPUT bits
+
+        Parameter tick: the number of the tick
+        Precondition: tick is an int in 0..getTicks()-1
+        """
+        return self._masks[self.findRun(tick)]
+
+    def getKeyframes(self):
+        """
+        Returns: the number of keyframes recorded
+        """
+        return len(self._keyTicks)
+
+    def findKeyframe(self, tick):
+        """
+        Returns: the number of the last keyframe at or before a tick, or -1
+
+        Parameter tick: the number of the tick
+        Precondition: tick is an int >= 0
+        """
+        return bisect_right(self._keyTicks, tick) - 1
+
+    def getKeyframeTick(self, key):
+        """
+        Returns: the tick a keyframe was taken at (before it was played)
+
+        Parameter key: the number of the keyframe
+        Precondition: key is an int in 0..getKeyframes()-1
+        """
+        return self._keyTicks[key]
+
+    def getKeyframe(self, key):
+        """
+        Returns: the snapshot of a keyframe (see Simulation.snapshot)
+
+        If the recording is written to a file, the snapshot is read back
+        from it.
+
+        Parameter key: the number of the keyframe
+        Precondition: key is an int in 0..getKeyframes()-1
+        """
+        if self._path is None:
+            return self._keyData[key]
+        if self._file is None:
+            with open(self._path, 'rb') as file:
+                file.seek(self._keyPos[key])
+                return file.read(self._keySize[key])
+        self.flush()
+        self._file.seek(self._keyPos[key])
+        data = self._file.read(self._keySize[key])
+        self._file.seek(0, 2)
+        return data
+
+    def __init__(self, seed, rows, cols, x, dline, lives, speed=ALIEN_SPEED,
+                 sim=None, path=None, interval=REPLAY_KEYFRAME_TICKS):
+        """
+        Initializes a recording with no ticks.
+
+        The first parameters are the ones the Simulation was made with.
+
+        Parameter seed: the seed of the simulation
+        Precondition: seed is an int >= 0
+
+        Parameter rows: the number of rows of aliens
+        Precondition: rows is an int >= 0
+
+        Parameter cols: the number of aliens in a row
+        Precondition: cols is an int >= 0
+
+        Parameter x: the x-coordinate the ship starts at
+        Precondition: x is an int or float in 0..GAME_WIDTH
+
+        Parameter dline: the y-coordinate of the defensive line
+        Precondition: dline is an int >= 0
+
+        Parameter lives: the number of lives the ship starts with
+        Precondition: lives is an int in 0..SHIP_LIVES
+
+        Parameter speed: the number of seconds between alien steps
+        Precondition: speed is a number (int or float) > 0
+
+        Parameter sim: the simulation to take keyframes of
+        Precondition: sim is a Simulation object with these settings, or
+        None (no keyframes)
+
+        Parameter path: the file to write the recording to
+        Precondition: path is a string, a file that can be written, or None
+        (keep the recording in memory only)
+
+        Parameter interval: the number of ticks between two keyframes
+        Precondition: interval is an int >= 0 (0 for no keyframes)
+        """
+        if VALIDATION >= VALIDATE_BOUNDARY:
+            assert sim is None or isinstance(sim, Simulation), \
+                "sim given is not a Simulation"
+            assert isinstance(interval, int) and interval >= 0, \
+                "interval is not an int >= 0"
+        self._seed = seed
+        self._rows = rows
+        self._cols = cols
+        self._x = x
+        self._dline = dline
+        self._lives = lives
+        self._speed = float(speed)
+        self._interval = interval
+        self._sim = sim
+        self._masks = bytearray()
+        self._counts = array('I')
+        self._starts = array('I')
+        self._open = False
+        self._ticks = 0
+        self._keyTicks = array('I')
+        self._keyData = []
+        self._keyPos = array('Q')
+        self._keySize = array('I')
+        self._buffer = bytearray()
+        self._path = path
+        self._file = None
+        if path is not None:
+            self._file = open(path, 'w+b')
+            self.putHeader(self._buffer)
+            self.flush()
+
+    # METHODS TO RECORD THE TICKS
+    def record(self, input, fire):
+        """
+        Returns: Nothing
+
+        This method adds the input of the next tick (taking a keyframe of
+        the simulation first, if it is time for one)
+
+        Parameter input: the direction the ship moves in
+        Precondition: input is "right", "left" or None
+
+        Parameter fire: whether the player fires
+        Precondition: fire is a bool
+        """
+        if (self._sim is not None and self._interval > 0 and
+                self._ticks % self._interval == 0):
+            self.addKeyframe(self._sim.snapshot())
+        self.extend(encode(input, fire), 1)
+
+    def extend(self, mask, count):
+        """
+        Returns: Nothing
+
+        This method adds a number of ticks with the same input
+
+        Parameter mask: the keys held during the ticks
+        Precondition: mask is an int of INPUT bits
+
+        Parameter count: the number of ticks
+        Precondition: count is an int > 0
+        """
+        if self._open and self._masks[-1] == mask:
+            self._counts[-1] += count
+        else:
+            self.closeRun()
+            self._masks.append(mask)
+            self._counts.append(count)
+            self._starts.append(self._ticks)
+            self._open = True
+        self._ticks += count
+
+    def addKeyframe(self, data):
+        """
+        Returns: Nothing
+
+        This method adds a keyframe at the current tick (the last run is
+        over, so the keyframe falls between two runs)
+
+        Parameter data: the snapshot of the simulation before the tick
+        Precondition: data is bytes made by Simulation.snapshot
+        """
+        self.closeRun()
+        self._keyTicks.append(self._ticks)
+        if self._path is None:
+            self._keyData.append(data)
+        else:
+            self.putKeyframe(self._buffer, self._ticks, data)
+            self._keyPos.append(self._file.tell() + len(self._buffer) -
+                                len(data))
+            self._keySize.append(len(data))
+            self.flush()
+
+    def closeRun(self):
+        """
+        Returns: Nothing
+
+        This method ends the last run (if it is not over), and writes it to
+        the file, if there is one
+        """
+        if self._open:
+            self._open = False
+            if self._file is not None:
+                self.putRun(self._buffer, len(self._masks) - 1)
+                if len(self._buffer) >= REPLAY_BUFFER:
+                    self.flush()
+
+    def flush(self):
+        """
+        Returns: Nothing
+
+        This method writes the records collected so far to the file
+        """
+        if self._file is not None and self._buffer:
+            self._file.write(self._buffer)
+            self._buffer.clear()
+
+    def close(self):
+        """
+        Returns: Nothing
+
+        This method ends the recording and finishes its file (if it has one).
+        Nothing more can be recorded after that. Closing a recording again
+        does nothing.
+        """
+        self.closeRun()
+        if self._file is not None:
+            self._buffer.append(TAG_END)
+            self.flush()
+            self._file.close()
+            self._file = None
+        self._sim = None
+
+    # METHODS TO WRITE THE RECORDS
+    def putHeader(self, buffer):
+        """
+        Returns: Nothing
+
+        This method adds the header of the file to a buffer
+
+        Parameter buffer: the bytes to add to
+        Precondition: buffer is a bytearray
+        """
+        buffer += HEADER.pack(MAGIC, VERSION, self._seed, self._rows,
+                              self._cols, self._x, self._speed, self._dline,
+                              self._lives, self._interval)
+
+    def putRun(self, buffer, run):
+        """
+        Returns: Nothing
+
+        This method adds the record of a run to a buffer
+
+        Parameter buffer: the bytes to add to
+        Precondition: buffer is a bytearray
+
+        Parameter run: the number of the run
+        Precondition: run is an int in 0..getRuns()-1
+        """
+        buffer.append(self._masks[run])
+        putVarint(buffer, self._counts[run])
+
+    def putKeyframe(self, buffer, tick, data):
+        """
+        Returns: Nothing
+
+        This method adds the record of a keyframe to a buffer
+
+        Parameter buffer: the bytes to add to
+        Precondition: buffer is a bytearray
+
+        Parameter tick: the tick the keyframe was taken at
+        Precondition: tick is an int >= 0
+
+        Parameter data: the snapshot of the keyframe
+        Precondition: data is bytes made by Simulation.snapshot
+        """
+        buffer.append(TAG_KEYFRAME)
+        putVarint(buffer, tick)
+        putVarint(buffer, len(data))
+        buffer += data
+
+    def toBytes(self):
+        """
+        Returns: the whole recording in the replay file format, as bytes
+        """
+        buffer = bytearray()
+        self.putHeader(buffer)
+        key = 0
+        for run in range(len(self._masks)):
+            while (key < len(self._keyTicks) and
+                   self._keyTicks[key] <= self._starts[run]):
+                self.putKeyframe(buffer, self._keyTicks[key],
+                                 self.getKeyframe(key))
+                key += 1
+            self.putRun(buffer, run)
+        while key < len(self._keyTicks):
+            self.putKeyframe(buffer, self._keyTicks[key],
+                             self.getKeyframe(key))
+            key += 1
+        buffer.append(TAG_END)
+        return bytes(buffer)
+
+    def save(self, path):
+        """
+        Returns: Nothing
+
+        This method writes the whole recording to a file
+
+        Parameter path: the file to write
+        Precondition: path is a string, a file that can be written
+        """
+        with open(path, 'wb') as file:
+            file.write(self.toBytes())
+
+    def newSimulation(self):
+        """
+        Returns: a new Simulation of the wave, before its first tick
+        """
+        return Simulation(self._rows, self._cols, self._x, self._dline,
+                          self._lives, self._seed, self._speed)
+
+
+def fromBytes(data):
+    """
+    Returns: the recording in the replay file format (see Recording.toBytes)
+
+    A file that was not closed (say, the game crashed) has no end record.
+    Its recording stops at the last complete record.
+
+    Parameter data: the recording
+    Precondition: data is bytes starting with a header of this VERSION (or
+    of one in OLD_HEADERS)
+    """
+    assert data[:len(MAGIC)] == MAGIC, "not a replay file"
+    version = data[len(MAGIC)]
+    header = HEADER if version == VERSION else OLD_HEADERS.get(version)
+    assert header is not None, "replay version " + str(version) + \
+        " is not supported"
+    (magic, version, seed, rows, cols, x, speed, dline, lives,
+     interval) = header.unpack_from(data)
+    result = Recording(seed, rows, cols, x, dline, lives, speed,
+                       interval=interval)
+    pos = header.size
+    try:
+        while data[pos] != TAG_END:
+            if data[pos] == TAG_KEYFRAME:
+                tick, pos = getVarint(data, pos + 1)
+                size, pos = getVarint(data, pos)
+                if pos + size > len(data):
+                    break
+                assert tick == result.getTicks(), "keyframe out of place"
+                result.addKeyframe(bytes(data[pos:pos + size]))
+                pos += size
+            else:
+                count, end = getVarint(data, pos + 1)
+                result.extend(data[pos], count)
+                pos = end
+    except IndexError:
+        pass # The file ends early
+    result.closeRun()
+    return result
+
+
+def load(path):
+    """
+    Returns: the recording saved in a file (see Recording)
+
+    Parameter path: the file to read
+    Precondition: path is a string, a replay file
+    """
+    with open(path, 'rb') as file:
+        return fromBytes(file.read())
+
+
+# FUNCTIONS TO PLAY A RECORDING
+def playTick(sim, mask):
+    """
+    Returns: Nothing
+
+    This function plays a single recorded tick of a simulation, the way
+    Invaders plays it. A destroyed ship costs a life, the bolts are cleared,
+    and the player continues right away. A pause only stops the ticks, so it
+    is not in the recording at all.
+
+    Parameter sim: the simulation to play
+    Precondition: sim is a Simulation object in play (game state 0 or 3)
+
+    Parameter mask: the keys held during the tick
+    Precondition: mask is an int of INPUT bits
+    """
+    if sim.getGameState() == 3:
+        sim.setLives(sim.getLives() - 1)
+        sim.clearBolts()
+        sim.setGameState(0)
+    sim.step(direction(mask), mask & INPUT_FIRE != 0)
+    sim.clearEvents()
+
+
+def play(recording, sim, start, stop):
+    """
+    Returns: Nothing
+
+    This function plays the recorded ticks start..stop-1 of a simulation,
+    as fast as it can (a run at a time)
+
+    Parameter recording: the wave to play again
+    Precondition: recording is a Recording object
+
+    Parameter sim: the simulation to play, in its state before tick start
+    Precondition: sim is a Simulation object of the recording
+
+    Parameter start: the first tick to play
+    Precondition: start is an int >= 0
+
+    Parameter stop: the tick to stop before
+    Precondition: stop is an int in start..recording.getTicks()
+    """
+    tick = start
+    run = recording.findRun(start) if start < stop else 0
+    while tick < stop:
+        mask = recording.getRunInput(run)
+        end = min(recording.getRun(run) + recording.getRunLength(run), stop)
+        while tick < end:
+            playTick(sim, mask)
+            tick += 1
+        run += 1
+
+
+def seek(recording, tick):
+    """
+    Returns: a Simulation in its state right before a tick of a recording
+
+    The simulation starts from the last keyframe before the tick, so at most
+    REPLAY_KEYFRAME_TICKS ticks are played to get there.
+
+    Parameter recording: the wave to play again
+    Precondition: recording is a Recording object
+
+    Parameter tick: the tick to go to
+    Precondition: tick is an int in 0..recording.getTicks()
+    """
+    sim = recording.newSimulation()
+    start = 0
+    key = recording.findKeyframe(tick)
+    if key >= 0:
+        sim.restore(recording.getKeyframe(key))
+        start = recording.getKeyframeTick(key)
+    play(recording, sim, start, tick)
+    return sim
+
+
+def replay(recording):
+    """
+    Returns: a Simulation that played every tick of the recording
+
+    Parameter recording: the wave to play again
+    Precondition: recording is a Recording object
+    """
+    sim = recording.newSimulation()
+    play(recording, sim, 0, recording.getTicks())
+    return sim
+
+
+# Script code
+if __name__ == '__main__':
+    if len(sys.argv) not in (2, 3):
+        print('Usage: python replay.py file [tick]')
+        sys.exit(2)
+    recording = load(sys.argv[1])
+    start = time.perf_counter()
+    if len(sys.argv) == 3:
+        ticks = min(int(sys.argv[2]), recording.getTicks())
+        sim = seek(recording, ticks)
+    else:
+        ticks = recording.getTicks()
+        sim = replay(recording)
+    elapsed = time.perf_counter() - start
+    state = sim.getGameState()
+    print('tick:', ticks, 'of', recording.getTicks(), '  runs:',
+          recording.getRuns(), '  keyframes:', recording.getKeyframes())
+    print('lives:', sim.getLives(), '  aliens left:',
+          sim.getFormation().getCount(), '  result:',
+          'won' if state == 1 else 'lost' if state == 2 else 'in play')
+    print('took', round(elapsed * 1000, 1), 'ms')
@@ -0,0 +1,1984 @@
+"""
+Simulation module for Alien Invaders
+
+This module contains a headless model of a single wave of Alien Invaders.
+The class Simulation plays by exactly the same rules as the subcontroller
+Wave: the aliens march back and forth (and down) across the screen, they fire
+bolts at random, player bolts destroy aliens and alien bolts destroy the ship.
+
+Unlike Wave, nothing in this module touches game2d. Positions are plain
+numbers and the ship and bolts are plain Python objects, so a Simulation can
+be stepped without a window or an audio device (for example on a server, or
+in a balance test that runs thousands of updates a second). Wave owns a
+Simulation and only turns its state into GObjects and sounds.
+
+The aliens are not objects at all. They are stored in a Formation, which keeps
+the grid as a handful of flat arrays (see the class Formation). Collisions
+go through a SpatialHash broadphase: the formation buckets its aliens, and
+the simulation buckets the alien bolts every tick, so a player bolt only
+checks the aliens in its cell and the ship only checks the alien bolts in
+the cells it covers, however many aliens and bolts there are.
+
+Anything that would make a noise is recorded as an event (see the EVENT
+constants in consts.py). The view is expected to read the events after every
+update and then clear them.
+
+A Simulation only moves in fixed ticks of 1/TICK_RATE seconds (see the method
+step), and it makes its random choices with a random number generator of its
+own, made from a seed. Two simulations with the same seed and the same input
+every tick play exactly the same game. A Timestep turns the time between
+frames into a number of ticks, so the game plays at the same speed (and
+exactly the same way) at any frame rate, and a headless run that calls step
+directly matches a windowed one.
+"""
+from consts import *
+from array import array
+import random
+import struct
+import time
+
+# PRIMARY RULE: Simulation may only access consts.py. It must never import
+# game2d (directly or through models.py or wave.py), or it cannot run headless.
+
+
+class Body(object):
+    """
+    A class to represent the position and size of an object in the game.
+
+    Coordinates follow the game2d convention: (x, y) is the center of the
+    object and y grows upwards.
+
+    A body is a plain object with __slots__, not a GObject: reading or
+    writing a coordinate is a plain attribute access (with no Kivy property
+    behind it), and a body is small. The collision loops read nothing else.
+    Its image (if it is drawn at all) is a separate GObject, which Wave
+    moves to the body once per frame.
+    """
+    __slots__ = ('x', 'y', 'width', 'height', 'px', 'py')
+
+    # INSTANCE ATTRIBUTES:
+    # Attribute x: the x-coordinate of the center
+    # Invariant: x is an int or float
+    #
+    # Attribute y: the y-coordinate of the center
+    # Invariant: y is an int or float
+    #
+    # Attribute width: the width of the object
+    # Invariant: width is an int or float > 0
+    #
+    # Attribute height: the height of the object
+    # Invariant: height is an int or float > 0
+    #
+    # Attribute px: the x-coordinate of the center before the last tick
+    # Invariant: px is an int or float
+    #
+    # Attribute py: the y-coordinate of the center before the last tick
+    # Invariant: py is an int or float
+
+    def getX(self):
+        """
+        Return: value of the x-coordinate
+        """
+        return self.x
+
+    def getY(self):
+        """
+        Return: value of the y-coordinate
+        """
+        return self.y
+
+    def lerpX(self, alpha):
+        """
+        Return: the x-coordinate a fraction alpha of the way from the last
+        tick to this one
+
+        Parameter alpha: how far into the tick to look
+        Precondition: alpha is a float in 0..1
+        """
+        return self.px + (self.x - self.px) * alpha
+
+    def lerpY(self, alpha):
+        """
+        Return: the y-coordinate a fraction alpha of the way from the last
+        tick to this one
+
+        Parameter alpha: how far into the tick to look
+        Precondition: alpha is a float in 0..1
+        """
+        return self.py + (self.y - self.py) * alpha
+
+    def getLeft(self):
+        """
+        Return: the x-coordinate of the left edge
+        """
+        return self.x - self.width / 2
+
+    def getRight(self):
+        """
+        Return: the x-coordinate of the right edge
+        """
+        return self.x + self.width / 2
+
+    def getBottom(self):
+        """
+        Return: the y-coordinate of the bottom edge
+        """
+        return self.y - self.height / 2
+
+    def __init__(self, x, y, width, height):
+        """
+        Initializes a body at the given position.
+
+        Parameter x: the x-coordinate of the center
+        Precondition: x is an int or float
+
+        Parameter y: the y-coordinate of the center
+        Precondition: y is an int or float
+
+        Parameter width: the width of the object
+        Precondition: width is an int or float > 0
+
+        Parameter height: the height of the object
+        Precondition: height is an int or float > 0
+        """
+        self.x = x
+        self.y = y
+        self.px = x
+        self.py = y
+        self.width = width
+        self.height = height
+
+
+class SpatialHash(object):
+    """
+    A class to find the objects near a point without checking every object.
+
+    The plane is cut into square cells and every object is stored in the
+    bucket of each cell its bounding box overlaps (at most four, for an
+    object no bigger than a cell). Everything that can touch a point is then
+    in the bucket of the cell the point is in, which is a single dictionary
+    lookup. The caller still has to check for an actual collision.
+
+    A hash does not know what its objects are or where they are, so it works
+    for any layout (a grid with holes, rows that drift apart, a bunker or a
+    UFO alike). Objects that all move are rebuilt every tick (clear, then
+    insert). Objects that rarely change are kept and updated with insert and
+    remove. Objects that only ever move together (like a formation) are
+    bucketed in a frame of their own and queried in that frame, so moving
+    them never touches the hash.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _size: the width and height of a cell
+    # Invariant: _size is an int or float > 0
+    #
+    # Attribute _cells: the objects in every cell that was ever used
+    # Invariant: _cells is a dict mapping cell keys (see key) to lists
+    #
+    # Attribute _used: the lists of _cells that may not be empty
+    # Invariant: _used is a list of lists in _cells, and every non-empty list
+    # of _cells is in it (a list emptied by remove and filled again may be in
+    # it twice, which only means clear empties it twice)
+
+    # The result of query for a point in a cell that was never used
+    EMPTY = ()
+
+    # The number of keys for the cells of a column (see key)
+    SPAN = 1 << 20
+
+    def getSize(self):
+        """
+        Returns: the width and height of a cell
+        """
+        return self._size
+
+    def __init__(self, size):
+        """
+        Initializes an empty hash.
+
+        Parameter size: the width and height of a cell
+        Precondition: size is an int or float > 0
+        """
+        if VALIDATION >= VALIDATE_BOUNDARY:
+            assert isinstance(size, int) or isinstance(size, float), \
+                "size given is not an int or float"
+            assert size > 0, "size must be positive"
+        self._size = size
+        self._cells = {}
+        self._used = []
+
+    def key(self, cx, cy):
+        """
+        Returns: the key of a cell in _cells, as an int
+
+        Parameter cx: the column of the cell
+        Precondition: cx is an int in -SPAN//2..SPAN//2-1
+
+        Parameter cy: the row of the cell
+        Precondition: cy is an int in -SPAN//2..SPAN//2-1
+        """
+        return cx * self.SPAN + cy
+
+    def clear(self):
+        """
+        Returns: Nothing
+
+        This method removes every object from the hash. The buckets are kept
+        (empty) so the next tick does not have to make them again.
+        """
+        for bucket in self._used:
+            bucket.clear()
+        self._used.clear()
+
+    def reserve(self, left, bottom, right, top):
+        """
+        Returns: Nothing
+
+        This method makes the (empty) buckets of every cell of a rectangle,
+        so that inserting an object there later does not make new ones.
+
+        Parameter left: the x-coordinate of the left edge
+        Precondition: left is an int or float
+
+        Parameter bottom: the y-coordinate of the bottom edge
+        Precondition: bottom is an int or float
+
+        Parameter right: the x-coordinate of the right edge
+        Precondition: right is an int or float >= left
+
+        Parameter top: the y-coordinate of the top edge
+        Precondition: top is an int or float >= bottom
+        """
+        size = self._size
+        for cx in range(int(left // size), int(right // size) + 1):
+            for cy in range(int(bottom // size), int(top // size) + 1):
+                key = self.key(cx, cy)
+                if key not in self._cells:
+                    self._cells[key] = []
+
+    def insert(self, item, x, y, width, height):
+        """
+        Returns: Nothing
+
+        This method adds an object to every cell its bounding box overlaps
+
+        Parameter item: the object to add
+        Precondition: item is any object
+
+        Parameter x: the x-coordinate of the center of the object
+        Precondition: x is an int or float
+
+        Parameter y: the y-coordinate of the center of the object
+        Precondition: y is an int or float
+
+        Parameter width: the width of the bounding box
+        Precondition: width is an int or float >= 0
+
+        Parameter height: the height of the bounding box
+        Precondition: height is an int or float >= 0
+        """
+        size = self._size
+        cells = self._cells
+        span = self.SPAN
+        right = int((x + width / 2) // size)
+        top = int((y + height / 2) // size)
+        bottom = int((y - height / 2) // size)
+        # While loops, as range objects would be allocated every tick
+        cx = int((x - width / 2) // size)
+        while cx <= right:
+            cy = bottom
+            while cy <= top:
+                bucket = cells.get(cx * span + cy)
+                if bucket is None:
+                    bucket = []
+                    cells[cx * span + cy] = bucket
+                if not bucket:
+                    self._used.append(bucket)
+                bucket.append(item)
+                cy += 1
+            cx += 1
+
+    def insertPoint(self, item, x, y):
+        """
+        Returns: Nothing
+
+        This method adds an object that is a single point (or is only ever
+        checked at one point) to the cell of that point. It is insert for an
+        object of size 0, but faster.
+
+        Parameter item: the object to add
+        Precondition: item is any object
+
+        Parameter x: the x-coordinate of the point
+        Precondition: x is an int or float
+
+        Parameter y: the y-coordinate of the point
+        Precondition: y is an int or float
+        """
+        size = self._size
+        key = int(x // size) * self.SPAN + int(y // size)
+        bucket = self._cells.get(key)
+        if bucket is None:
+            bucket = []
+            self._cells[key] = bucket
+        if not bucket:
+            self._used.append(bucket)
+        bucket.append(item)
+
+    def remove(self, item, x, y, width, height):
+        """
+        Returns: Nothing
+
+        This method removes an object from every cell its bounding box
+        overlaps. An emptied bucket stays in the used buckets until clear.
+
+        Parameter item: the object to remove
+        Precondition: item was inserted with this position and size, and was
+        not removed since
+
+        Parameter x: the x-coordinate of the center of the object
+        Precondition: x is an int or float
+
+        Parameter y: the y-coordinate of the center of the object
+        Precondition: y is an int or float
+
+        Parameter width: the width of the bounding box
+        Precondition: width is an int or float >= 0
+
+        Parameter height: the height of the bounding box
+        Precondition: height is an int or float >= 0
+        """
+        size = self._size
+        right = int((x + width / 2) // size)
+        top = int((y + height / 2) // size)
+        bottom = int((y - height / 2) // size)
+        cx = int((x - width / 2) // size)
+        while cx <= right:
+            cy = bottom
+            while cy <= top:
+                self._cells[cx * self.SPAN + cy].remove(item)
+                cy += 1
+            cx += 1
+
+    def query(self, x, y):
+        """
+        Returns: the objects whose bounding box may contain the point (x, y)
+
+        The result is a list or tuple owned by the hash. Do not change it.
+
+        Parameter x: the x-coordinate of the point
+        Precondition: x is an int or float
+
+        Parameter y: the y-coordinate of the point
+        Precondition: y is an int or float
+        """
+        size = self._size
+        return self._cells.get(int(x // size) * self.SPAN + int(y // size),
+                               self.EMPTY)
+
+
+class Formation(object):
+    """
+    A class to represent the grid of aliens of a wave as a struct of arrays.
+
+    The aliens of a wave never move on their own: every step moves the whole
+    formation by the same amount. So instead of one object per alien, the
+    formation stores the x-coordinate of every column and the y-coordinate of
+    every row (as they were when the wave was made) plus an offset for how far
+    the formation has marched since. Moving every alien is then a single
+    update of the offset, no matter how many aliens there are.
+
+    Which aliens are still alive, and their skins, are kept in flat byte
+    arrays with one entry per cell, in row-major order (index row*cols+col).
+    Row 0 is the bottom row.
+
+    The layout is computed from the size of the grid. A formation of at most
+    ALIEN_MAX_ROWS x ALIEN_MAX_COLS aliens is laid out at full size, exactly
+    like the original Wave. A bigger one (see STRESS_MODE) is scaled down
+    until it fits in the space the largest full size formation takes: all
+    of its columns always fit, but rows are scaled down to no less than
+    ALIEN_MIN_SCALE, and any rows past that reach above the top of the screen
+    and march into view. Aliens, their spacing and their steps are all scaled
+    by the same factor (see getScale).
+
+    The living aliens are also bucketed in a SpatialHash, by their index in
+    the arrays and in the coordinates of the formation before it marched.
+    So collide only checks the aliens near a point instead of every alien,
+    marching never touches the hash, and destroying an alien only takes it
+    out of its buckets. The hash does not rely on the grid: a layout that is
+    not evenly spaced only needs its aliens bucketed where they are.
+
+    The formation also counts the living aliens in every row and column, and
+    remembers the outermost rows and columns that still have aliens. These
+    are updated when an alien is destroyed, so asking for the edges of the
+    formation (or whether it is empty) never scans the grid. For the same
+    reason it keeps the lowest living alien of every column (the one that
+    gets to shoot) and a list of the columns that are not empty.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _rows: the number of rows in the grid
+    # Invariant: _rows is an int >= 0
+    #
+    # Attribute _cols: the number of columns in the grid
+    # Invariant: _cols is an int >= 0
+    #
+    # Attribute _x: the x-coordinate of the center of every column, not
+    # counting _offsetX
+    # Invariant: _x is an array of _cols floats, in increasing order
+    #
+    # Attribute _y: the y-coordinate of the center of every row, not
+    # counting _offsetY
+    # Invariant: _y is an array of _rows floats, in increasing order
+    #
+    # Attribute _scale: the size of an alien, as a fraction of its full size
+    # Invariant: _scale is a float in 0..1
+    #
+    # Attribute _pitchX: the distance between the centers of two columns
+    # Invariant: _pitchX is a number > 0, and _x[j] == _x[0] + j*_pitchX
+    #
+    # Attribute _pitchY: the distance between the centers of two rows
+    # Invariant: _pitchY is a number > 0, and _y[i] == _y[0] + i*_pitchY
+    #
+    # Attribute _offsetX: how far the formation marched horizontally
+    # Invariant: _offsetX is an int or float
+    #
+    # Attribute _offsetY: how far the formation marched vertically
+    # Invariant: _offsetY is an int or float
+    #
+    # Attribute _alive: which aliens are still alive
+    # Invariant: _alive is a bytearray of _rows*_cols entries, each 0 or 1
+    #
+    # Attribute _kind: the index of every alien's skin in ALIEN_IMAGES
+    # Invariant: _kind is a bytearray of _rows*_cols entries
+    #
+    # Attribute _steps: the number of times the formation has moved
+    # Invariant: _steps is an int >= 0
+    #
+    # Attribute _count: the number of living aliens
+    # Invariant: _count is an int, equal to the number of 1s in _alive
+    #
+    # Attribute _rowCount: the number of living aliens in every row
+    # Invariant: _rowCount is an array of _rows ints
+    #
+    # Attribute _colCount: the number of living aliens in every column
+    # Invariant: _colCount is an array of _cols ints
+    #
+    # Attribute _left: the leftmost column with a living alien
+    # Invariant: _left is an int, the smallest j with _colCount[j] > 0
+    # (or _cols if the formation is empty)
+    #
+    # Attribute _right: the rightmost column with a living alien
+    # Invariant: _right is an int, the largest j with _colCount[j] > 0
+    # (or -1 if the formation is empty)
+    #
+    # Attribute _bottom: the lowest row with a living alien
+    # Invariant: _bottom is an int, the smallest i with _rowCount[i] > 0
+    # (or _rows if the formation is empty)
+    #
+    # Attribute _top: the highest row with a living alien
+    # Invariant: _top is an int, the largest i with _rowCount[i] > 0
+    # (or -1 if the formation is empty)
+    #
+    # Attribute _lowest: the lowest row with a living alien in every column
+    # Invariant: _lowest is an array of _cols ints, _lowest[j] is the
+    # smallest i such that the alien at (i, j) is alive (or _rows if none)
+    #
+    # Attribute _liveCols: the columns with at least one living alien
+    # Invariant: _liveCols is an array of ints, in no particular order
+    #
+    # Attribute _slot: the position of every column in _liveCols
+    # Invariant: _slot is an array of _cols ints, _liveCols[_slot[j]] == j
+    # for every column j with _colCount[j] > 0
+    #
+    # Attribute _hash: the index (row*_cols+col) of every living alien,
+    # bucketed by its bounding box without _offsetX and _offsetY
+    # Invariant: _hash is a SpatialHash holding exactly the living aliens
+
+    # GETTERS
+    def getRows(self):
+        """
+        Returns: the number of rows in the grid
+        """
+        return self._rows
+
+    def getCols(self):
+        """
+        Returns: the number of columns in the grid
+        """
+        return self._cols
+
+    def getScale(self):
+        """
+        Returns: the size of an alien, as a fraction of its full size
+
+        This is 1.0 unless the formation is too big to fit on screen.
+        """
+        return self._scale
+
+    def getAlienWidth(self):
+        """
+        Returns: the width of an alien (ALIEN_WIDTH, scaled)
+        """
+        return ALIEN_WIDTH * self._scale
+
+    def getAlienHeight(self):
+        """
+        Returns: the height of an alien (ALIEN_HEIGHT, scaled)
+        """
+        return ALIEN_HEIGHT * self._scale
+
+    def getX(self, col):
+        """
+        Returns: the x-coordinate of the center of the aliens in column col
+
+        Parameter col: the column
+        Precondition: col is an int in 0..getCols()-1
+        """
+        return self._x[col] + self._offsetX
+
+    def getY(self, row):
+        """
+        Returns: the y-coordinate of the center of the aliens in row row
+
+        Parameter row: the row
+        Precondition: row is an int in 0..getRows()-1
+        """
+        return self._y[row] + self._offsetY
+
+    def getOffsetX(self):
+        """
+        Returns: how far the formation marched horizontally since it was made
+        """
+        return self._offsetX
+
+    def getOffsetY(self):
+        """
+        Returns: how far the formation marched vertically since it was made
+        """
+        return self._offsetY
+
+    def getKind(self, row, col):
+        """
+        Returns: the index of the skin (in ALIEN_IMAGES) of an alien
+
+        Parameter row: the row of the alien
+        Precondition: row is an int in 0..getRows()-1
+
+        Parameter col: the column of the alien
+        Precondition: col is an int in 0..getCols()-1
+        """
+        return self._kind[row * self._cols + col]
+
+    def isAlive(self, row, col):
+        """
+        Returns: True if the alien at row and col is alive, False otherwise
+
+        Parameter row: the row of the alien
+        Precondition: row is an int in 0..getRows()-1
+
+        Parameter col: the column of the alien
+        Precondition: col is an int in 0..getCols()-1
+        """
+        return self._alive[row * self._cols + col] == 1
+
+    def copyAlive(self, buffer, start=0):
+        """
+        Returns: Nothing
+
+        This method copies which aliens are alive (one byte per alien, 1 if
+        it is alive, in row-major order from the bottom row) into a buffer,
+        without making any new objects
+
+        Parameter buffer: the buffer to copy into
+        Precondition: buffer is a bytearray (or writable memoryview of
+        bytes) with room for getRows()*getCols() bytes at start
+
+        Parameter start: where in the buffer to copy to
+        Precondition: start is an int >= 0
+        """
+        buffer[start:start + len(self._alive)] = self._alive
+
+    def getSteps(self):
+        """
+        Returns: the number of times the formation has moved
+
+        A view only needs to move its images when this number changes.
+        """
+        return self._steps
+
+    def getCount(self):
+        """
+        Returns: the number of living aliens
+        """
+        return self._count
+
+    def getRowCount(self, row):
+        """
+        Returns: the number of living aliens in a row
+
+        Parameter row: the row
+        Precondition: row is an int in 0..getRows()-1
+        """
+        return self._rowCount[row]
+
+    def getColCount(self, col):
+        """
+        Returns: the number of living aliens in a column
+
+        Parameter col: the column
+        Precondition: col is an int in 0..getCols()-1
+        """
+        return self._colCount[col]
+
+    def countLiveColumns(self):
+        """
+        Returns: the number of columns with at least one living alien
+        """
+        return len(self._liveCols)
+
+    def getLiveColumn(self, i):
+        """
+        Returns: the i-th column with at least one living alien
+
+        The order of the columns is arbitrary (and changes as columns are
+        emptied), but every non-empty column has exactly one position.
+
+        Parameter i: the position of the column
+        Precondition: i is an int in 0..countLiveColumns()-1
+        """
+        return self._liveCols[i]
+
+    # INITIALIZER
+    def __init__(self, rows, cols):
+        """
+        Initializes a full grid of aliens.
+
+        The aliens are positioned based on consts.py values to create neat
+        spacing between the aliens, scaled down if the grid is too big to fit
+        on screen (see the class docstring). Every two rows (from the bottom)
+        share the same skin, cycling through ALIEN_IMAGES.
+
+        Parameter rows: how many rows of aliens
+        Precondition: rows is an int and greater than or equal to 0
+
+        Parameter cols: how many columns of aliens
+        Precondition: cols is an int and greater than or equal to 0
+        """
+        self._rows = rows
+        self._cols = cols
+        self._scale = self.fitScale(rows, cols)
+        self._pitchX = (ALIEN_WIDTH + ALIEN_H_SEP) * self._scale
+        self._pitchY = (ALIEN_HEIGHT + ALIEN_V_SEP) * self._scale
+        left = ALIEN_H_SEP + ALIEN_H_SEP * self._scale
+        # The top row starts at the ceiling, but the bottom row never starts
+        # lower than the bottom row of the largest full size formation
+        floor = GAME_HEIGHT - (ALIEN_CEILING + ALIEN_MAX_ROWS *
+                               (ALIEN_HEIGHT + ALIEN_V_SEP)) + ALIEN_V_SEP
+        bottom = max(floor, GAME_HEIGHT - (ALIEN_CEILING + rows * self._pitchY)
+                     + ALIEN_V_SEP * self._scale)
+        self._x = array('d', [left + j * self._pitchX for j in range(cols)])
+        self._y = array('d', [bottom + i * self._pitchY for i in range(rows)])
+        self._offsetX = 0
+        self._offsetY = 0
+        self._alive = bytearray(b'\x01') * (rows * cols)
+        self._kind = bytearray()
+        for i in range(rows):
+            self._kind += bytes([i // 2 % len(ALIEN_IMAGES)]) * cols
+        self._steps = 0
+        self._count = rows * cols
+        self._rowCount = array('i', [cols]) * rows
+        self._colCount = array('i', [rows]) * cols
+        self._left = 0 if rows else cols
+        self._right = cols - 1 if rows else -1
+        self._bottom = 0 if cols else rows
+        self._top = rows - 1 if cols else -1
+        self._lowest = array('i', [0 if rows else rows]) * cols
+        self._liveCols = array('i', range(cols) if rows else [])
+        self._slot = array('i', range(cols))
+        self._hash = SpatialHash(max(self._pitchX, self._pitchY))
+        self.bucketAliens()
+
+    @staticmethod
+    def fitScale(rows, cols):
+        """
+        Returns: the size of the aliens of a formation, as a fraction of
+        their full size
+
+        The formation is scaled down just enough that its columns fit in
+        ALIEN_MAX_COLS full size columns and its rows in ALIEN_MAX_ROWS full
+        size rows. ALIEN_MIN_SCALE only limits how much the rows shrink it
+        (past that the formation reaches above the top of the screen). The
+        columns must always fit across the screen, so a formation with more
+        than ALIEN_MAX_COLS / ALIEN_MIN_SCALE columns is scaled below
+        ALIEN_MIN_SCALE: the minimum is not guaranteed.
+
+        Parameter rows: how many rows of aliens
+        Precondition: rows is an int >= 0
+
+        Parameter cols: how many columns of aliens
+        Precondition: cols is an int >= 0
+        """
+        scale = max(ALIEN_MIN_SCALE, min(1.0, ALIEN_MAX_ROWS / max(rows, 1)))
+        return min(scale, ALIEN_MAX_COLS / max(cols, 1))
+
+    def bucketAliens(self):
+        """
+        Returns: Nothing
+
+        This method puts every living alien in the spatial hash (and nothing
+        else), without the march of the formation (see collide)
+        """
+        self._hash.clear()
+        width = self.getAlienWidth()
+        height = self.getAlienHeight()
+        index = 0
+        for y in self._y:
+            for x in self._x:
+                if self._alive[index]:
+                    self._hash.insert(index, x, y, width, height)
+                index += 1
+
+    def reviveAliens(self, alive):
+        """
+        Returns: Nothing
+
+        This method changes which aliens are alive (only that, see restore),
+        and buckets or unbuckets every alien that changed. A row that did not
+        change is skipped with one comparison, so putting back a few aliens
+        does not go through the whole grid.
+
+        Parameter alive: which aliens are alive, one byte per alien
+        Precondition: alive is bytes of getRows()*getCols() entries, each 0
+        or 1, in row-major order from the bottom row
+        """
+        cols = self._cols
+        width = self.getAlienWidth()
+        height = self.getAlienHeight()
+        for row in range(self._rows):
+            start = row * cols
+            if self._alive[start:start + cols] == alive[start:start + cols]:
+                continue
+            for col in range(cols):
+                index = start + col
+                if self._alive[index] == alive[index]:
+                    continue
+                if alive[index]:
+                    self._hash.insert(index, self._x[col], self._y[row],
+                                      width, height)
+                else:
+                    self._hash.remove(index, self._x[col], self._y[row],
+                                      width, height)
+        self._alive[:] = alive
+
+    # METHODS TO MOVE AND DESTROY ALIENS
+    def move(self, dx, dy):
+        """
+        Returns: Nothing
+
+        This method moves every alien of the formation by (dx, dy)
+
+        Parameter dx: the horizontal distance
+        Precondition: dx is an int or float
+
+        Parameter dy: the vertical distance
+        Precondition: dy is an int or float
+        """
+        self._offsetX += dx
+        self._offsetY += dy
+        self._steps += 1
+
+    def kill(self, row, col):
+        """
+        Returns: Nothing
+
+        This method destroys the alien at row and col (if it is alive)
+
+        Parameter row: the row of the alien
+        Precondition: row is an int in 0..getRows()-1
+
+        Parameter col: the column of the alien
+        Precondition: col is an int in 0..getCols()-1
+        """
+        index = row * self._cols + col
+        if not self._alive[index]:
+            return
+        self._alive[index] = 0
+        self._hash.remove(index, self._x[col], self._y[row],
+                          self.getAlienWidth(), self.getAlienHeight())
+        self._count -= 1
+        self._rowCount[row] -= 1
+        self._colCount[col] -= 1
+        if self._colCount[col] == 0:
+            # Swap the last live column into the place of this one
+            last = self._liveCols.pop()
+            if last != col:
+                self._liveCols[self._slot[col]] = last
+                self._slot[last] = self._slot[col]
+            self._lowest[col] = self._rows
+        elif self._lowest[col] == row:
+            while not self._alive[index]:
+                index += self._cols
+                row += 1
+            self._lowest[col] = row
+        # Each edge only ever moves inwards, so this is O(1) amortized
+        while self._left < self._cols and self._colCount[self._left] == 0:
+            self._left += 1
+        while self._right >= 0 and self._colCount[self._right] == 0:
+            self._right -= 1
+        while self._bottom < self._rows and self._rowCount[self._bottom] == 0:
+            self._bottom += 1
+        while self._top >= 0 and self._rowCount[self._top] == 0:
+            self._top -= 1
+
+    # The numbers at the start of a snapshot (see snapshot)
+    HEADER = struct.Struct('<ddiiiiiii')
+
+    def snapshot(self):
+        """
+        Returns: the state of the formation, as bytes
+
+        The layout of the grid is not in the snapshot, only what changes as
+        the wave is played. It can only be restored into a formation of the
+        same size.
+        """
+        return (self.HEADER.pack(self._offsetX, self._offsetY, self._steps,
+                                 self._count, self._left, self._right,
+                                 self._bottom, self._top, len(self._liveCols))
+                + bytes(self._alive) + self._rowCount.tobytes() +
+                self._colCount.tobytes() + self._lowest.tobytes() +
+                self._slot.tobytes() + self._liveCols.tobytes())
+
+    def restore(self, data):
+        """
+        Returns: Nothing
+
+        This method puts the formation back in the state of a snapshot
+
+        Parameter data: the snapshot
+        Precondition: data is bytes made by snapshot of a formation of the
+        same size
+        """
+        (self._offsetX, self._offsetY, self._steps, self._count, self._left,
+         self._right, self._bottom, self._top, live) = \
+            self.HEADER.unpack_from(data)
+        pos = self.HEADER.size
+        cells = self._rows * self._cols
+        self.reviveAliens(data[pos:pos + cells])
+        pos += cells
+        for values, length in ((self._rowCount, self._rows),
+                               (self._colCount, self._cols),
+                               (self._lowest, self._cols),
+                               (self._slot, self._cols),
+                               (self._liveCols, live)):
+            size = length * values.itemsize
+            del values[:]
+            values.frombytes(data[pos:pos + size])
+            pos += size
+
+    def collide(self, x, y):
+        """
+        Returns: True if a point hit (and destroyed) an alien, False otherwise
+
+        A point hits an alien if it is within getAlienWidth()/2 of the center
+        of the alien. At most one alien is destroyed (the first one found).
+        Only the aliens bucketed in the cell of the point are checked.
+
+        Parameter x: the x-coordinate of the point
+        Precondition: x is an int or float
+
+        Parameter y: the y-coordinate of the point
+        Precondition: y is an int or float
+        """
+        x -= self._offsetX
+        y -= self._offsetY
+        radius = ALIEN_WIDTH / 2 * self._scale
+        cols = self._cols
+        for index in self._hash.query(x, y):
+            col = index % cols
+            row = index // cols
+            dx = x - self._x[col]
+            dy = y - self._y[row]
+            if dx * dx + dy * dy <= radius * radius:
+                self.kill(row, col)
+                return True
+        return False
+
+    def isEmpty(self):
+        """
+        Returns: True if every alien is destroyed, False otherwise
+        """
+        return self._count == 0
+
+    def bottomRow(self, col):
+        """
+        Returns: the lowest row with a living alien in column col, or -1
+
+        Parameter col: the column
+        Precondition: col is an int in 0..getCols()-1
+        """
+        row = self._lowest[col]
+        return -1 if row == self._rows else row
+
+    def leftColumn(self):
+        """
+        Returns: the leftmost column with a living alien, or -1
+        """
+        return -1 if self._count == 0 else self._left
+
+    def rightColumn(self):
+        """
+        Returns: the rightmost column with a living alien, or -1
+        """
+        return self._right
+
+    def lowestRow(self):
+        """
+        Returns: the lowest row with a living alien, or -1
+        """
+        return -1 if self._count == 0 else self._bottom
+
+    def highestRow(self):
+        """
+        Returns: the highest row with a living alien, or -1
+        """
+        return self._top
+
+    def getBottom(self):
+        """
+        Returns: the y-coordinate of the bottom edge of the lowest alien
+
+        Precondition: the formation is not empty
+        """
+        return self.getY(self._bottom) - ALIEN_HEIGHT / 2 * self._scale
+
+    def getTop(self):
+        """
+        Returns: the y-coordinate of the top edge of the highest alien
+
+        Precondition: the formation is not empty
+        """
+        return self.getY(self._top) + ALIEN_HEIGHT / 2 * self._scale
+
+    def getLeft(self):
+        """
+        Returns: the x-coordinate of the left edge of the leftmost alien
+
+        Precondition: the formation is not empty
+        """
+        return self.getX(self._left) - ALIEN_WIDTH / 2 * self._scale
+
+    def getRight(self):
+        """
+        Returns: the x-coordinate of the right edge of the rightmost alien
+
+        Precondition: the formation is not empty
+        """
+        return self.getX(self._right) + ALIEN_WIDTH / 2 * self._scale
+
+
+class BoltBody(Body):
+    """
+    A class to represent a laser bolt in the simulation.
+    """
+    __slots__ = ('velocity', 'player')
+
+    # INSTANCE ATTRIBUTES:
+    # Attribute velocity: the velocity in y direction
+    # Invariant: velocity is an int or float
+    #
+    # Attribute player: determines if bolt is from the player or not
+    # Invariant: player is a bool
+
+    def getVelocity(self):
+        """
+        Return: velocity of bolt in y direction
+        """
+        return self.velocity
+
+    def isPlayerBolt(self):
+        """
+        Returns: True if it's a player bolt, False otherwise
+        """
+        return self.player
+
+    def __init__(self, x, y, player):
+        """
+        Initializes a bolt of size BOLT_WIDTH x BOLT_HEIGHT.
+
+        Parameter x: the x-coordinate of the center
+        Precondition: x is an int or float
+
+        Parameter y: the y-coordinate of the center
+        Precondition: y is an int or float
+
+        Parameter player: True if bolt is a player bolt
+        Precondition: player is a bool
+        """
+        super().__init__(x, y, BOLT_WIDTH, BOLT_HEIGHT)
+        self.velocity = BOLT_SPEED
+        self.player = player
+
+
+class BoltPool(object):
+    """
+    A class to store the laser bolts on screen without making new objects.
+
+    The pool makes all of its BoltBody objects up front: a fixed number for
+    the player and a fixed number for the aliens. Each group is a list in
+    which the first few bolts are in flight and the rest are spare. Firing
+    a bolt reuses the first spare one, and removing a bolt swaps it with the
+    last bolt in flight, so neither ever makes or deletes an object.
+
+    Because removal swaps bolts around, a loop that removes bolts must not
+    move on to the next position after a removal (the position now holds a
+    bolt it has not seen yet).
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _player: the player bolts, in flight first
+    # Invariant: _player is a list of BoltBody objects with player True
+    #
+    # Attribute _players: the number of player bolts in flight
+    # Invariant: _players is an int in 0..len(_player)
+    #
+    # Attribute _alien: the alien bolts, in flight first
+    # Invariant: _alien is a list of BoltBody objects with player False
+    #
+    # Attribute _aliens: the number of alien bolts in flight
+    # Invariant: _aliens is an int in 0..len(_alien)
+
+    # GETTERS
+    def getPlayerCount(self):
+        """
+        Returns: the number of player bolts in flight
+        """
+        return self._players
+
+    def getAlienCount(self):
+        """
+        Returns: the number of alien bolts in flight
+        """
+        return self._aliens
+
+    def getCount(self):
+        """
+        Returns: the number of bolts in flight
+        """
+        return self._players + self._aliens
+
+    def getPlayerBolt(self, i):
+        """
+        Returns: the i-th player bolt in flight
+
+        Parameter i: the position of the bolt
+        Precondition: i is an int in 0..getPlayerCount()-1
+        """
+        return self._player[i]
+
+    def getAlienBolt(self, i):
+        """
+        Returns: the i-th alien bolt in flight
+
+        Parameter i: the position of the bolt
+        Precondition: i is an int in 0..getAlienCount()-1
+        """
+        return self._alien[i]
+
+    def get(self, i):
+        """
+        Returns: the i-th bolt in flight, player bolts first
+
+        Parameter i: the position of the bolt
+        Precondition: i is an int in 0..getCount()-1
+        """
+        if i < self._players:
+            return self._player[i]
+        return self._alien[i - self._players]
+
+    # INITIALIZER
+    def __init__(self, players=PLAYER_BOLT_CAPACITY,
+                 aliens=ALIEN_BOLT_CAPACITY):
+        """
+        Initializes an empty pool.
+
+        Parameter players: the most player bolts that can be in flight
+        Precondition: players is an int >= 0
+
+        Parameter aliens: the most alien bolts that can be in flight
+        Precondition: aliens is an int >= 0
+        """
+        if VALIDATION >= VALIDATE_BOUNDARY:
+            assert isinstance(players, int) and players >= 0, \
+                "players is not an int >= 0"
+            assert isinstance(aliens, int) and aliens >= 0, \
+                "aliens is not an int >= 0"
+        self._player = [BoltBody(0, 0, True) for _ in range(players)]
+        self._players = 0
+        self._alien = [BoltBody(0, 0, False) for _ in range(aliens)]
+        self._aliens = 0
+
+    # METHODS TO FIRE AND REMOVE BOLTS
+    def fire(self, x, y, player):
+        """
+        Returns: True if the bolt was fired, False if the pool is full
+
+        Parameter x: X-coordinate of the bolt
+        Precondition: x is a number or int
+
+        Parameter y: Y-coordinate of the bolt
+        Precondition: y is a number or int
+
+        Parameter player: True if bolt is a player bolt
+        Precondition: player is a bool
+        """
+        if player:
+            if self._players == len(self._player):
+                return False
+            bolt = self._player[self._players]
+            self._players += 1
+        else:
+            if self._aliens == len(self._alien):
+                return False
+            bolt = self._alien[self._aliens]
+            self._aliens += 1
+        bolt.x = x
+        bolt.y = y
+        bolt.px = x
+        bolt.py = y
+        return True
+
+    def removePlayerBolt(self, i):
+        """
+        Returns: Nothing
+
+        This method removes the i-th player bolt in flight. The last player
+        bolt in flight takes its position.
+
+        Parameter i: the position of the bolt
+        Precondition: i is an int in 0..getPlayerCount()-1
+        """
+        self._players -= 1
+        last = self._players
+        bolts = self._player
+        bolts[i], bolts[last] = bolts[last], bolts[i]
+
+    def removeAlienBolt(self, i):
+        """
+        Returns: Nothing
+
+        This method removes the i-th alien bolt in flight. The last alien
+        bolt in flight takes its position.
+
+        Parameter i: the position of the bolt
+        Precondition: i is an int in 0..getAlienCount()-1
+        """
+        self._aliens -= 1
+        last = self._aliens
+        bolts = self._alien
+        bolts[i], bolts[last] = bolts[last], bolts[i]
+
+    def clear(self):
+        """
+        Returns: Nothing
+
+        This method removes every bolt in flight
+        """
+        self._players = 0
+        self._aliens = 0
+
+
+class Timestep(object):
+    """
+    A class to turn the time between frames into fixed simulation ticks.
+
+    Every frame, advance adds the time since the last frame and returns the
+    number of whole ticks that fit in it. What is left over (less than one
+    tick) is kept for the next frame, and getAlpha tells how far into the
+    next tick it is, so that the view can draw between the last two ticks.
+
+    After a long hitch, at most a fixed number of ticks are run in one frame
+    and the rest of the time is dropped: the game slows down for a moment
+    instead of freezing to catch up.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _tick: the length of a tick, in seconds
+    # Invariant: _tick is a float > 0
+    #
+    # Attribute _most: the most ticks to run in one frame
+    # Invariant: _most is an int > 0
+    #
+    # Attribute _lag: the time not yet turned into ticks, in seconds
+    # Invariant: _lag is a float in 0.._tick (less than _tick)
+
+    def getTick(self):
+        """
+        Returns: the length of a tick, in seconds
+        """
+        return self._tick
+
+    def getAlpha(self):
+        """
+        Returns: how far into the next tick the time is, as a float in 0..1
+        """
+        return self._lag / self._tick
+
+    def __init__(self, rate=TICK_RATE, most=MAX_TICKS_PER_FRAME):
+        """
+        Initializes a timestep with no time left over.
+
+        Parameter rate: the number of ticks per second
+        Precondition: rate is an int > 0
+
+        Parameter most: the most ticks to run in one frame
+        Precondition: most is an int > 0
+        """
+        if VALIDATION >= VALIDATE_BOUNDARY:
+            assert isinstance(rate, int) and rate > 0, "rate is not an int > 0"
+            assert isinstance(most, int) and most > 0, "most is not an int > 0"
+        self._tick = 1 / rate
+        self._most = most
+        self._lag = 0.0
+
+    def advance(self, dt):
+        """
+        Returns: the number of ticks to run for this frame
+
+        Parameter dt: The time in seconds since last update
+        Precondition: dt is a number (int or float) >= 0
+        """
+        self._lag += dt
+        ticks = int(self._lag / self._tick)
+        self._lag -= ticks * self._tick
+        if self._lag < 0:
+            self._lag = 0.0
+        if ticks > self._most:
+            ticks = self._most
+        return ticks
+
+    def reset(self):
+        """
+        Returns: Nothing
+
+        This method drops the time left over (say, when the game pauses)
+        """
+        self._lag = 0.0
+
+
+class Simulation(object):
+    """
+    This class simulates a single wave of Alien Invaders without any graphics.
+
+    The rules are the ones of the original Wave subcontroller. The game states
+    are the same ints that Wave reports to Invaders:
+
+        0: the wave is in play
+        1: all of the aliens are destroyed (the player won)
+        2: the aliens reached the defensive line or the player has no lives
+           left (the player lost)
+        3: the ship was destroyed and the wave is waiting to continue
+
+    A headless driver only needs step and getGameState. Every call to step
+    is one tick of 1/TICK_RATE seconds, with the input of the player during
+    that tick.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _ship: the player ship to control
+    # Invariant: _ship is _hull, or None (right after it is destroyed)
+    #
+    # Attribute _hull: the only ship Body of the wave, reused by every ship
+    # Invariant: _hull is a Body object
+    #
+    # Attribute _formation: the aliens in the wave
+    # Invariant: _formation is a Formation object
+    #
+    # Attribute _bolts: the laser bolts currently on screen
+    # Invariant: _bolts is a BoltPool object
+    #
+    # Attribute _boltHash: the position in _bolts of every alien bolt in
+    # flight, bucketed by its center, the only point of a bolt that can hit
+    # (rebuilt every tick the ship is alive, by collideBolts)
+    # Invariant: _boltHash is a SpatialHash
+    #
+    # Attribute _dline: the y-coordinate of the defensive line
+    # Invariant: _dline is an int >= 0
+    #
+    # Attribute _lives: the number of lives left
+    # Invariant: _lives is an int >= 0
+    #
+    # Attribute _time: the number of ticks since the last Alien "step"
+    # Invariant: _time is an int >= 0
+    #
+    # Attribute _direction: determines if the aliens will move right or left
+    # Invariant: _direction is an int either 1 or -1
+    #
+    # Attribute _down: determines when the aliens will move down
+    # Invariant: _down is a bool
+    #
+    # Attribute _nextBolt: keeps track of how many alien steps until next bolt
+    # Invariant: _nextBolt is an int
+    #
+    # Attribute _gameState: current state of the wave (see class docstring)
+    # Invariant: _gameState is an int between [0, 3]
+    #
+    # Attribute _events: the events that happened since the last clearEvents
+    # Invariant: _events is a list of EVENT constants, possibly empty
+    #
+    # Attribute _seed: the seed of _random
+    # Invariant: _seed is an int >= 0
+    #
+    # Attribute _random: the random numbers of the wave (and nothing else)
+    # Invariant: _random is a random.Random object
+    #
+    # Attribute _speed: the number of seconds between alien steps
+    # Invariant: _speed is a float > 0
+    #
+    # Attribute _rate: the most alien steps between two alien bolts
+    # Invariant: _rate is an int > 0
+    #
+    # Attribute _profiler: what moving the bolts and their collisions are
+    # timed and counted by
+    # Invariant: _profiler is a FrameProfiler object (see profiler.py), or
+    # None if they are not profiled
+
+    # GETTERS AND SETTERS
+    def getFormation(self):
+        """
+        Returns: the formation of aliens
+        """
+        return self._formation
+
+    def killAlien(self, row, col):
+        """
+        Returns: Nothing
+
+        This method removes the alien at the given row and column (if any)
+        without raising an event.
+
+        Parameter row: row where an alien is located
+        Precondition: row is an int in 0..number of rows-1
+
+        Parameter col: column where an alien is located
+        Precondition: col is an int in 0..number of columns-1
+        """
+        self._formation.kill(row, col)
+
+    def getShip(self):
+        """
+        Returns: the ship, or None if it was just destroyed
+        """
+        return self._ship
+
+    def setShip(self, x):
+        """
+        Returns: Nothing
+
+        This method places a new ship at the bottom of the screen. The ship
+        reuses the Body of the previous one.
+
+        Parameter x: the ship's x-coordinate
+        Precondition: x is an int or float greater than 0
+                      and less than the game's screen width
+        """
+        if VALIDATION >= VALIDATE_BOUNDARY:
+            assert isinstance(x, int) or isinstance(x, float), \
+                "x given is not an int or float"
+            assert 0 < x < GAME_WIDTH, "Ship is off the screen"
+        self._hull.x = x
+        self._hull.px = x
+        self._ship = self._hull
+
+    def getDline(self):
+        """
+        Returns: the y-coordinate of the defensive line
+        """
+        return self._dline
+
+    def getLives(self):
+        """
+        Return: number of lives the ship has
+        """
+        return self._lives
+
+    def setLives(self, lives):
+        """
+        Returns: Nothing
+
+        This method assigns the number of lives to the ship
+
+        Parameter lives: amount of lives
+        Precondition: lives is an int in 0..SHIP_LIVES
+        """
+        if VALIDATION >= VALIDATE_BOUNDARY:
+            assert isinstance(lives, int), "lives given is not an int"
+            assert 0 <= lives <= SHIP_LIVES, "lives is out of range"
+        self._lives = lives
+
+    def getBolts(self):
+        """
+        Return: the pool of bolts on screen
+        """
+        return self._bolts
+
+    def getGameState(self):
+        """
+        Returns: the current state of the wave
+        """
+        return self._gameState
+
+    def setGameState(self, gameState):
+        """
+        Returns: Nothing
+
+        This method updates the current state of the wave
+
+        Parameter gameState: current gameState
+        Precondition: gameState is an int between [0,3]
+        """
+        if VALIDATION >= VALIDATE_BOUNDARY:
+            assert isinstance(gameState, int), "gameState given is not an int"
+            assert 0 <= gameState <= 3, "gameState must be between [0,3]"
+        self._gameState = gameState
+
+    def getSeed(self):
+        """
+        Returns: the seed of the random numbers of the wave
+        """
+        return self._seed
+
+    def getSpeed(self):
+        """
+        Returns: the number of seconds between alien steps
+        """
+        return self._speed
+
+    def getProfiler(self):
+        """
+        Returns: the profiler the bolts are timed by, or None
+        """
+        return self._profiler
+
+    def setProfiler(self, profiler):
+        """
+        Returns: Nothing
+
+        This method sets the profiler of the wave. While it is not None, every
+        tick adds the time of moving the bolts (phase moveBolt) and of their
+        collisions (phase collisions, timed once per tick) to the profiler,
+        and counts the bolts checked for a hit (counter checks).
+
+        Parameter profiler: the profiler
+        Precondition: profiler is a FrameProfiler object or None
+        """
+        self._profiler = profiler
+
+    def getRate(self):
+        """
+        Returns: the most alien steps between two alien bolts
+        """
+        return self._rate
+
+    def getEvents(self):
+        """
+        Returns: the list of events since the last call to clearEvents
+        """
+        return self._events
+
+    def clearEvents(self):
+        """
+        Returns: Nothing
+
+        This method forgets all of the events recorded so far
+        """
+        self._events.clear()
+
+    # INITIALIZER
+    def __init__(self, row, col, x, dline, lives, seed=None,
+                 speed=ALIEN_SPEED, rate=BOLT_RATE):
+        """
+        Initializes the wave of aliens and ship.
+
+        Parameter row: how many rows of aliens
+        Precondition: row is an int and greater than or equal to 0
+
+        Parameter col: how many columns of aliens
+        Precondition: col is an int and greater than or equal to 0
+
+        Parameter x: the ship's x-coordinate
+        Precondition: x is an int or float greater than 0
+                      and less than the game's screen width
+
+        Parameter dline: the y-coordinate of the defensive line
+        Precondition: dline is an int >= 0
+
+        Parameter lives: amount of lives
+        Precondition: lives is an int in 0..SHIP_LIVES
+
+        Parameter seed: the seed of the random numbers of the wave (a replay
+        keeps it in 64 bits)
+        Precondition: seed is an int in 0..2**64-1, or None (pick one at
+        random)
+
+        Parameter speed: the number of seconds between alien steps
+        Precondition: speed is a number (int or float) > 0
+
+        Parameter rate: the most alien steps between two alien bolts (a
+        replay does not record it, so only replay waves with BOLT_RATE)
+        Precondition: rate is an int > 0
+        """
+        if VALIDATION >= VALIDATE_BOUNDARY:
+            assert isinstance(dline, int) and dline >= 0, \
+                "dline is not an int or less than 0"
+            assert seed is None or (isinstance(seed, int) and
+                                    0 <= seed < 2 ** 64), \
+                "seed is not an int in 0..2**64-1"
+            assert (isinstance(speed, int) or isinstance(speed, float)) and \
+                speed > 0, "speed is not a number > 0"
+            assert isinstance(rate, int) and rate > 0, "rate is not an int > 0"
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        self._seed = seed
+        self._random = random.Random(seed)
+        self._speed = float(speed)
+        self._rate = rate
+        self.makeAliens(row, col)
+        self._time = 0
+        self._direction = 1
+        self._down = False
+        self._hull = Body(x, SHIP_BOTTOM, SHIP_WIDTH, SHIP_HEIGHT)
+        self.setShip(x)
+        self._dline = dline
+        self.setLives(lives)
+        self._nextBolt = -1
+        self._bolts = BoltPool()
+        self._boltHash = SpatialHash(SHIP_WIDTH)
+        # Every cell a bolt can be in, so bucketing one never makes a bucket
+        self._boltHash.reserve(-BOLT_WIDTH, -BOLT_HEIGHT,
+                               GAME_WIDTH + BOLT_WIDTH,
+                               GAME_HEIGHT + BOLT_HEIGHT)
+        self._gameState = 0
+        self._events = []
+        self._profiler = None
+
+    def makeAliens(self, row, col):
+        """
+        Returns: Nothing
+
+        This is a helper method for initializing a wave of aliens. It lays out
+        the aliens exactly like the original Wave did (see Formation).
+
+        Parameter row: how many rows of aliens
+        Precondition: row is an int and greater than or equal to 0
+
+        Parameter col: how many columns of aliens
+        Precondition: col is an int and greater than or equal to 0
+        """
+        self._formation = Formation(row, col)
+
+    # UPDATE METHODS
+    def step(self, input, fire):
+        """
+        Returns: Nothing
+
+        This method plays a single tick of the wave: the aliens and bolts
+        move (see tick), and then the ship moves and fires as the player
+        asks, if the wave is still in play.
+
+        Parameter input: the direction the ship moves in during this tick
+        Precondition: input is "right", "left" or None (do not move)
+
+        Parameter fire: whether the player tries to fire a bolt
+        Precondition: fire is a bool
+        """
+        self.tick()
+        if self._gameState == 0:
+            if input is not None:
+                self.updateShip(input)
+            if fire:
+                self.firePlayerBolt()
+
+    def tick(self):
+        """
+        Returns: Nothing
+
+        This method animates a single tick of the wave: it checks whether the
+        wave is over, and otherwise fires alien bolts, marches the aliens and
+        moves the bolts.
+        """
+        self._hull.px = self._hull.x
+        if self._ship is None:
+            self._gameState = 3
+            self.setShip(GAME_WIDTH / 2)
+        elif self.collideBorder():
+            self._gameState = 2
+        elif not self.isAliens():
+            self._gameState = 1
+        elif self._gameState == 0:
+            self._time += 1
+            self.alienBolt()
+            self.moveAliens()
+            if self._profiler is None:
+                self.moveBolt()
+            else:
+                self._profiler.begin('moveBolt')
+                self.moveBolt()
+                self._profiler.end('moveBolt')
+        if self._lives == 0:
+            self._gameState = 2
+
+    def moveAliens(self):
+        """
+        Returns: Nothing
+
+        This method takes one alien step once _speed seconds (worth of ticks)
+        have passed.
+        The aliens walk sideways, and after an alien crosses the side margin
+        the next step goes down and turns the formation around.
+        """
+        if self._time >= self._speed * TICK_RATE:
+            if self._formation.getRight() > GAME_WIDTH - ALIEN_H_SEP \
+                    and self._down:
+                self.alienToDown()
+                self._direction = -1
+                self._down = False
+            elif self._formation.getLeft() < ALIEN_H_SEP and self._down:
+                self.alienToDown()
+                self._direction = 1
+                self._down = False
+            else:
+                self.alienMove()
+                self._down = True
+            self._time = 0
+            self._nextBolt -= 1
+
+    def alienMove(self):
+        """
+        Returns: Nothing
+
+        This method moves all aliens ALIEN_H_WALK pixels (scaled like the
+        aliens) in the direction given by _direction
+        """
+        self._formation.move(self._direction * ALIEN_H_WALK *
+                             self._formation.getScale(), 0)
+
+    def alienToDown(self):
+        """
+        Returns: Nothing
+
+        This method moves all aliens down ALIEN_V_WALK pixels (scaled like
+        the aliens), without moving the lowest of them past the defensive line
+        """
+        space = ALIEN_V_WALK * self._formation.getScale()
+        bottom = self._formation.getBottom()
+        limit = self._dline + DEFENSE_LINE_WIDTH
+        if bottom - space < limit:
+            space = bottom - limit
+        self._formation.move(0, -space)
+
+    def isAliens(self):
+        """
+        Returns: True if there is at least one alien left, False otherwise
+        """
+        return not self._formation.isEmpty()
+
+    def updateShip(self, input):
+        """
+        Returns: Nothing
+
+        This method moves the ship SHIP_MOVEMENT pixels, without leaving
+        the screen
+
+        Parameter input: used to control the ship
+        Precondition: input is either "right" or "left"
+        """
+        if VALIDATION >= VALIDATE_FULL:
+            assert input == "right" or input == "left", "Invalid input"
+        if self._ship is None:
+            return
+        if input == "right":
+            self._ship.x = min(self._ship.x + SHIP_MOVEMENT,
+                               GAME_WIDTH - SHIP_WIDTH / 2)
+        else:
+            self._ship.x = max(self._ship.x - SHIP_MOVEMENT, SHIP_WIDTH / 2)
+
+    def addBolt(self, x, y, player):
+        """
+        Returns: True if the bolt was added, False otherwise
+
+        This method adds a bolt at the given position. There is a limit on
+        the number of bolts on screen (see BoltPool); a bolt fired past that
+        limit is ignored.
+
+        Parameter x: X-coordinate of the bolt
+        Precondition: x is a number or int
+
+        Parameter y: Y-coordinate of the bolt
+        Precondition: y is a number or int
+
+        Parameter player: True if bolt is a player bolt
+        Precondition: player is a bool
+        """
+        return self._bolts.fire(x, y, player)
+
+    def hasPlayerBolt(self):
+        """
+        Returns: True if a player bolt is on screen, False otherwise
+        """
+        return self._bolts.getPlayerCount() > 0
+
+    def firePlayerBolt(self):
+        """
+        Returns: True if a bolt was fired, False otherwise
+
+        This method fires a bolt from the ship, unless the ship is destroyed
+        or a player bolt is already on screen (the player can only have one
+        bolt at a time)
+        """
+        if self._ship is None or self.hasPlayerBolt():
+            return False
+        if self.addBolt(self._ship.x, SHIP_BOTTOM + SHIP_HEIGHT * 0.5, True):
+            self._events.append(EVENT_PLAYER_BOLT)
+            return True
+        return False
+
+    def moveBolt(self):
+        """
+        Returns: Nothing
+
+        This method moves every bolt by BOLT_SPEED (one tick), removes the
+        bolts that left the screen, and then removes the bolts that hit
+        something (see collideBolts).
+
+        If the wave has a profiler, the collisions are timed once per tick
+        and the bolts they checked are counted (see setProfiler).
+        """
+        bolts = self._bolts
+        top = GAME_HEIGHT - BOLT_HEIGHT / 2
+        pos = 0
+        while pos < bolts.getPlayerCount():
+            bolt = bolts.getPlayerBolt(pos)
+            bolt.py = bolt.y
+            bolt.y = min(bolt.y + bolt.velocity, top)
+            if bolt.y == top:
+                bolts.removePlayerBolt(pos)
+            else:
+                pos += 1
+        pos = 0
+        while pos < bolts.getAlienCount():
+            bolt = bolts.getAlienBolt(pos)
+            bolt.py = bolt.y
+            bolt.y = max(bolt.y - bolt.velocity, 0)
+            if bolt.y == 0:
+                bolts.removeAlienBolt(pos)
+            else:
+                pos += 1
+        profiler = self._profiler
+        if profiler is None:
+            self.collideBolts()
+        else:
+            start = time.perf_counter()
+            checks = self.collideBolts()
+            profiler.add('collisions', time.perf_counter() - start)
+            profiler.count('checks', checks)
+
+    def collideBolts(self):
+        """
+        Returns: the number of bolts checked for a hit
+
+        This method removes every bolt that hit something. Player bolts can
+        only hit aliens and alien bolts can only hit the ship, so the two
+        kinds are handled separately. Every player bolt looks for an alien in
+        its cell (see collideAliens). The alien bolts are bucketed, and the
+        ship then looks for one in the cells it covers (see collideShip).
+        """
+        bolts = self._bolts
+        checks = bolts.getPlayerCount()
+        pos = 0
+        while pos < bolts.getPlayerCount():
+            if self.collideAliens(bolts.getPlayerBolt(pos)):
+                bolts.removePlayerBolt(pos)
+            else:
+                pos += 1
+        if self._ship is None:
+            return checks
+        grid = self._boltHash
+        grid.clear()
+        pos = 0
+        while pos < bolts.getAlienCount():
+            bolt = bolts.getAlienBolt(pos)
+            grid.insertPoint(pos, bolt.x, bolt.y)
+            pos += 1
+        self.collideShip()
+        return checks + pos
+
+    def alienBolt(self):
+        """
+        Returns: Nothing
+
+        This method randomizes how many steps the aliens should take for the
+        next bolt to fire from an alien, and fires it (see fireAlienBolt)
+        when it is time.
+        """
+        if self._nextBolt == -1:
+            self._nextBolt = self._random.randint(1, self._rate)
+        if self._nextBolt == 0:
+            self.fireAlienBolt()
+            self._nextBolt = self._random.randint(1, self._rate)
+
+    def fireAlienBolt(self):
+        """
+        Returns: Nothing
+
+        This method fires a bolt from the bottommost alien of a random
+        non-empty column. Every non-empty column is equally likely to fire.
+
+        Precondition: there is at least one alien left
+        """
+        formation = self._formation
+        pick = self._random.randrange(formation.countLiveColumns())
+        col = formation.getLiveColumn(pick)
+        row = formation.bottomRow(col)
+        self.addBolt(formation.getX(col),
+                     formation.getY(row) - formation.getAlienHeight() / 2,
+                     False)
+        self._events.append(EVENT_ALIEN_BOLT)
+
+    def clearBolts(self):
+        """
+        This method clears the bolt list
+        """
+        self._bolts.clear()
+
+    # METHODS TO SAVE AND RESTORE THE STATE
+    # The numbers at the start of a snapshot (see snapshot)
+    HEADER = struct.Struct('<dd?iibbiBHH?d')
+
+    # The position of a bolt in a snapshot
+    BOLT = struct.Struct('<dddd')
+
+    def snapshot(self):
+        """
+        Returns: the state of the wave between two ticks, as bytes
+
+        The snapshot has everything that changes as the wave is played: the
+        ship, the bolts, the formation, the timers and the state of the
+        random numbers. Restoring it into a simulation made with the same
+        settings (but any seed) plays on exactly as this one would.
+        """
+        version, internal, gauss = self._random.getstate()
+        data = bytearray(self.HEADER.pack(
+            self._hull.x, self._hull.px, self._ship is not None, self._lives,
+            self._time, self._direction, self._down, self._nextBolt,
+            self._gameState, self._bolts.getPlayerCount(),
+            self._bolts.getAlienCount(), gauss is not None,
+            0.0 if gauss is None else gauss))
+        for i in range(self._bolts.getCount()):
+            bolt = self._bolts.get(i)
+            data += self.BOLT.pack(bolt.x, bolt.y, bolt.px, bolt.py)
+        data += array('I', internal).tobytes()
+        data += self._formation.snapshot()
+        return bytes(data)
+
+    def restore(self, data):
+        """
+        Returns: Nothing
+
+        This method puts the wave back in the state of a snapshot. The events
+        recorded so far are cleared.
+
+        Parameter data: the snapshot
+        Precondition: data is bytes made by snapshot of a simulation with the
+        same number of rows and columns
+        """
+        (x, px, alive, self._lives, self._time, self._direction, down,
+         self._nextBolt, self._gameState, players, aliens, gaussed,
+         gauss) = self.HEADER.unpack_from(data)
+        self._down = down != 0
+        self._hull.x = x
+        self._hull.px = px
+        self._ship = self._hull if alive else None
+        pos = self.HEADER.size
+        self._bolts.clear()
+        for i in range(players + aliens):
+            bx, by, bpx, bpy = self.BOLT.unpack_from(data, pos)
+            pos += self.BOLT.size
+            self._bolts.fire(bx, by, i < players)
+            bolt = self._bolts.get(i)
+            bolt.px = bpx
+            bolt.py = bpy
+        # The state of the Mersenne Twister is 624 words and an index
+        internal = array('I')
+        internal.frombytes(data[pos:pos + 625 * internal.itemsize])
+        pos += 625 * internal.itemsize
+        self._random.setstate((3, tuple(internal),
+                               gauss if gaussed else None))
+        self._formation.restore(data[pos:])
+        self._events.clear()
+
+    # HELPER METHODS FOR COLLISION DETECTION
+    def collideBorder(self):
+        """
+        Returns: True if an alien reached the defensive line, False otherwise
+        """
+        if self._formation.isEmpty():
+            return False
+        return (self._formation.getBottom() <=
+                self._dline + DEFENSE_LINE_WIDTH)
+
+    def collideShip(self):
+        """
+        Returns: True if an alien bolt destroyed the ship, False otherwise
+
+        A bolt hits the ship if its center is within SHIP_WIDTH/2 of the
+        center of the ship. Only alien bolts can destroy the ship, and only
+        the ones bucketed in the cells the ship covers are checked (see
+        collideBolts). If several bolts hit, the first one in flight is
+        removed.
+        """
+        ship = self._ship
+        if ship is None or self._bolts.getAlienCount() == 0:
+            return False
+        bolts = self._bolts
+        grid = self._boltHash
+        size = grid.getSize()
+        radius = SHIP_WIDTH / 2
+        first = -1
+        right = ship.x + radius
+        top = ship.y + radius
+        # One query per cell under the ship (with while loops, as range
+        # objects would be allocated every tick)
+        x = ship.x - radius
+        while x < right + size:
+            y = ship.y - radius
+            while y < top + size:
+                for pos in grid.query(min(x, right), min(y, top)):
+                    bolt = bolts.getAlienBolt(pos)
+                    dx = bolt.x - ship.x
+                    dy = bolt.y - ship.y
+                    if (dx * dx + dy * dy <= radius * radius and
+                            (first == -1 or pos < first)):
+                        first = pos
+                y += size
+            x += size
+        if first == -1:
+            return False
+        bolts.removeAlienBolt(first)
+        self._events.append(EVENT_SHIP_HIT)
+        self._ship = None
+        self._gameState = 0
+        return True
+
+    def collideAliens(self, bolt):
+        """
+        Returns: True if the bolt destroyed an alien, False otherwise
+
+        A bolt hits an alien if its center is within getAlienWidth()/2 of the
+        center of the alien. Only player bolts can destroy aliens, and a bolt
+        destroys at most one alien.
+
+        Parameter bolt: the bolt being processed
+        Precondition: bolt is a BoltBody object
+        """
+        if not bolt.player:
+            return False
+        if self._formation.collide(bolt.x, bolt.y):
+            self._events.append(EVENT_ALIEN_HIT)
+            return True
+        return False
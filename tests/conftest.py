@@ -0,0 +1,10 @@
+"""
+Test configuration for Alien Invaders
+
+The modules of the game are at the top of the repository, not in a package,
+so its folder is put on the path before any test imports them.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
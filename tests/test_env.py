@@ -0,0 +1,116 @@
+"""
+Tests for the rewards and ends of the episodes of env.py
+"""
+from consts import *
+import env
+from env import Env, EnvGroup
+import random
+
+
+def test_rewards():
+    """
+    Tests that every reward is made of the aliens destroyed and the lives
+    lost in its step, over a seeded random episode
+    """
+    game = Env()
+    alive, state = game.reset(3)
+    rng = random.Random(3)
+    aliens = sum(alive)
+    lives = state[3]
+    done = False
+    while not done:
+        alive, state, reward, done = game.step(rng.randrange(8))
+        lost = lives - state[3]
+        expected = (aliens - sum(alive)) * REWARD_ALIEN + lost * REWARD_SHIP
+        if game.getSimulation().getGameState() == 1:
+            expected += REWARD_WIN
+        assert reward == expected
+        aliens = sum(alive)
+        lives = state[3]
+    assert game.getTicks() <= ENV_MAX_TICKS
+
+
+def test_win():
+    """
+    Tests that destroying the last alien ends the episode with REWARD_WIN
+    """
+    game = Env(2, 3)
+    game.reset(0)
+    for row in range(2):
+        for col in range(3):
+            game.getSimulation().killAlien(row, col)
+    alive, state, reward, done = game.step(0)
+    assert done
+    assert reward == REWARD_WIN
+    assert not any(alive)
+
+
+def test_last_life():
+    """
+    Tests that losing a life costs REWARD_SHIP and does not end the
+    episode, until the last one is lost
+    """
+    game = Env()
+    game.reset(1)
+    game.getSimulation().setLives(2)
+    losses = []
+    done = False
+    while not done:
+        reward, done = game.step(0)[2:]
+        if reward <= REWARD_SHIP:
+            losses.append(done)
+    assert losses == [False, True]
+    assert game.getSimulation().getLives() == 0
+
+
+def test_max_ticks(monkeypatch):
+    """
+    Tests that an episode ends after ENV_MAX_TICKS ticks
+    """
+    monkeypatch.setattr(env, 'ENV_MAX_TICKS', 5)
+    game = Env()
+    game.reset(0)
+    dones = [game.step(0)[3] for _ in range(5)]
+    assert dones == [False] * 4 + [True]
+
+
+def test_group():
+    """
+    Tests that a group steps its waves like separate Env objects, and
+    resets a wave that is done with the next seed
+    """
+    count = 3
+    group = EnvGroup(count, 2, 3)
+    group.reset(10)
+    games = [Env(2, 3) for _ in range(count)]
+    for i in range(count):
+        games[i].reset(10 + i)
+    group.getEnv(0).getSimulation().setLives(1)
+    games[0].getSimulation().setLives(1)
+    rng = random.Random(0)
+    seed = 10 + count
+    cells = 2 * 3
+    ends = 0
+    for step in range(300):
+        if step % 100 == 0:
+            # End a wave now and then (the same one in both)
+            for sim in (group.getEnv(1).getSimulation(),
+                        games[1].getSimulation()):
+                for col in range(3):
+                    sim.killAlien(0, col)
+                    sim.killAlien(1, col)
+        actions = bytes(rng.randrange(8) for _ in range(count))
+        alive, state, rewards, dones = group.step(actions)
+        for i in range(count):
+            reward, done = games[i].step(actions[i])[2:]
+            assert rewards[i] == reward
+            assert dones[i] == done
+            if done:
+                games[i].reset(seed)
+                seed += 1
+                ends += 1
+            assert alive[i * cells:(i + 1) * cells] == games[i].getAlive()
+            start = i * env.STATE_SIZE
+            assert (state[start:start + env.STATE_SIZE] ==
+                    games[i].getState())
+    assert ends >= 3
@@ -0,0 +1,23 @@
+"""
+Tests for the performance checks of perf.py
+
+These run the same checks as "python perf.py", so that they fail the test
+suite and not just the script.
+"""
+from consts import *
+import perf
+
+
+def test_allocations():
+    """
+    Tests that no simulation tick allocates more than ALLOCATION_BUDGET
+    """
+    assert perf.checkAllocations() <= ALLOCATION_BUDGET
+
+
+def test_imports():
+    """
+    Tests that no headless module imports the graphics
+    """
+    imports = perf.checkImports()
+    assert set(imports) == set(perf.HEADLESS_MODULES)
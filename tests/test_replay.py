@@ -0,0 +1,95 @@
+"""
+Tests for the recordings and replays of replay.py
+
+A wave is played with seeded random input and recorded, keeping a snapshot
+of the simulation before every tick. Playing the recording again (from the
+start, or from a keyframe) must give back exactly those snapshots.
+"""
+from consts import *
+from replay import *
+import random
+
+# The number of ticks between the keyframes of the recordings
+INTERVAL = 50
+
+
+def record(path=None, seed=7, ticks=600):
+    """
+    Returns: a recording of a wave played with random input, and the
+    snapshot of the simulation before every tick, as a pair (Recording,
+    list of bytes)
+
+    Parameter path: the file to write the recording to
+    Precondition: path is a string, or None (keep it in memory)
+
+    Parameter seed: the seed of the wave and of the input
+    Precondition: seed is an int >= 0
+
+    Parameter ticks: the most ticks to play
+    Precondition: ticks is an int > 0
+    """
+    sim = Simulation(ALIEN_ROWS, ALIENS_IN_ROW, GAME_WIDTH / 2, DEFENSE_LINE,
+                     SHIP_LIVES, seed)
+    recording = Recording(seed, ALIEN_ROWS, ALIENS_IN_ROW, GAME_WIDTH / 2,
+                          DEFENSE_LINE, SHIP_LIVES, sim=sim, path=path,
+                          interval=INTERVAL)
+    rng = random.Random(seed)
+    snapshots = []
+    while len(snapshots) < ticks and sim.getGameState() in (0, 3):
+        snapshots.append(sim.snapshot())
+        mask = rng.randrange(8)
+        recording.record(direction(mask), mask & INPUT_FIRE != 0)
+        playTick(sim, mask)
+    snapshots.append(sim.snapshot())
+    return recording, snapshots
+
+
+def test_replay():
+    """
+    Tests that replaying a whole recording ends in the same state
+    """
+    recording, snapshots = record()
+    assert recording.getTicks() == len(snapshots) - 1
+    assert replay(recording).snapshot() == snapshots[-1]
+
+
+def test_seek():
+    """
+    Tests that seeking to any tick gives the state before that tick
+    """
+    recording, snapshots = record()
+    assert recording.getKeyframes() > 1
+    for tick in (0, 1, INTERVAL - 1, INTERVAL, INTERVAL + 1, 333,
+                 recording.getTicks()):
+        assert seek(recording, tick).snapshot() == snapshots[tick]
+
+
+def test_restore():
+    """
+    Tests that a restored simulation plays on exactly like the original
+    """
+    recording, snapshots = record()
+    sim = recording.newSimulation()
+    for tick in (400, 120, 0, 333):
+        sim.restore(snapshots[tick])
+        play(recording, sim, tick, tick + 40)
+        assert sim.snapshot() == snapshots[tick + 40]
+
+
+def test_file(tmp_path):
+    """
+    Tests that a recording written to a file while it is made is the same
+    as one kept in memory, and can be loaded and seeked
+    """
+    path = str(tmp_path / 'wave.air')
+    streamed, snapshots = record(path)
+    kept = record()[0]
+    for key in range(kept.getKeyframes()):
+        assert streamed.getKeyframe(key) == kept.getKeyframe(key)
+    streamed.close()
+    with open(path, 'rb') as file:
+        assert file.read() == kept.toBytes()
+    loaded = load(path)
+    assert loaded.toBytes() == kept.toBytes()
+    assert seek(loaded, 333).snapshot() == snapshots[333]
+    assert seek(streamed, 333).snapshot() == snapshots[333]
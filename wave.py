@@ -7,6 +7,10 @@ you move to a new level, you are expected to make a new instance of the class.
 
 The subcontroller Wave manages the ship, the aliens and any laser bolts on 
 screen. These are model objects.  Their classes are defined in models.py.
+The rules of the game (marching, firing and collisions) live in the headless
+class Simulation (simulation.py). Wave owns a Simulation, steps it, and keeps
+the GObjects and sounds in sync with it. Given a TextureAtlas, Wave instead
+draws every alien, the ship and the bolts as one SpriteBatch (render.py).
 
 Most of your work on this assignment will be in either this module or 
 models.py. Whether a helper method belongs in this module or models.py is 
@@ -19,8 +23,11 @@ answer.
 from game2d import *
 from consts import *
 from models import *
-from introcs import Point2
-import random
+from simulation import Simulation, Timestep
+from replay import Recording
+import os
+from assets import SoundBank, TextureCache
+from render import TextureAtlas, SpriteBatch
 
 # PRIMARY RULE: Wave can only access attributes in models.py via getters/setters
 # Wave is NOT allowed to access anything in app.py (Subcontrollers are not
@@ -49,60 +56,102 @@ class Wave(object):
     and/or setter for any attribute that you need to access in Invaders.  
     Only add the getters and setters that you need for Invaders. You can keep 
     everything else hidden.
-    
+
+    The game itself is played by a Simulation. Wave forwards the player's
+    input to it, plays a sound for every event it reports and, when drawing,
+    moves the GObjects below to where the Simulation says they are.
+
+    The Simulation runs in fixed ticks (TICK_RATE a second), however often
+    updateAliens is called. The ship and bolts are drawn part of the way
+    between their last two positions, by how far the time is into the next
+    tick, so they move smoothly at any frame rate. The aliens are not: they
+    march in steps.
+
+    If the wave is made with a TextureAtlas, it does not make any GObjects
+    for the aliens, ship and bolts at all. Every frame it adds the ship and
+    bolts to a SpriteBatch instead, which draws them in one go. The aliens
+    have a SpriteBatch of their own, built once: a march only moves the
+    origin of that batch, and a destroyed alien only hides its sprite. So a
+    frame costs the same with thousands of aliens as with a few (see
+    STRESS_MODE).
     """
     # HIDDEN ATTRIBUTES:
-    # Attribute _ship: the player ship to control 
-    # Invariant: _ship is a Ship object or None
+    # Attribute _sim: the headless simulation of this wave
+    # Invariant: _sim is a Simulation object
     #
-    # Attribute _aliens: the 2d list of aliens in the wave 
-    # Invariant: _aliens is a rectangular 2d list containing Alien objects or None 
+    # Attribute _clock: turns the time of every frame into ticks of _sim
+    # Invariant: _clock is a Timestep object
     #
-    # Attribute _bolts: the laser bolts currently on screen 
-    # Invariant: _bolts is a list of Bolt objects, possibly empty
+    # Attribute _input: the direction the ship moves in during the next update
+    # Invariant: _input is "right", "left" or None
     #
-    # Attribute _dline: the defensive line being protected 
-    # Invariant : _dline is a GPath object
+    # Attribute _fire: whether the player fires during the next update
+    # Invariant: _fire is a bool
+    #
+    # Attribute _recording: the input of every tick played so far (written
+    # to a file in REPLAY_FOLDER, if it is not None)
+    # Invariant: _recording is a Recording object of _sim, or None if the
+    # wave was made without one and startRecording was not called yet
+    #
+    # Attribute _batch: the ship and bolts of the wave, drawn as one mesh
+    # Invariant: _batch is a SpriteBatch object, or None if the wave draws
+    # its GObjects one by one
+    #
+    # Attribute _alienBatch: the aliens of the wave, in the places they were
+    # made in (one sprite per cell of the formation, in row-major order)
+    # Invariant: _alienBatch is a SpriteBatch object, or None if _batch is
+    #
+    # Attribute _shown: the number of aliens of every row not yet hidden in
+    # _alienBatch
+    # Invariant: _shown is a list of ints, one per row of the formation
+    # (empty if _alienBatch is None)
     #
-    # Attribute _lives: the number of lives left
-    # Invariant: _lives is an int >= 0
+    # Attribute _ship: the image of the player ship
+    # Invariant: _ship is a Ship object, or None if _batch is not None
     #
-    # Attribute _time: the amount of time since the last Alien "step" 
-    # Invariant: _time is a float >= 0s
+    # Attribute _aliens: the 2d list of alien images in the wave
+    # Invariant: _aliens is a rectangular 2d list containing Alien objects or
+    # None (for an alien that is destroyed, or was never drawn), with the
+    # same shape as the formation of _sim (empty if _batch is not None)
+    #
+    # Attribute _steps: the number of formation steps the images reflect
+    # Invariant: _steps is an int, -1 if the images were never moved
+    #
+    # Attribute _bolts: the images of the laser bolts
+    # Invariant: _bolts is a dict mapping bolts of _sim to Bolt objects. The
+    # simulation reuses its bolts, so the images are reused with them.
+    #
+    # Attribute _dline: the defensive line being protected 
+    # Invariant : _dline is a GPath object
     #
     # You may change any attribute above, as long as you update the invariant
     # You may also add any new attributes as long as you document them.
     # LIST MORE ATTRIBUTES (AND THEIR INVARIANTS) HERE IF NECESSARY
 
-    # Attribute _direction: determines if the aliens will move right or left
-    # Invariant: _direction is an int either 1 or -1
-
-    # Attribute _down: determines when the aliens will move down
-    # Invariant: _down is a bool
-
-    # Attribute _nextBolt: keeps track of how many alien steps until next bolt
-    # Invariant: _nextBolt is an int
-
-    # Attribute _gameState: current state of the game while active
-    # Invariant: _gameState is an int between [0, 3]
-
     # Attribute _sound: if sound is on or off
     # Invariant: _sound is a bool
+    #
+    # Attribute _sounds: the sound effects shared with Invaders
+    # Invariant: _sounds is a SoundBank object, or None for a silent wave
+    #
+    # Attribute _textures: the decoded images shared with Invaders
+    # Invariant: _textures is a TextureCache object, or None if every image
+    # loads its own source
+    #
+    # Attribute _profiler: what the updates of the wave are timed by
+    # Invariant: _profiler is a FrameProfiler object, or None
+    #
+    # Attribute _held: the images this wave acquired from _textures
+    # Invariant: _held is a dict mapping file names to Kivy Textures (empty
+    # if _textures is None, or once the wave is disposed)
     
     # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
-    def getAlien(self, row, col):
-        """
-        Returns: an alien objects in the self._aliens 2D list
-        """
-        return self._aliens[row][col]
-
     def setAlien(self, row, col, alien):
         """
         Returns: Nothing
 
-        This method finds an alien in the self._aliens list using
-        row and col to overwrite that alien with another alien object
-        or None
+        This method removes the alien at the given row and col from the wave.
+        Aliens can only be removed, not replaced.
 
         Parameter row: row where an alien is located
         Precondition: row is an int
@@ -110,47 +159,36 @@ class Wave(object):
         Parameter col: column where an alien is located
         Precondition: col is an int
 
-        Parameter alien: alien overwriting current alien
-        Precondition: alien is of type Alien or None
-        """
-        assert isinstance(row, int), "row given is not an int"
-        assert isinstance(col, int), "col given is not an int"
-        assert row >= 0 and col >= 0, "dimensions given for 2d list is not " \
-                                      "valid"
-        assert isinstance(alien, Alien) or alien is None
-        self._aliens[row][col] = alien
-
-    def getAliens(self):
-        """
-        Returns: 2d list of aliens
+        Parameter alien: the new alien
+        Precondition: alien is None
         """
-        return self._aliens
+        if VALIDATION >= VALIDATE_FULL:
+            assert isinstance(row, int), "row given is not an int"
+            assert isinstance(col, int), "col given is not an int"
+            assert row >= 0 and col >= 0, \
+                "dimensions given for 2d list is not valid"
+            assert alien is None, "aliens can only be removed"
+        self._sim.killAlien(row, col)
+        if self._aliens:
+            self._aliens[row][col] = None
 
     def getShip(self):
         """
-        Returns: the image of the ship
+        Returns: the ship of the simulation, or None if it was destroyed
         """
-        return self._ship
+        return self._sim.getShip()
 
     def setShip(self, value):
         """
         Returns: Nothing
 
-        This method uses the Ship class to create a ship
+        This method places a new ship at the bottom of the screen
 
-        Parameter value: the player ship to control
+        Parameter value: the ship's x-coordinate
         Precondition: value is an int greater than 0
                       and less than the game's screen width
         """
-        assert (isinstance(value, int) or isinstance(value, float),
-                "value given is not an int or float")
-        assert 0 < value < GAME_WIDTH, "Ship is off the screen"
-        if value != None:
-            self._ship = Ship(value, y=SHIP_BOTTOM,
-                              width=SHIP_WIDTH, height=SHIP_HEIGHT,
-                              source="ship.png")
-        else:
-            self._ship = None
+        self._sim.setShip(value)
 
     def getDline(self):
         """
@@ -170,16 +208,17 @@ class Wave(object):
         Precondition: line is an int
 
         """
-        assert isinstance(line, int) and line >= 0, "line is not an int " \
-                                                    "or less than 0"
+        if VALIDATION >= VALIDATE_BOUNDARY:
+            assert isinstance(line, int) and line >= 0, \
+                "line is not an int or less than 0"
         self._dline = GPath(points=[0, line, GAME_WIDTH, line],
-                            linewidth=2, linecolor="green")
+                            linewidth=DEFENSE_LINE_WIDTH, linecolor="green")
 
     def getLives(self):
         """
         Return: number of lives the ship has
         """
-        return self._lives
+        return self._sim.getLives()
 
     def setLives(self, lives):
         """
@@ -190,38 +229,50 @@ class Wave(object):
         Parameter lives: amount of lives
         Precondition: lives is an int greater than or equal to 0 and at most
                 the constant SHIP_LIVES from the consts.py file
-                and less than the game's screen height
         """
-        assert isinstance(lives, int), "lives given is not an int"
-        assert 0 <= lives <= SHIP_LIVES, "lives is out of range"
-        self._lives = lives
+        self._sim.setLives(lives)
 
     def getBolts(self):
         """
-        Return: bolts in list
+        Return: the pool of bolts on screen
         """
-        return self._bolts
+        return self._sim.getBolts()
 
-    def getGameState(self):
+    def hasPlayerBolt(self):
+        """
+        Return: True if a player bolt is on screen, False otherwise
+        """
+        return self._sim.hasPlayerBolt()
+
+    def getSeed(self):
         """
-        Returns: self._gameState
+        Returns: the seed of the random numbers of the wave
+        """
+        return self._sim.getSeed()
 
-        This method returns the current game state
+    def getRecording(self):
+        """
+        Returns: the recording of every tick played so far (see replay.py),
+        or None if the wave is not recording yet
         """
-        return self._gameState
+        return self._recording
+
+    def getGameState(self):
+        """
+        Returns: the current game state of the simulation
+        """
+        return self._sim.getGameState()
 
     def setGameState(self, gameState):
         """
          Returns: Nothing
 
-        This method updates the current self._gameState
+        This method updates the current game state of the simulation
 
         Parameter gameState: current gameState
         Precondition: gameState is an int between [0,3]
         """
-        assert isinstance(gameState, int), "gameState given is not an int"
-        assert 0 <= gameState <= 3, "gameState must be between [0,3]"
-        self._gameState = gameState
+        self._sim.setGameState(gameState)
 
     def getSound(self):
         """
@@ -238,11 +289,14 @@ class Wave(object):
         Parameter sound: if sound is on or off
         Precondition: sound is a bool
         """
-        assert isinstance(sound, bool), "sound given is not a bool"
+        if VALIDATION >= VALIDATE_BOUNDARY:
+            assert isinstance(sound, bool), "sound given is not a bool"
         self._sound = sound
 
         # INITIALIZER (standard form) TO CREATE SHIP AND ALIENS
-    def __init__(self, row, col, x, Dline, lives, sound=True):
+    def __init__(self, row, col, x, Dline, lives, sound=True, sounds=None,
+                 atlas=None, textures=None, seed=None, profiler=None,
+                 speed=ALIEN_SPEED, record=True):
         """
         Initializes the wave of aliens and ship.
 
@@ -266,28 +320,83 @@ class Wave(object):
 
         Parameter sound: if sound is on or off
         Precondition: sound is a bool
-        """
-        self.makeAliens(row, col)
-        self._time = 0
-        self._direction = 1
-        self._down = False
-        self.setShip(x)
+
+        Parameter sounds: the sound effects to play (loaded once by Invaders)
+        Precondition: sounds is a SoundBank object or None (no sounds)
+
+        Parameter atlas: the sprites to draw the wave with in a single batch
+        Precondition: atlas is a TextureAtlas object or None (draw every
+        GObject on its own)
+
+        Parameter textures: the decoded images of the GObjects (without an
+        atlas), loaded once by Invaders
+        Precondition: textures is a TextureCache object or None (every
+        GObject loads its own image)
+
+        Parameter seed: the seed of the random numbers of the wave
+        Precondition: seed is an int >= 0, or None (pick one at random)
+
+        Parameter profiler: what to time the updates of the wave by (shared
+        with Invaders)
+        Precondition: profiler is a FrameProfiler object or None (do not
+        time them)
+
+        Parameter speed: the number of seconds between alien steps
+        Precondition: speed is a number > 0
+
+        Parameter record: whether to start recording the wave now (a wave
+        made ahead of time starts with startRecording once it is played, so
+        a wave that is never played leaves no replay file)
+        Precondition: record is a bool
+        """
+        if VALIDATION >= VALIDATE_BOUNDARY:
+            assert sounds is None or isinstance(sounds, SoundBank), \
+                "sounds given is not a SoundBank"
+            assert atlas is None or isinstance(atlas, TextureAtlas), \
+                "atlas given is not a TextureAtlas"
+            assert textures is None or isinstance(textures, TextureCache), \
+                "textures given is not a TextureCache"
+        self._sim = Simulation(row, col, x, Dline, lives, seed, speed)
+        self._sim.setProfiler(profiler)
+        self._profiler = profiler
+        self._recording = None
+        if record:
+            self.startRecording()
+        self._clock = Timestep()
+        self._input = None
+        self._fire = False
+        self._sounds = sounds
+        self._textures = textures
+        self._held = {}
+        if atlas is None:
+            self._batch = None
+            self._alienBatch = None
+            self._shown = []
+            self.makeAliens()
+            self._ship = Ship(x, y=SHIP_BOTTOM, width=SHIP_WIDTH,
+                              height=SHIP_HEIGHT, source="ship.png",
+                              texture=self.getTexture("ship.png"))
+        else:
+            self._batch = SpriteBatch(atlas, 1 + PLAYER_BOLT_CAPACITY +
+                                      ALIEN_BOLT_CAPACITY)
+            self._alienBatch = SpriteBatch(atlas, row * col)
+            self.makeAlienBatch()
+            self._aliens = []
+            self._ship = None
         self.setDline(Dline)
-        self.setLives(lives)
-        self._nextBolt = -1
-        self._bolts = []
-        self._gameState = 0
+        self._bolts = {}
         self.setSound(sound)
     
     # UPDATE METHOD TO MOVE THE SHIP, ALIENS, AND LASER BOLTS
-    def makeAliens(self, row, col):
+    def makeAliens(self):
         """
-        Returns: 2d list of aliens
+        Returns: Nothing
 
         This is a helper method for initializing a wave of aliens. The purpose
-         is to create a 2d list of aliens whose dimensions are determined by
-        row and column. The rules for skins of each alien is assigned as
-        follows:
+        is to create a 2d list for the alien images, one for every alien of
+        the simulation. An image is only made (see makeAlien) the first time
+        its alien is drawn, so aliens that are never on screen never get one.
+        The rules for skins of each alien is assigned as follows:
             - skins are assigned starting from the bottom row to the top
             - aliens of the same row will have the same skin
             - every two consecutive rows will have the same skin
@@ -301,192 +410,208 @@ class Wave(object):
             - aliens will be positioned based on consts.py values to create
                     neat spacing between the aliens
 
-        Parameter row: how many rows in the 2d list
-        Precondition: row is an int and greater than or equal to 0
-
-        Parameter col: how many columns in the 2d list
-        Precondition: col is an int and greater than or equal to 0
+        Every skin is decoded once (by the texture cache), not once per alien.
         """
+        formation = self._sim.getFormation()
         self._aliens = []
-        yCurrent = GAME_HEIGHT - (ALIEN_CEILING +ALIEN_ROWS*
-                                  (ALIEN_HEIGHT+ ALIEN_V_SEP))
-        for i in range(row):
-            tempRow = []
-            xCurrent = ALIEN_H_SEP
-            yCurrent += ALIEN_V_SEP
-            for j in range(col):
-                xCurrent += ALIEN_H_SEP
-                alien = Alien(x=xCurrent,y=yCurrent,width=ALIEN_WIDTH,
-                              height=ALIEN_HEIGHT,
-                              source=ALIEN_IMAGES[i // 2 % len(ALIEN_IMAGES)])
-                xCurrent += ALIEN_WIDTH
-                tempRow.append(alien)
-            yCurrent += ALIEN_HEIGHT
-            self._aliens.append(tempRow)
+        for row in range(formation.getRows()):
+            self._aliens.append([None] * formation.getCols())
+        self._steps = formation.getSteps()
 
-    def updateAliens(self, dt):
+    def makeAlien(self, row, col):
         """
-        Returns: Number of seconds that have passed since the last update
+        Returns: a new image of an alien of the simulation, where it is now
 
-        This method keeps track of time in the game. The invariant self._time
-        stores how much time has passed in the game.
+        Parameter row: the row of the alien
+        Precondition: row is an int in 0..number of rows-1
 
-        Parameter dt: The time in seconds since last update
-        Precondition: dt is a number (int or float)
+        Parameter col: the column of the alien
+        Precondition: col is an int in 0..number of columns-1
         """
-        assert isinstance(dt, int) or isinstance(dt, float), "dt is of " + \
-            "type " + str(type(dt)) + " and is not an int or float"
-        if self._ship is None:
-            self._gameState = 3
-        if self._ship is None:
-            self.setShip(GAME_WIDTH / 2)
-        elif self.collideBorder():
-            self._gameState = 2
-        elif not self.isAliens():
-            self._gameState = 1
-        elif self._gameState == 0:
-            self._time += dt
-            self.alienBolt()
-            self.moveAliens(dt)
-            self.moveBolt()
-        if self._lives == 0:
-            self.setGameState(2)
-
-    def moveAliens(self, dt):
-        """
-        Returns: Nothing
-
-        This method moves all aliens to the right based on the constant
-        ALIEN_H_WALK. It does this when enough frames (time) have passed for
-        them to move, which is dependent on the constant ALIEN_SPEED. For
-        example, if the speed is 1.0, the aliens move every full second
-        """
-        assert isinstance(dt, int) or isinstance(dt, float), "dt is of " + \
-            "type " + str(type(dt)) + " and is not an int or float"
-        if self._time >= ALIEN_SPEED:
-            if self.rightMostAlien().right > GAME_WIDTH - ALIEN_H_SEP \
-                    and self._down:
-                self.alienToDown()
-                self._direction = -1
-                self._down = False
-            elif self.leftMostAlien().left < ALIEN_H_SEP and self._down:
-                self.alienToDown()
-                self._direction = 1
-                self._down = False
-            else:
-                self.alienMove()
-                self._down = True
-            self._time = 0
-            self._nextBolt -= 1
+        formation = self._sim.getFormation()
+        source = ALIEN_IMAGES[formation.getKind(row, col)]
+        return Alien(x=formation.getX(col), y=formation.getY(row),
+                     width=formation.getAlienWidth(),
+                     height=formation.getAlienHeight(), source=source,
+                     texture=self.getTexture(source))
 
-    def rightMostAlien(self):
+    def makeAlienBatch(self):
         """
-        Returns: rightmost alien currently in the list
+        Returns: Nothing
 
-        This method is a helper for moveAliens so that the game can tell when
-        to switch directions (left/right) even when aliens are destroyed
+        This is a helper method for initializing a wave drawn with an atlas.
+        It adds a sprite for every alien of the simulation to _alienBatch, in
+        the place the alien was made in, with the same skins as makeAliens.
+        """
+        formation = self._sim.getFormation()
+        batch = self._alienBatch
+        width = formation.getAlienWidth()
+        height = formation.getAlienHeight()
+        offsetX = formation.getOffsetX()
+        offsetY = formation.getOffsetY()
+        batch.begin()
+        self._shown = []
+        for row in range(formation.getRows()):
+            y = formation.getY(row) - offsetY
+            for col in range(formation.getCols()):
+                kind = formation.getKind(row, col)
+                batch.add(ALIEN_IMAGES[kind], formation.getX(col) - offsetX, y,
+                          width, height)
+                if not formation.isAlive(row, col):
+                    batch.hide(batch.getCount() - 1)
+            self._shown.append(formation.getRowCount(row))
+        batch.end()
+        batch.setOrigin(offsetX, offsetY)
+
+    def getTexture(self, name):
+        """
+        Returns: the decoded image of a file, or None if there is no cache
+
+        The wave acquires every image from the texture cache only once, and
+        holds it until it is disposed.
+
+        Parameter name: the file name of the image
+        Precondition: name is a file in the Images folder
+        """
+        if self._textures is None:
+            return None
+        texture = self._held.get(name)
+        if texture is None:
+            texture = self._textures.acquire(name)
+            self._held[name] = texture
+        return texture
+
+    def startRecording(self):
         """
-        alien = None
-        for col in range(0, ALIENS_IN_ROW, 1):
-            for row in range(0, ALIEN_ROWS, 1):
-                try:
-                    if self._aliens[row][col] is not None:
-                        alien = self._aliens[row][col]
-                except AttributeError:
-                    pass
-        return alien
+        Returns: Nothing
 
-    def leftMostAlien(self):
-        """
-        Returns: leftmost alien currently in the list
+        This method starts the recording of the wave (see getRecording),
+        written to a file in REPLAY_FOLDER if it is not None. It does nothing
+        if the wave is recording already.
 
-        This method is a helper for moveAliens so that the game can tell when
-        to switch directions (left/right) even when aliens are destroyed
+        Precondition: the wave was not updated yet
         """
-        alien = None
-        for col in range(ALIENS_IN_ROW-1, -1, -1):
-            for row in range(ALIEN_ROWS-1, -1, -1):
-                try:
-                    if self._aliens[row][col] is not None:
-                        alien = self._aliens[row][col]
-                except AttributeError:
-                    pass
-        return alien
+        if self._recording is not None:
+            return
+        sim = self._sim
+        path = None
+        if REPLAY_FOLDER is not None:
+            os.makedirs(REPLAY_FOLDER, exist_ok=True)
+            path = os.path.join(REPLAY_FOLDER, 'wave-' +
+                                str(sim.getSeed()) + '.air')
+        formation = sim.getFormation()
+        self._recording = Recording(sim.getSeed(), formation.getRows(),
+                                    formation.getCols(), sim.getShip().x,
+                                    sim.getDline(), sim.getLives(),
+                                    sim.getSpeed(), sim, path)
 
-    def alienMove(self):
+    def dispose(self):
         """
         Returns: Nothing
 
-        This method moves all aliens to the left or right by the constant
-        ALIEN_H_WALK. The direction an alien moves depends on whether the
-        attribute _direction == -1 (left) or _direction == 1 (right)
+        This method gives back every image the wave acquired from the
+        texture cache, and closes the recording of the wave (if any).
+        Invaders calls it when it is done with the wave; the cache keeps the
+        images around for the next one.
         """
-        for row in self._aliens:
-            for alien in row:
-                try:
-                    alien.setX(alien.x + self._direction * ALIEN_H_WALK)
-                except AttributeError:
-                    pass
+        if self._recording is not None:
+            self._recording.close()
+        for name in self._held:
+            self._textures.release(name)
+        self._held.clear()
 
-    def alienToDown(self):
+    def updateAliens(self, dt):
         """
         Returns: Nothing
 
-        This method moves all aliens to the down by the constant ALIEN_V_WALK
-        """
-        for row in self._aliens:
-            for alien in row:
-                try:
-                    space = ALIEN_V_WALK
-                    if alien.bottom - ALIEN_V_WALK < \
-                            self._dline.top + self._dline.linewidth:
-                        space = alien.bottom - \
-                                (self._dline.top + self._dline.linewidth)
-                    alien.setY(alien.y - space)
-                except AttributeError:
-                    pass
+        This method animates a single frame of the wave and plays the sounds
+        of anything that happened during that frame.
 
-    def isAliens(self):
-        """
-        Returns: A bool depending on self._aliens list
+        The frame is played as a whole number of ticks of the simulation, as
+        many as fit in the time since the last frame (see Timestep), with
+        the input given since the last tick during every one of them (and
+        recorded for every one of them). A frame too short for a tick keeps
+        the input for the next frame, so a short press is never dropped. If
+        the wave stops being in play, the rest of the frame is dropped.
+
+        If the wave has a profiler, the update is timed (phase updateAliens)
+        and the aliens and bolts left are counted (counters aliens and bolts).
 
-        This method returns True is the self._aliens list contains
-        at least one alien. It returns False if there are no more
-        aliens in the list
+        Parameter dt: The time in seconds since last update
+        Precondition: dt is a number (int or float)
         """
-        isAlien = False
-        for i in self._aliens:
-            for j in i:
-                if j is not None:
-                    isAlien = True
-        return isAlien
+        if VALIDATION >= VALIDATE_FULL:
+            assert isinstance(dt, int) or isinstance(dt, float), \
+                "dt is not an int or float"
+        sim = self._sim
+        profiler = self._profiler
+        if profiler is not None:
+            profiler.begin('updateAliens')
+        ticks = self._clock.advance(dt)
+        for _ in range(ticks):
+            self._recording.record(self._input, self._fire)
+            sim.step(self._input, self._fire)
+            if sim.getGameState() != 0:
+                self._clock.reset()
+                break
+        if ticks > 0:
+            # Only input that a tick played is used up
+            self._input = None
+            self._fire = False
+        self.playEvents()
+        if profiler is not None:
+            profiler.end('updateAliens')
+            profiler.setCounter('aliens', sim.getFormation().getCount())
+            profiler.setCounter('bolts', sim.getBolts().getCount())
+
+    def playEvents(self):
+        """
+        Returns: Nothing
+
+        This method asks the sound bank for a sound for every event the
+        simulation recorded since the last frame (if sound is on), and then
+        clears the events. The bank plays them when Invaders flushes it.
+        """
+        if self._sound and self._sounds is not None:
+            for event in self._sim.getEvents():
+                if event == EVENT_ALIEN_BOLT:
+                    self._sounds.play('pew2.wav')
+                elif event == EVENT_SHIP_HIT:
+                    self._sounds.play('blast1.wav')
+                elif event == EVENT_ALIEN_HIT:
+                    self._sounds.play('pop2.wav')
+                elif event == EVENT_PLAYER_BOLT:
+                    self._sounds.play('pew1.wav')
+        self._sim.clearEvents()
 
     def updateShip(self, input):
         """
-        Returns: new x-coordinate of the ship after each animation
-
-        This method keeps track of the position of the ship after each
-        animation
+        Returns: Nothing
 
-        Parameter location: x-coordinate of the ship
-        Precondition: location is an int between 0 and GAME_WIDTH
+        This method makes the ship move SHIP_MOVEMENT pixels to the left or
+        right every tick of the next update
 
         Parameter input: used to control the ship
         Precondition: input is either "right" or "left"
         """
-        assert input == "right" or input == "left", "Invalid input"
-        if input == "right":
-            self.setShip((min(self._ship.getX() + SHIP_MOVEMENT,
-                              GAME_WIDTH - SHIP_WIDTH / 2)))
-        if input == "left":
-            self.setShip(max(self._ship.getX() -
-                             SHIP_MOVEMENT, SHIP_WIDTH / 2))
+        if VALIDATION >= VALIDATE_FULL:
+            assert input == "right" or input == "left", "Invalid input"
+        self._input = input
+
+    def fireBolt(self):
+        """
+        Returns: Nothing
+
+        This method makes the ship fire a bolt during the next update, as
+        soon as there is no other player bolt on screen
+        """
+        self._fire = True
 
     def addBolt(self, x, y, player):
         """
         Returns: nothing
 
-        This method adds a bolt object to list
+        This method adds a bolt to the simulation
 
         Parameter x: X-coordinate of the bolt
         Precondition: x is a number or int
@@ -497,166 +622,165 @@ class Wave(object):
         Parameter player: True if bolt is a player bolt
         Precondition: player is a bool
         """
-        assert (isinstance(x, int) or isinstance(x, float),
-                "x needs to be number")
-        assert (isinstance(y, int) or isinstance(y, float),
-                "y needs to be number")
-        self._bolts.append(Bolt(x, y,
-                                BOLT_WIDTH, BOLT_HEIGHT, "yellow",
-                                "yellow", BOLT_SPEED, player))
+        if VALIDATION >= VALIDATE_BOUNDARY:
+            assert isinstance(x, int) or isinstance(x, float), \
+                "x needs to be number"
+            assert isinstance(y, int) or isinstance(y, float), \
+                "y needs to be number"
+            assert isinstance(player, bool), "player given is not a bool"
+        self._sim.addBolt(x, y, player)
 
-    def moveBolt(self):
+    def clearBolts(self):
         """
-        Returns: nothing
+        This method clears the bolt list
+        """
+        self._sim.clearBolts()
 
-        This method moves bolt object by distance of BOLT_SPEED
+    # DRAW METHOD TO DRAW THE SHIP, ALIENS, DEFENSIVE LINE AND BOLTS
+    def draw(self, view, static=True):
         """
-        pos = 0
-        for x in self._bolts:
-            if x.isPlayerBolt():
-                x.setY(min(x.getY() + BOLT_SPEED,
-                           GAME_HEIGHT - BOLT_HEIGHT / 2))
-            else:
-                x.setY(max(x.getY() - BOLT_SPEED, 0))
-            if x.getY() == GAME_HEIGHT - BOLT_HEIGHT / 2:
-                del self._bolts[pos]
-            elif x.getY() == 0:
-                del self._bolts[pos]
-            self.collideAliens(x, pos)
-            self.collideShip(x, pos)
-            pos += 1
+        Returns: Nothing
+
+        This method draws the ship, aliens, defensive line, and bolts to
+        the game.
+
+        The defensive line never moves, so a caller that keeps it in a
+        StaticLayer (see drawStatic) can leave it out.
+
+        Parameter: the window to draw objects in
+        Precondition: view is a valid window
 
-    def alienBolt(self):
+        Parameter static: whether to draw the defensive line too
+        Precondition: static is a bool
+        """
+        # precondition is handled by GObject's method draw
+        if self._batch is not None:
+            self.drawBatch(view)
+        else:
+            self.drawSprites(view)
+        if static:
+            self.drawStatic(view)
+
+    def drawStatic(self, view):
         """
         Returns: Nothing
 
-        This method randomizes how many steps the aliens should take for the
-        next bolt to fire from an alien. It also randomly picks one bottommost
-        alien from any column to fire the bolt.
-        """
-        if self._nextBolt == -1:
-            self._nextBolt = random.randint(1, BOLT_RATE)
-        if self._nextBolt == 0:
-            flag = True
-            row = 0
-            fireColumn = random.randint(0, ALIENS_IN_ROW - 1)
-            while flag:
-                if self._aliens[row][fireColumn] is not None:
-                    flag = False
-                elif row == len(self._aliens) - 1:
-                    fireColumn = random.randint(0, ALIENS_IN_ROW - 1)
-                elif self._aliens[row][fireColumn] is None:
-                    row += 1
-            alien = self._aliens[row][fireColumn]
-            self.addBolt(alien.x, alien.bottom, False)
-            if self._sound:
-                Sound('pew2.wav').play()
-            self._nextBolt = random.randint(1, BOLT_RATE)
+        This method draws the parts of the wave that do not move (the
+        defensive line). They only change when setDline is called, which
+        makes a new GPath (so getDline tells a caller if it has to draw them
+        again).
 
-    def clearBolts(self):
+        Parameter: the window (or StaticLayer) to draw objects in
+        Precondition: view is a valid window, or a StaticLayer
         """
-        This method clears the bolt list
+        self._dline.draw(view)
+
+    def drawBatch(self, view):
         """
-        self._bolts.clear()
+        Returns: Nothing
 
-    # DRAW METHOD TO DRAW THE SHIP, ALIENS, DEFENSIVE LINE AND BOLTS
-    def draw(self, view):
+        This method draws the aliens and then the ship and the bolts, each
+        as a single SpriteBatch
+
+        The aliens are only sent to their batch again if one was destroyed,
+        and then only the rows that lost an alien are looked at.
+
+        Parameter: the window to draw objects in
+        Precondition: view is a valid window
+        """
+        formation = self._sim.getFormation()
+        aliens = self._alienBatch
+        changed = False
+        for row in range(formation.getRows()):
+            if self._shown[row] != formation.getRowCount(row):
+                cols = formation.getCols()
+                for col in range(cols):
+                    if not formation.isAlive(row, col):
+                        aliens.hide(row * cols + col)
+                self._shown[row] = formation.getRowCount(row)
+                changed = True
+        if changed:
+            aliens.end()
+        aliens.setOrigin(formation.getOffsetX(), formation.getOffsetY())
+        aliens.draw(view)
+        batch = self._batch
+        batch.begin()
+        alpha = self._clock.getAlpha()
+        ship = self._sim.getShip()
+        if ship is not None:
+            batch.add("ship.png", ship.lerpX(alpha), ship.getY(), SHIP_WIDTH,
+                      SHIP_HEIGHT)
+        pool = self._sim.getBolts()
+        for i in range(pool.getCount()):
+            bolt = pool.get(i)
+            batch.add("bolt", bolt.getX(), bolt.lerpY(alpha), BOLT_WIDTH,
+                      BOLT_HEIGHT)
+        batch.end()
+        batch.draw(view)
+
+    def drawSprites(self, view):
         """
         Returns: Nothing
 
-        This method draws the ship, aliens, defensive line, and bolts to
-        the game.
+        This method draws the aliens, the ship and the bolts one GObject at
+        a time. Every image is moved to its alien (or ship) once, here,
+        and only if the formation moved since the last frame. Rows above
+        the top of the screen are skipped, and an alien gets its image the
+        first time its row comes into view.
 
         Parameter: the window to draw objects in
         Precondition: view is a valid window
         """
-        # precondition is handled by GObject's method draw
-        for row in self._aliens:
-            for alien in row:
-                try:
+        formation = self._sim.getFormation()
+        moved = formation.getSteps() != self._steps
+        self._steps = formation.getSteps()
+        top = GAME_HEIGHT + formation.getAlienHeight() / 2
+        for row in range(len(self._aliens)):
+            y = formation.getY(row)
+            if y >= top:
+                break
+            images = self._aliens[row]
+            for col in range(len(images)):
+                alien = images[col]
+                if not formation.isAlive(row, col):
+                    images[col] = None
+                elif alien is None:
+                    alien = self.makeAlien(row, col)
+                    images[col] = alien
+                    alien.draw(view)
+                else:
+                    if moved:
+                        alien.setX(formation.getX(col))
+                        alien.setY(y)
                     alien.draw(view)
-                except AttributeError:
-                    pass
-        try:
+        ship = self._sim.getShip()
+        if ship is not None:
+            self._ship.setX(ship.lerpX(self._clock.getAlpha()))
             self._ship.draw(view)
-        except AttributeError:
-            pass
-        self._dline.draw(view)
-        if self._bolts != None:
-            for x in self._bolts:
-                x.draw(view)
-
-    # HELPER METHODS FOR COLLISION DETECTION
-    def collideBorder(self):
-        """
-        Returns: A bool depending on whether an alien collided with the border
-
-        This method returns True is the self._aliens list collided with the top
-        of the border. It returns False otherwise
-        """
-        collision = False
-        for i in self._aliens:
-            for j in i:
-                try:
-                    if j.bottom <= self._dline.top + self._dline.linewidth:
-                        collision = True
-                except AttributeError:
-                    pass
-        return collision
-
-    def collideShip(self, x, pos):
-        """
-        This method regulates bolts by removing bolt object from the list
-        each time it collides with a ship
-
-        Parameter x: the bolt being processed
-        Precondition: x is a Bolt object
-
-        Parameter pos: the position of the bolt object in list
-        Precondition: pos is an int
-        """
-        assert isinstance(pos, int), "pos given is not an int"
-        assert isinstance(x, Bolt), "x given is not a Bolt object"
-        try:
-            t = Point2(x.getX(), x.getY())
-            z = Point2(self._ship.getX(), self._ship.getY())
-            if (t.distance(z) >= 0 and t.distance(z) <= SHIP_WIDTH / 2
-                    and not x.isPlayerBolt()):
-                del self._bolts[pos]
-                if self._sound:
-                    Sound('blast1.wav').play()
-                self._ship = None
-                self._gameState = 0
-        except AttributeError:
-            pass
-
-    def collideAliens(self, x, pos):
-        """
-        This method regulates bolts by removing bolt object from the list
-        each time it collides with an alien
-
-        Parameter x: the bolt being processed
-        Precondition: x is a Bolt object
-
-        Parameter pos: the position of the bolt object in list
-        Precondition: pos is an int
-        """
-        assert isinstance(pos, int), "pos given is not an int"
-        assert isinstance(x, Bolt), "x given is not a Bolt object"
-        list1 = 0
-        for row in self._aliens:
-            list2 = 0
-            for alien in row:
-                try:
-                    t = Point2(x.getX(), x.getY())
-                    z = Point2(alien.getX(), alien.getY())
-                    if (0 <= t.distance(z) <= ALIEN_WIDTH / 2
-                            and x.isPlayerBolt()):
-                        del self._bolts[pos]
-                        if self._sound:
-                            Sound('pop2.wav').play()
-                        self._aliens[list1][list2] = None
-                except AttributeError:
-                    pass
-                list2 += 1
-            list1 += 1
+        self.drawBolts(view)
+
+    def drawBolts(self, view):
+        """
+        Returns: Nothing
+
+        This method draws a Bolt for every bolt in flight, between its last
+        two positions. A Bolt is only made the first time a bolt of the
+        simulation is used.
+
+        Parameter: the window to draw objects in
+        Precondition: view is a valid window
+        """
+        alpha = self._clock.getAlpha()
+        pool = self._sim.getBolts()
+        for i in range(pool.getCount()):
+            body = pool.get(i)
+            bolt = self._bolts.get(body)
+            if bolt is None:
+                bolt = Bolt(body.getX(), body.lerpY(alpha), BOLT_WIDTH,
+                            BOLT_HEIGHT, "yellow", "yellow",
+                            body.getVelocity(), body.isPlayerBolt())
+                self._bolts[body] = bolt
+            else:
+                bolt.setX(body.getX())
+                bolt.setY(body.lerpY(alpha))
+            bolt.draw(view)